@@ -5,9 +5,124 @@ class HawksSettings(BaseSettings):
     admin_username: str
     admin_password: str
     database_url: str = "sqlite:///./hawks.db"
+    # Pool de conexões dos requests (padrões do SQLAlchemy). A espera por conexão acontece numa
+    # thread, nunca no event loop; cada scan em andamento prende uma conexão própria, somada ao pool
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    # Máximo de pipelines em andamento (admissão da fila); os pools por estágio dividem esses scans
     max_concurrent_scans: int = 3
     scan_threads: int = 8
-    
+
+    # Concorrência adaptativa do estágio de vulnerabilidades: max_concurrent_scans é o teto,
+    # min_concurrent_scans o piso
+    adaptive_concurrency: bool = True
+    min_concurrent_scans: int = 1
+    concurrency_adjust_interval: int = 15
+
+    # Slots por estágio do pipeline, dentro do limite de max_concurrent_scans; 0 = segue a concorrência adaptativa
+    enumeration_concurrency: int = 6
+    probing_concurrency: int = 3
+    vulnerability_concurrency: int = 0
+
+    # Orçamento global de requisições/s dividido entre httpx/nuclei (0 = sem limite, o padrão)
+    global_rate_limit: int = 0
+    # Limite opcional de requisições/s por domínio alvo (0 = sem limite)
+    domain_rate_limit: int = 0
+    # O -rate-limit de um processo é fixo depois que ele inicia: com orçamento ativo o httpx roda
+    # em lotes de até N hosts, cada um com a fatia vigente (o nuclei já renova a fatia a cada shard)
+    httpx_batch_size: int = 1000
+
+    # Nuclei: hosts por shard (cada shard é um processo com timeout próprio; 0 = sem shards)
+    nuclei_shard_size: int = 150
+    # Processos nuclei simultâneos somando todos os scans (0 = número de CPUs)
+    nuclei_shard_concurrency: int = 0
+    # Novas tentativas apenas para os shards que falharam
+    nuclei_shard_retries: int = 1
+
+    # Diretório com subfinder/httpx/nuclei/chaos (vazio = ~/go/bin e depois o PATH)
+    tools_path: str = ""
+
+    # Pré-filtro DNS entre a enumeração e o httpx: só subdomínios que resolvem são sondados.
+    # Servidores separados por vírgula (host ou host:porta; vazio = /etc/resolv.conf),
+    # consultas simultâneas somando todos os scans e TTLs do cache positivo/negativo em segundos
+    dns_prefilter: bool = False
+    dns_resolvers: str = ""
+    dns_timeout: float = 2.0
+    dns_retries: int = 2
+    dns_concurrency: int = 200
+    dns_cache_ttl: int = 3600
+    dns_negative_ttl: int = 600
+    dns_cache_entries: int = 200000
+    # Detecção de wildcard por zona: consultas com rótulos aleatórios (0 = desativada);
+    # nomes respondidos só pelo wildcard viram um único host antes do httpx/nuclei
+    dns_wildcard_probes: int = 3
+
+    # Motor de sondagem HTTP: httpx (binário) ou native (asyncio dentro do processo, sem
+    # processo nem arquivos temporários por scan). Concorrência do motor nativo soma todos os scans
+    probe_engine: str = "httpx"
+    probe_concurrency: int = 100
+    probe_timeout: float = 10.0
+    # Conexões keep-alive mantidas para reaproveitar quando um host é sondado de novo;
+    # ociosas além de probe_pool_idle_seconds são fechadas e, com o pool cheio, sai a mais antiga
+    probe_pool_size: int = 256
+    probe_pool_idle_seconds: int = 30
+
+    # Workspaces por scan: diretório base (vazio = /dev/shm se disponível, senão o temp do sistema)
+    workspace_dir: str = ""
+    workspace_tmpfs: bool = True
+    # Cota de artefatos por scan em MB (0 = sem limite)
+    workspace_quota_mb: int = 512
+
+    # Compressão de scan_results.result_data (payloads menores que o mínimo ficam em texto puro)
+    result_compression: bool = True
+    result_compression_min_bytes: int = 1024
+    result_compression_level: int = 6
+    # Linhas antigas comprimidas por lote pela migração em background
+    result_migration_batch: int = 200
+
+    # Retenção: saídas brutas mantidas por target e tipo de scan (0 = manter tudo, o padrão);
+    # scans mais antigos ficam só como resumo em scan_summaries. A remoção não tem volta:
+    # com retention_dry_run o log mostra o que seria removido sem apagar nada
+    retention_keep_raw_scans: int = 0
+    retention_dry_run: bool = False
+    retention_interval_minutes: int = 60
+    retention_batch_size: int = 100
+    # Vacuum após a compactação: incremental, full ou off. O incremental só age em bancos com
+    # auto_vacuum incremental (bancos novos já nascem assim; os existentes são convertidos
+    # sob demanda em POST /api/maintenance/convert-vacuum, que faz um VACUUM completo)
+    retention_vacuum: str = "incremental"
+
+    # Serialização JSON dos resultados, JSONL do nuclei e respostas da API: auto, orjson ou stdlib
+    json_backend: str = "auto"
+
+    # Autenticação: tokens verificados mantidos em memória e IPs rastreados pelo limite de login
+    token_cache_entries: int = 1024
+    login_limiter_max_ips: int = 100000
+
+    # Páginas HTML renderizadas mantidas em cache por versão dos dados (0 = desativado)
+    render_cache_entries: int = 64
+    render_cache_max_mb: int = 32
+
+    # Monitor do event loop: intervalo de amostragem e atraso considerado travamento (0 = desativado)
+    loop_monitor_interval_ms: int = 100
+    loop_stall_threshold_ms: int = 250
+
+    # Agendador de scans recorrentes: intervalo entre avaliações, máximo de scans na fila
+    # para o agendador continuar enfileirando (0 = sem limite) e jitter como fração do período
+    scheduler_enabled: bool = True
+    scheduler_tick_seconds: int = 60
+    scheduler_max_backlog: int = 50
+    scheduler_jitter: float = 0.1
+
+    # Checkpoints de estágio mais antigos que isso são ignorados ao retomar um scan
+    checkpoint_max_age_hours: int = 24
+
+    # Fila de scans: segundos de espera equivalentes a um nível de prioridade (aging)
+    queue_aging_seconds: int = 3600
+    # Divide os slots de scan entre grupos de targets quando há mais de um grupo na fila
+    queue_fair_share: bool = True
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,21 +1,125 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Text, Boolean, Index, inspect, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, deferred
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+from typing import Tuple
+import asyncio
+import base64
 import os
 import urllib.parse
+import uuid
+import zlib
 from .config import hawks_config
 
-engine = create_engine(hawks_config.database_url)
+def _engine_options(database_url: str) -> dict:
+    # SQLite em memória usa SingletonThreadPool, que não aceita limites de pool
+    if database_url in ("sqlite://", "sqlite:///:memory:"):
+        return {}
+    return {
+        # Os scans em andamento (no máximo max_concurrent_scans) prendem uma conexão cada (open_session)
+        "pool_size": hawks_config.db_pool_size + hawks_config.max_concurrent_scans,
+        "max_overflow": hawks_config.db_max_overflow,
+        "pool_timeout": hawks_config.db_pool_timeout,
+    }
+
+engine = create_engine(hawks_config.database_url, **_engine_options(hawks_config.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+class HawksDataVersion:
+    """Versão dos dados guardada no próprio banco (linha única da tabela data_version).
+
+    Toda transação que escreve incrementa o contador no mesmo commit, venha ela
+    de uma sessão do ORM ou direto do engine, em qualquer worker ou processo
+    que use o banco. GETs condicionais (ETag) e o cache de páginas comparam só
+    essa linha em vez de consultar e renderizar tudo de novo. A época muda quando
+    o banco é recriado, para um ETag antigo não coincidir com o contador zerado.
+    """
+
+    def read(self, db=None) -> Tuple[str, int]:
+        """(época, contador); com uma sessão, a leitura entra na mesma transação das consultas seguintes"""
+        statement = text("SELECT epoch, value FROM data_version WHERE id = 1")
+        if db is not None:
+            row = db.execute(statement).first()
+        else:
+            with engine.connect() as conn:
+                row = conn.execute(statement).first()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def etag(self, db=None) -> str:
+        epoch, value = self.read(db)
+        return f'W/"{epoch}-{value}"'
+
+
+data_version = HawksDataVersion()
+
+# Comandos que alteram dados; qualquer um deles marca a transação da conexão
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+@event.listens_for(engine, "before_cursor_execute")
+def _mark_connection_changed(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        conn.info["hawks_changed"] = True
+
+@event.listens_for(engine, "commit")
+def _bump_data_version(conn):
+    # Roda antes do COMMIT: o incremento faz parte da mesma transação que alterou os dados.
+    # Cursor do driver direto, para o próprio UPDATE não marcar a conexão de novo
+    if conn.info.pop("hawks_changed", False):
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("UPDATE data_version SET value = value + 1 WHERE id = 1")
+        except conn.dialect.dbapi.OperationalError:
+            pass  # Tabela ainda não criada (escritas anteriores ao init_db)
+        finally:
+            cursor.close()
+
+@event.listens_for(engine, "rollback")
+def _discard_connection_changes(conn):
+    conn.info.pop("hawks_changed", None)
+
+# Marcador de payload comprimido (zlib + base64). JSON nunca começa com "z1:",
+# então linhas antigas sem compressão continuam legíveis sem migração.
+COMPRESSION_MARKER = "z1:"
+
+def compress_text(value: str) -> str:
+    """Comprime payloads grandes; textos pequenos ficam como estão"""
+    if (not hawks_config.result_compression or value.startswith(COMPRESSION_MARKER)
+            or len(value) < hawks_config.result_compression_min_bytes):
+        return value
+    compressed = zlib.compress(value.encode("utf-8"), hawks_config.result_compression_level)
+    return COMPRESSION_MARKER + base64.b64encode(compressed).decode("ascii")
+
+def decompress_text(value: str) -> str:
+    if value.startswith(COMPRESSION_MARKER):
+        return zlib.decompress(base64.b64decode(value[len(COMPRESSION_MARKER):])).decode("utf-8")
+    return value
+
+class CompressedText(TypeDecorator):
+    """Coluna Text comprimida de forma transparente na escrita e descomprimida na leitura"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
 class HawksTarget(Base):
     __tablename__ = "targets"
     
     id = Column(Integer, primary_key=True, index=True)
     domain_ip = Column(String, index=True, nullable=False)
     scan_status = Column(String, default="pending")
+    group_name = Column(String, nullable=True, index=True)  # Grupo do target (ex: arquivo importado)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_scan = Column(DateTime, nullable=True)
 
@@ -36,24 +140,192 @@ class HawksScanResult(Base):
     target_id = Column(Integer, nullable=False)
     scan_type = Column(String, nullable=False)
     status = Column(String, default="pending")
-    result_data = Column(Text, nullable=True)
+    # Carregada só quando acessada: listagens não leem nem descomprimem os payloads
+    result_data = deferred(Column(CompressedText, nullable=True))
     error_msg = Column(Text, nullable=True)
     started_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
+class HawksScanSummary(Base):
+    __tablename__ = "scan_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    target_id = Column(Integer, nullable=False, index=True)
+    result_id = Column(Integer, nullable=True, index=True)  # scan_results de origem (pode já ter sido compactado)
+    scan_type = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    item_count = Column(Integer, default=0)  # subdomínios, hosts vivos ou achados
+    severity_counts = Column(Text, nullable=True)  # JSON {severidade: quantidade} (nuclei)
+    fingerprints = Column(CompressedText, nullable=True)  # JSON com fingerprints dos achados (nuclei)
+    started_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class HawksFinding(Base):
+    __tablename__ = "findings"
+    __table_args__ = (
+        Index("ix_findings_target_fingerprint", "target_id", "fingerprint", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    target_id = Column(Integer, nullable=False, index=True)
+    fingerprint = Column(String, nullable=False)  # template-id + host + matched-at + matcher-name
+    template_id = Column(String, nullable=True)
+    template_name = Column(String, nullable=True)
+    severity = Column(String, nullable=True, index=True)
+    host = Column(String, nullable=True)
+    matched_at = Column(String, nullable=True)
+    matcher_name = Column(String, nullable=True)
+    finding_type = Column(String, nullable=True)
+    data = deferred(Column(CompressedText, nullable=True))  # Achado completo da primeira ocorrência
+    status = Column(String, default="open", index=True)  # open, resolved
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    resolved_at = Column(DateTime, nullable=True)
+    occurrences = Column(Integer, default=1)
+    last_result_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)  # Última mudança (export incremental)
+
+class HawksExportCursor(Base):
+    __tablename__ = "export_cursors"
+    __table_args__ = (
+        Index("ix_export_cursors_name_dataset", "name", "dataset", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)  # Consumidor do export (ex.: siem)
+    dataset = Column(String, nullable=False)  # findings, subdomains, hosts
+    position = Column(String, nullable=True)  # Último updated_at (findings) ou id de scan_results exportado
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class HawksScanCheckpoint(Base):
+    __tablename__ = "scan_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    target_id = Column(Integer, nullable=False, index=True)
+    stage = Column(String, nullable=False)  # subfinder, chaos, httpx, nuclei_shard
+    shard_key = Column(String, nullable=True)  # Hash dos hosts do shard do nuclei
+    result_id = Column(Integer, nullable=True)  # scan_results com a saída do estágio
+    data = Column(CompressedText, nullable=True)  # Saída do shard (JSON) quando não há scan_result
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class HawksScanSchedule(Base):
+    """Scan recorrente de um target, de um grupo ou de todos os targets (ambos vazios)"""
+    __tablename__ = "scan_schedules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    target_id = Column(Integer, nullable=True, index=True)
+    group_name = Column(String, nullable=True)
+    interval_hours = Column(Integer, nullable=False, default=24)
+    mode = Column(String, default="resume")  # resume ou restart
+    enabled = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_enqueued_at = Column(DateTime, nullable=True)  # Último tick que enfileirou algum target desta agenda
+
+class HawksDataVersionRow(Base):
+    """Linha única com a versão dos dados (ver HawksDataVersion)"""
+    __tablename__ = "data_version"
+    
+    id = Column(Integer, primary_key=True, default=1)
+    epoch = Column(String, nullable=False)  # Muda quando o banco é recriado
+    value = Column(Integer, nullable=False, default=0)
+
 class HawksSettings(Base):
     __tablename__ = "settings"
     
     id = Column(Integer, primary_key=True, default=1)
     chaos_api_key = Column(String, nullable=True)
     chaos_enabled = Column(Boolean, default=False)
+    # Progresso do backfill do store de achados (resultados do nuclei anteriores a ele)
+    findings_backfill_last_id = Column(Integer, nullable=True)
+    findings_backfill_max_id = Column(Integer, nullable=True)
 
 def get_db():
-    db = SessionLocal()
+    # O FastAPI roda dependências síncronas no threadpool: a espera por uma conexão livre
+    # acontece aqui e não dentro do event loop, onde travaria os requests que liberam conexões.
+    # A sessão usa essa conexão até o fim do request, inclusive depois de commits
+    connection = engine.connect()
+    db = SessionLocal(bind=connection)
     try:
         yield db
     finally:
-        db.close()
+        close_session(db)
+
+async def open_session(**kwargs) -> Session:
+    """Sessão para código async (pipelines, agendador) presa a uma conexão obtida fora do event loop"""
+    connection = await asyncio.to_thread(engine.connect)
+    return SessionLocal(bind=connection, **kwargs)
+
+def close_session(db: Session):
+    """Fecha a sessão e devolve ao pool a conexão presa a ela"""
+    connection = db.bind
+    db.close()
+    if isinstance(connection, Connection):
+        connection.close()
+
+# Colunas adicionadas depois da criação inicial das tabelas.
+# create_all não altera tabelas existentes, então elas são criadas via ALTER TABLE.
+SCHEMA_ADDITIONS = {
+    "targets": {
+        "group_name": "VARCHAR",
+    },
+    "findings": {
+        "updated_at": "DATETIME",
+    },
+    "settings": {
+        "findings_backfill_last_id": "INTEGER",
+        "findings_backfill_max_id": "INTEGER",
+    },
+}
+
+# Índices para tabelas existentes (create_all só cria os índices de tabelas novas)
+SCHEMA_INDEXES = {
+    "ix_scan_results_target_id": ("scan_results", "target_id, id"),
+}
+
+def migrate_schema():
+    """Adiciona colunas e índices que ainda não existem em bancos criados por versões anteriores"""
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    with engine.begin() as conn:
+        for table_name, columns in SCHEMA_ADDITIONS.items():
+            if table_name not in existing_tables:
+                continue
+            existing_columns = {c["name"] for c in inspector.get_columns(table_name)}
+            for column_name, column_type in columns.items():
+                if column_name not in existing_columns:
+                    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+                    print(f"Added column {table_name}.{column_name}")
+        for index_name, (table_name, columns) in SCHEMA_INDEXES.items():
+            if table_name in existing_tables:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+
+def compress_results_batch(last_id: int = 0, batch_size: int = 200) -> tuple:
+    """Comprime um lote de linhas antigas de scan_results gravadas sem compressão.
+
+    Lê e grava o texto cru (sem passar pelo CompressedText) e retorna
+    (maior id processado, linhas comprimidas); (0, 0) quando não há mais o que migrar.
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT id, result_data FROM scan_results "
+                "WHERE id > :last_id AND result_data IS NOT NULL "
+                "AND substr(result_data, 1, 3) != :marker AND length(result_data) >= :min_bytes "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {
+                "last_id": last_id,
+                "min_bytes": hawks_config.result_compression_min_bytes,
+                "marker": COMPRESSION_MARKER,
+                "batch_size": batch_size,
+            }
+        ).fetchall()
+        for row_id, raw in rows:
+            conn.execute(
+                text("UPDATE scan_results SET result_data = :data WHERE id = :id"),
+                {"data": compress_text(raw), "id": row_id}
+            )
+    return (rows[-1][0], len(rows)) if rows else (0, 0)
 
 def init_db():
     # Garantir que o diretório do banco de dados existe
@@ -73,6 +345,17 @@ def init_db():
         
         print(f"Initializing database at: {db_path}")
     
+    # Banco novo (sem tabelas): auto_vacuum incremental sai de graça, sem o VACUUM de conversão
+    if engine.dialect.name == "sqlite" and not inspect(engine).get_table_names():
+        with engine.connect() as conn:
+            conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+    
     # Criar todas as tabelas
     Base.metadata.create_all(bind=engine)
+    migrate_schema()
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO data_version (id, epoch, value) SELECT 1, :epoch, 0 WHERE NOT EXISTS (SELECT 1 FROM data_version)"),
+            {"epoch": uuid.uuid4().hex[:8]}
+        )
     print("Database initialized successfully!")
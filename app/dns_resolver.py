@@ -0,0 +1,469 @@
+import asyncio
+import ipaddress
+import random
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .config import hawks_config
+
+TYPE_A = 1
+TYPE_AAAA = 28
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+# Resultado de uma resolução: endereços, None (nome não existe / sem registros)
+# ou RESOLVE_ERROR (timeout ou falha do servidor: o nome segue para o httpx)
+RESOLVE_ERROR = "error"
+
+WILDCARD_LABEL_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+class DnsError(Exception):
+    """Resposta inválida ou falha do servidor DNS"""
+
+
+def parse_nameservers(value: str) -> List[Tuple[str, int]]:
+    """Lista "1.1.1.1,8.8.8.8:53,[2606:4700::1111]:53" → [(host, porta)]; vazio = /etc/resolv.conf"""
+    servers = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        port = 53
+        if item.startswith("["):
+            host, _, rest = item[1:].partition("]")
+            if rest.startswith(":"):
+                port = int(rest[1:])
+        elif item.count(":") == 1:
+            host, _, port_text = item.partition(":")
+            port = int(port_text)
+        else:
+            host = item
+        servers.append((host, port))
+    if servers:
+        return servers
+    try:
+        with open("/etc/resolv.conf", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append((parts[1], 53))
+    except OSError:
+        pass
+    return servers or [("1.1.1.1", 53), ("8.8.8.8", 53)]
+
+
+def normalize_hostname(entry: str) -> Optional[str]:
+    """Nome consultável a partir de uma linha do subfinder/chaos (None se não for um hostname)"""
+    host = entry.strip().lower()
+    if host.startswith(("http://", "https://")):
+        host = host.split("://", 1)[1]
+    host = host.split("/", 1)[0]
+    if host.startswith("*."):
+        host = host[2:]
+    if host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    host = host.rstrip(".")
+    if not host or len(host) > 253 or any(not label or len(label) > 63 for label in host.split(".")):
+        return None
+    try:
+        host.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    return host
+
+
+def parent_zone(name: str, domain: str = None) -> Optional[str]:
+    """Zona imediatamente acima do nome, desde que dentro do domínio alvo (nunca o TLD)"""
+    if "." not in name:
+        return None
+    zone = name.split(".", 1)[1]
+    if domain:
+        domain = domain.lower().rstrip(".")
+        if zone != domain and not zone.endswith("." + domain):
+            return None
+    elif "." not in zone:
+        return None
+    return zone
+
+
+def is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def build_query(query_id: int, name: str, qtype: int) -> bytes:
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)  # RD=1
+    question = b"".join(bytes([len(label)]) + label.encode("ascii") for label in name.split(".")) + b"\x00"
+    return header + question + struct.pack("!HH", qtype, 1)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while True:
+        if offset >= len(data):
+            raise DnsError("truncated name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+
+def parse_response(data: bytes) -> Tuple[int, int, List[str]]:
+    """(id, rcode, endereços A/AAAA da seção de resposta)"""
+    if len(data) < 12:
+        raise DnsError("short response")
+    query_id, flags, qdcount, ancount = struct.unpack("!HHHH", data[:8])
+    if not flags & 0x8000:
+        raise DnsError("not a response")
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+    addresses = []
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        if offset + 10 > len(data):
+            raise DnsError("truncated record")
+        rtype, _, _, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        rdata = data[offset:offset + rdlength]
+        offset += rdlength
+        if rtype == TYPE_A and rdlength == 4:
+            addresses.append(str(ipaddress.IPv4Address(rdata)))
+        elif rtype == TYPE_AAAA and rdlength == 16:
+            addresses.append(str(ipaddress.IPv6Address(rdata)))
+    return query_id, flags & 0x000F, addresses
+
+
+class _DnsClientProtocol(asyncio.DatagramProtocol):
+    """Socket UDP de um servidor DNS; respostas são casadas com as consultas pelo id"""
+
+    def __init__(self):
+        self.transport = None
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < 2:
+            return
+        future = self.pending.pop(struct.unpack("!H", data[:2])[0], None)
+        if future and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        # ICMP de porta inalcançável etc.: as consultas pendentes expiram pelo timeout
+        pass
+
+    def connection_lost(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(DnsError("connection lost"))
+        self.pending.clear()
+
+
+class HawksDnsCache:
+    """Cache LRU de resoluções: positivas e negativas com TTLs próprios"""
+
+    def __init__(self, ttl: int = 3600, negative_ttl: int = 600, max_entries: int = 200000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, Optional[List[str]]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, name: str):
+        """Endereços, None (negativo em cache) ou RESOLVE_ERROR quando o nome não está no cache"""
+        entry = self.entries.get(name)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[name]
+            self.stats["misses"] += 1
+            return RESOLVE_ERROR
+        self.entries.move_to_end(name)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, name: str, addresses: Optional[List[str]]):
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if addresses else self.negative_ttl
+        self.entries[name] = (time.monotonic() + ttl, addresses)
+        self.entries.move_to_end(name)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class HawksDnsResolver:
+    """Resolvedor DNS assíncrono usado para descartar subdomínios mortos antes do httpx.
+
+    Cada servidor tem um socket UDP próprio e as consultas de todos os scans
+    compartilham o limite de concorrência e o cache. Nomes que falham por
+    timeout ou erro do servidor seguem para o httpx: só NXDOMAIN ou ausência
+    de registros A/AAAA descartam um nome.
+    """
+
+    def __init__(self, nameservers: List[Tuple[str, int]], timeout: float = 2.0, retries: int = 2,
+                 concurrency: int = 200, cache: HawksDnsCache = None, wildcard_probes: int = 3):
+        self.nameservers = nameservers
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.concurrency = max(1, concurrency)
+        self.cache = cache or HawksDnsCache()
+        # Zonas com wildcard: {zona: endereços do wildcard ou None}, com os mesmos TTLs do cache de nomes
+        self.wildcard_probes = max(0, wildcard_probes)
+        self.wildcards = HawksDnsCache(self.cache.ttl, self.cache.negative_ttl, 10000)
+        self._loop = None
+        self._protocols: Dict[Tuple[str, int], _DnsClientProtocol] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, list] = {}  # {nome: [task da consulta, scans aguardando]}
+        self._next_server = 0
+        self.stats = {"queries": 0, "timeouts": 0, "server_errors": 0, "resolved": 0, "unresolved": 0, "errors": 0,
+                      "wildcard_zones": 0, "wildcard_collapsed": 0}
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Sockets e semáforo pertencem ao event loop em que foram criados
+            self.close()
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def _protocol(self, server: Tuple[str, int]) -> _DnsClientProtocol:
+        protocol = self._protocols.get(server)
+        if protocol is None or protocol.transport is None or protocol.transport.is_closing():
+            _, protocol = await self._loop.create_datagram_endpoint(_DnsClientProtocol, remote_addr=server)
+            self._protocols[server] = protocol
+        return protocol
+
+    async def _query(self, server: Tuple[str, int], name: str, qtype: int) -> Tuple[int, List[str]]:
+        protocol = await self._protocol(server)
+        query_id = random.getrandbits(16)
+        while query_id in protocol.pending:
+            query_id = random.getrandbits(16)
+        future = self._loop.create_future()
+        protocol.pending[query_id] = future
+        self.stats["queries"] += 1
+        try:
+            protocol.transport.sendto(build_query(query_id, name, qtype))
+            data = await asyncio.wait_for(future, self.timeout)
+        finally:
+            protocol.pending.pop(query_id, None)
+        response_id, rcode, addresses = parse_response(data)
+        if response_id != query_id:
+            raise DnsError("mismatched id")
+        return rcode, addresses
+
+    async def _lookup(self, name: str):
+        """Consulta A (e AAAA quando não há A), trocando de servidor a cada tentativa"""
+        start = self._next_server
+        self._next_server = (self._next_server + 1) % len(self.nameservers)
+        for attempt in range(self.retries + 1):
+            server = self.nameservers[(start + attempt) % len(self.nameservers)]
+            try:
+                async with self._semaphore:
+                    rcode, addresses = await self._query(server, name, TYPE_A)
+                    if rcode == RCODE_NOERROR and not addresses:
+                        rcode, addresses = await self._query(server, name, TYPE_AAAA)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                continue
+            except (DnsError, OSError):
+                self.stats["server_errors"] += 1
+                continue
+            if rcode == RCODE_NXDOMAIN or (rcode == RCODE_NOERROR and not addresses):
+                return None
+            if rcode == RCODE_NOERROR:
+                return addresses
+            # SERVFAIL/REFUSED: outro servidor pode responder
+            self.stats["server_errors"] += 1
+        return RESOLVE_ERROR
+
+    async def resolve(self, name: str):
+        """Endereços do nome, None se não resolve ou RESOLVE_ERROR se nenhum servidor respondeu"""
+        if is_ip_address(name):
+            return [name]
+        cached = self.cache.get(name)
+        if cached != RESOLVE_ERROR:
+            return cached
+        return await self._resolve_uncached(name)
+
+    async def _resolve_uncached(self, name: str):
+        # Dois scans pedindo o mesmo nome ao mesmo tempo compartilham a consulta. Ela roda numa
+        # task própria: cancelar um scan só encerra a espera dele, nunca a dos outros
+        entry = self._inflight.get(name)
+        if entry is None:
+            self._bind_loop()
+            entry = [self._loop.create_task(self._lookup_and_cache(name)), 0]  # [task, scans aguardando]
+            self._inflight[name] = entry
+            entry[0].add_done_callback(lambda _: self._forget_inflight(name, entry))
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if not entry[1] and not entry[0].done():
+                # Último interessado foi cancelado: ninguém mais precisa da resposta
+                self._forget_inflight(name, entry)
+                entry[0].cancel()
+
+    def _forget_inflight(self, name: str, entry: list):
+        if self._inflight.get(name) is entry:
+            del self._inflight[name]
+
+    async def _lookup_and_cache(self, name: str):
+        result = await self._lookup(name)
+        if result != RESOLVE_ERROR:
+            self.cache.put(name, result)
+        return result
+
+    async def resolve_many(self, entries: List[str]) -> Dict[str, object]:
+        """Resolve as linhas do subfinder/chaos em paralelo: {linha: resultado}"""
+        names = {}
+        for entry in entries:
+            name = normalize_hostname(entry)
+            if name:
+                names.setdefault(name, []).append(entry)
+        answers = {}
+        pending = []
+        for name in names:
+            # Nomes em cache não criam task
+            cached = [name] if is_ip_address(name) else self.cache.get(name)
+            if cached == RESOLVE_ERROR:
+                pending.append(name)
+            else:
+                answers[name] = cached
+        if pending:
+            answers.update(zip(pending, await asyncio.gather(*(self._resolve_uncached(name) for name in pending))))
+        return {entry: answers[name] for name, entries in names.items() for entry in entries}
+
+    async def wildcard_answers(self, zone: str):
+        """Endereços do wildcard da zona, None se ela não tem wildcard ou RESOLVE_ERROR se não deu para saber.
+
+        Consulta rótulos aleatórios: se todos resolvem, a zona responde qualquer
+        nome e a união dos endereços identifica o host coringa.
+        """
+        cached = self.wildcards.get(zone)
+        if cached != RESOLVE_ERROR:
+            return cached
+        self._bind_loop()
+        addresses = set()
+        for _ in range(self.wildcard_probes):
+            label = "".join(random.choice(WILDCARD_LABEL_CHARS) for _ in range(16))
+            answer = await self._lookup(f"{label}.{zone}")
+            if answer == RESOLVE_ERROR:
+                return RESOLVE_ERROR
+            if answer is None:
+                self.wildcards.put(zone, None)
+                return None
+            addresses.update(answer)
+        result = sorted(addresses)
+        self.wildcards.put(zone, result)
+        return result
+
+    async def collapse_wildcards(self, entries: List[str], answers: Dict[str, object],
+                                 domain: str = None) -> Tuple[List[str], Dict]:
+        """Troca os nomes respondidos só pelo wildcard da zona pai por um representante por zona"""
+        zones = {}
+        for entry in entries:
+            if not isinstance(answers.get(entry), list):
+                continue
+            name = normalize_hostname(entry)
+            zone = parent_zone(name, domain) if name and not is_ip_address(name) else None
+            if zone:
+                zones.setdefault(zone, []).append(entry)
+        # Uma zona com um só nome não tem o que colapsar: não vale as consultas de teste
+        candidates = [zone for zone, names in zones.items() if len(names) > 1]
+        wildcard = dict(zip(candidates, await asyncio.gather(*(self.wildcard_answers(zone) for zone in candidates))))
+
+        dropped = set()
+        collapsed_zones = 0
+        for zone in candidates:
+            addresses = wildcard[zone]
+            if not isinstance(addresses, list):
+                continue
+            catch_all = set(addresses)
+            # Nomes com endereços próprios são registros reais e ficam; o primeiro nome
+            # respondido pelo wildcard representa todos os outros
+            matches = [entry for entry in zones[zone] if set(answers[entry]) <= catch_all]
+            if len(matches) > 1:
+                collapsed_zones += 1
+                dropped.update(matches[1:])
+        self.stats["wildcard_zones"] += collapsed_zones
+        self.stats["wildcard_collapsed"] += len(dropped)
+        kept = [entry for entry in entries if entry not in dropped]
+        return kept, {"wildcard_zones": collapsed_zones, "wildcard_collapsed": len(dropped)}
+
+    async def filter_resolvable(self, entries: List[str], domain: str = None,
+                                collapse_wildcards: bool = True) -> Tuple[List[str], Dict]:
+        """Mantém, na ordem original, as linhas que resolvem ou que não puderam ser verificadas.
+
+        Com `collapse_wildcards`, nomes gerados pelo wildcard de uma zona (dentro de
+        `domain`) viram um único representante.
+        """
+        start = time.monotonic()
+        hits_before = self.cache.stats["hits"]
+        results = await self.resolve_many(entries)
+        kept = []
+        counts = {"resolved": 0, "unresolved": 0, "errors": 0}
+        for entry in entries:
+            answer = results.get(entry, RESOLVE_ERROR)  # Linhas que não são hostnames seguem adiante
+            if answer is None:
+                counts["unresolved"] += 1
+                continue
+            counts["errors" if answer == RESOLVE_ERROR else "resolved"] += 1
+            kept.append(entry)
+        for key, value in counts.items():
+            self.stats[key] += value
+        wildcard_stats = {"wildcard_zones": 0, "wildcard_collapsed": 0}
+        if collapse_wildcards and self.wildcard_probes:
+            kept, wildcard_stats = await self.collapse_wildcards(kept, results, domain)
+        return kept, {
+            "total": len(entries),
+            **counts,
+            **wildcard_stats,
+            "cache_hits": self.cache.stats["hits"] - hits_before,
+            "elapsed": round(time.monotonic() - start, 3),
+        }
+
+    def close(self):
+        for protocol in self._protocols.values():
+            if protocol.transport is not None:
+                protocol.transport.close()
+        self._protocols.clear()
+        self._inflight.clear()
+
+    def status(self) -> Dict:
+        return {
+            "nameservers": [f"{host}:{port}" for host, port in self.nameservers],
+            "timeout": self.timeout,
+            "retries": self.retries,
+            "concurrency": self.concurrency,
+            "cache_entries": len(self.cache.entries),
+            "cache_hits": self.cache.stats["hits"],
+            "cache_misses": self.cache.stats["misses"],
+            "wildcard_cache_entries": len(self.wildcards.entries),
+            **self.stats,
+        }
+
+
+def create_dns_resolver() -> HawksDnsResolver:
+    return HawksDnsResolver(
+        parse_nameservers(hawks_config.dns_resolvers),
+        timeout=hawks_config.dns_timeout,
+        retries=hawks_config.dns_retries,
+        concurrency=hawks_config.dns_concurrency,
+        cache=HawksDnsCache(hawks_config.dns_cache_ttl, hawks_config.dns_negative_ttl, hawks_config.dns_cache_entries),
+        wildcard_probes=hawks_config.dns_wildcard_probes
+    )
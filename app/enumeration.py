@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, List, Optional
+
+
+def normalize_subdomain(name: str) -> Optional[str]:
+    """Forma canônica de um subdomínio vindo das fontes (None para linhas vazias)"""
+    name = name.strip().lower().rstrip(".")
+    return name or None
+
+
+class HawksSubdomainSet:
+    """União sem duplicatas dos subdomínios das fontes de enumeração.
+
+    Cada fonte é juntada quando termina, em tempo linear no tamanho da sua saída.
+    Guarda quem encontrou cada nome primeiro e quais nomes vieram de mais de
+    uma fonte, o que basta para calcular a contribuição de cada fonte.
+    """
+
+    def __init__(self):
+        self.first_source: Dict[str, str] = {}  # {nome: fonte que trouxe primeiro}, na ordem de chegada
+        self.shared = set()  # Nomes encontrados por mais de uma fonte
+        self.found: Dict[str, int] = {}
+        self.new: Dict[str, int] = {}
+
+    def add(self, source: str, subdomains: Iterable[str]) -> Dict[str, int]:
+        """Junta a saída de uma fonte; retorna quantos nomes ela trouxe e quantos eram novos"""
+        seen = set()
+        found = new = 0
+        for raw in subdomains:
+            name = normalize_subdomain(raw)
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            found += 1
+            first = self.first_source.setdefault(name, source)
+            if first == source:
+                new += 1
+            else:
+                self.shared.add(name)
+        self.found[source] = self.found.get(source, 0) + found
+        self.new[source] = self.new.get(source, 0) + new
+        return {"found": found, "new": new}
+
+    def names(self) -> List[str]:
+        return list(self.first_source)
+
+    def contributions(self) -> Dict[str, Dict[str, int]]:
+        """Por fonte: nomes encontrados, novos na ordem de chegada e exclusivos (só ela encontrou)"""
+        shared_first = {}
+        for name in self.shared:
+            source = self.first_source[name]
+            shared_first[source] = shared_first.get(source, 0) + 1
+        return {
+            source: {
+                "found": self.found[source],
+                "new": self.new[source],
+                "unique": self.new[source] - shared_first.get(source, 0),
+            }
+            for source in self.found
+        }
+
+    def __len__(self) -> int:
+        return len(self.first_source)
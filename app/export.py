@@ -0,0 +1,248 @@
+import csv
+import io
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer
+
+from . import jsonio
+from .database import SessionLocal, HawksExportCursor, HawksFinding, HawksScanResult, HawksTarget
+
+EXPORT_DATASETS = ("findings", "subdomains", "hosts")
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Linhas lidas por ida ao banco; os blobs de scan_results são bem maiores que os achados
+FINDINGS_BATCH = 500
+RESULTS_BATCH = 5
+# Tamanho aproximado de cada pedaço enviado ao cliente
+FLUSH_BYTES = 64 * 1024
+
+EXPORT_COLUMNS = {
+    "findings": [
+        "id", "target_id", "target", "template_id", "template_name", "severity", "host", "matched_at",
+        "matcher_name", "type", "status", "first_seen", "last_seen", "resolved_at", "occurrences", "updated_at"
+    ],
+    "subdomains": ["target_id", "target", "result_id", "source", "scan_date", "subdomain"],
+    "hosts": ["target_id", "target", "result_id", "scan_date", "url"],
+}
+
+RESULT_SCAN_TYPES = {
+    "subdomains": ("subfinder", "chaos"),
+    "hosts": ("httpx",),
+}
+
+
+class HawksExportFilters:
+    """Filtros de um export; `cursor` liga o modo "desde o último export" desse consumidor"""
+
+    def __init__(self, target_id: Optional[int] = None, severities: Optional[List[str]] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 cursor: Optional[str] = None, include_data: bool = False):
+        self.target_id = target_id
+        self.severities = severities
+        self.since = since
+        self.until = until
+        self.cursor = cursor
+        self.include_data = include_data
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Encoder:
+    """Serializa linhas em NDJSON ou CSV acumulando até FLUSH_BYTES antes de enviar"""
+
+    def __init__(self, fmt: str, columns: List[str]):
+        self.fmt = fmt
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer) if fmt == "csv" else None
+
+    def header(self) -> Optional[str]:
+        if self.writer:
+            self.writer.writerow(self.columns)
+        return self.flush(force=True)
+
+    def row(self, row: Dict) -> Optional[str]:
+        if self.writer:
+            self.writer.writerow([_format_value(row.get(column)) for column in self.columns])
+        else:
+            self.buffer.write(jsonio.dumps({key: _format_value(value) for key, value in row.items()}))
+            self.buffer.write("\n")
+        return self.flush()
+
+    def flush(self, force: bool = False) -> Optional[str]:
+        if not force and self.buffer.tell() < FLUSH_BYTES:
+            return None
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk or None
+
+
+def _load_cursor(db: Session, name: str, dataset: str) -> Optional[HawksExportCursor]:
+    return db.query(HawksExportCursor).filter(
+        HawksExportCursor.name == name,
+        HawksExportCursor.dataset == dataset
+    ).first()
+
+
+def _save_cursor(db: Session, name: str, dataset: str, position: str):
+    cursor = _load_cursor(db, name, dataset)
+    if not cursor:
+        cursor = HawksExportCursor(name=name, dataset=dataset)
+        db.add(cursor)
+    cursor.position = position
+    cursor.updated_at = datetime.utcnow()
+    db.commit()
+
+
+def _finding_row(finding: HawksFinding, target: Optional[str], changed: datetime, include_data: bool) -> Dict:
+    row = {
+        "id": finding.id,
+        "target_id": finding.target_id,
+        "target": target,
+        "template_id": finding.template_id,
+        "template_name": finding.template_name,
+        "severity": finding.severity,
+        "host": finding.host,
+        "matched_at": finding.matched_at,
+        "matcher_name": finding.matcher_name,
+        "type": finding.finding_type,
+        "status": finding.status,
+        "first_seen": finding.first_seen,
+        "last_seen": finding.last_seen,
+        "resolved_at": finding.resolved_at,
+        "occurrences": finding.occurrences,
+        "updated_at": changed,
+    }
+    if include_data and finding.data:
+        row["data"] = jsonio.loads(finding.data)
+    return row
+
+
+def _end_batch(db: Session):
+    """Encerra a transação de leitura do lote: um download lento não segura o banco entre lotes"""
+    db.expunge_all()
+    db.rollback()
+
+
+def _iter_findings(db: Session, filters: HawksExportFilters, position: Optional[str], state: Dict) -> Iterator[Dict]:
+    # Bancos anteriores ao updated_at usam last_seen como data de mudança
+    changed_at = func.coalesce(HawksFinding.updated_at, HawksFinding.last_seen)
+    query = db.query(HawksFinding, HawksTarget.domain_ip, changed_at).outerjoin(
+        HawksTarget, HawksTarget.id == HawksFinding.target_id
+    )
+    if filters.include_data:
+        query = query.options(undefer(HawksFinding.data))
+    if filters.target_id is not None:
+        query = query.filter(HawksFinding.target_id == filters.target_id)
+    if filters.severities:
+        query = query.filter(HawksFinding.severity.in_(filters.severities))
+    if filters.since:
+        query = query.filter(HawksFinding.last_seen >= filters.since)
+    if filters.until:
+        query = query.filter(HawksFinding.last_seen <= filters.until)
+    if position:
+        query = query.filter(changed_at > datetime.fromisoformat(position))
+    if filters.cursor:
+        # Os lotes não são um snapshot único: mudanças feitas durante o export ficam para o
+        # próximo, senão o cursor poderia passar por cima de um achado atualizado no meio
+        query = query.filter(changed_at <= datetime.utcnow())
+
+    last_id = 0
+    while True:
+        batch = query.filter(HawksFinding.id > last_id).order_by(HawksFinding.id).limit(FINDINGS_BATCH).all()
+        rows = [_finding_row(finding, target, changed, filters.include_data) for finding, target, changed in batch]
+        _end_batch(db)
+        if not rows:
+            return
+        for row in rows:
+            if row["updated_at"] and (state["position"] is None or row["updated_at"] > state["position"]):
+                state["position"] = row["updated_at"]
+            yield row
+        last_id = rows[-1]["id"]
+
+
+def _iter_result_items(db: Session, dataset: str, filters: HawksExportFilters, position: Optional[str], state: Dict) -> Iterator[Dict]:
+    query = db.query(HawksScanResult, HawksTarget.domain_ip).outerjoin(
+        HawksTarget, HawksTarget.id == HawksScanResult.target_id
+    ).options(undefer(HawksScanResult.result_data)).filter(
+        HawksScanResult.scan_type.in_(RESULT_SCAN_TYPES[dataset]),
+        HawksScanResult.status == "success"
+    )
+    if filters.target_id is not None:
+        query = query.filter(HawksScanResult.target_id == filters.target_id)
+    if filters.since:
+        query = query.filter(HawksScanResult.started_at >= filters.since)
+    if filters.until:
+        query = query.filter(HawksScanResult.started_at <= filters.until)
+
+    last_id = int(position) if position else 0
+    while True:
+        batch = [
+            (result.id, result.target_id, target, result.scan_type, result.started_at, result.result_data)
+            for result, target in query.filter(HawksScanResult.id > last_id).order_by(HawksScanResult.id).limit(RESULTS_BATCH)
+        ]
+        _end_batch(db)
+        if not batch:
+            return
+        for result_id, target_id, target, scan_type, started_at, result_data in batch:
+            try:
+                data = jsonio.loads(result_data) if result_data else {}
+            except ValueError:
+                data = {}
+            base = {"target_id": target_id, "target": target, "result_id": result_id}
+            if dataset == "subdomains":
+                for subdomain in data.get("subdomains") or []:
+                    yield {**base, "source": scan_type, "scan_date": started_at, "subdomain": subdomain}
+            else:
+                for url in data.get("live_hosts") or []:
+                    yield {**base, "scan_date": started_at, "url": url}
+            state["position"] = result_id
+        last_id = batch[-1][0]
+
+
+def stream_export(dataset: str, fmt: str, filters: HawksExportFilters) -> Iterator[str]:
+    """Gera o export em pedaços lendo o banco em lotes (memória constante).
+
+    Abre a própria sessão porque o stream continua depois que o handler retorna.
+    Cada lote é uma transação curta (paginação por id), então um download lento
+    não impede os scans de gravar enquanto o cliente consome.
+    O cursor nomeado só avança quando o export termina inteiro: um cliente que
+    desconecta no meio recebe as mesmas linhas no próximo export.
+    """
+    db = SessionLocal()
+    try:
+        position = None
+        if filters.cursor:
+            cursor = _load_cursor(db, filters.cursor, dataset)
+            position = cursor.position if cursor else None
+            _end_batch(db)
+
+        state = {"position": None}
+        if dataset == "findings":
+            rows = _iter_findings(db, filters, position, state)
+        else:
+            rows = _iter_result_items(db, dataset, filters, position, state)
+
+        encoder = _Encoder(fmt, EXPORT_COLUMNS[dataset])
+        chunk = encoder.header()
+        if chunk:
+            yield chunk
+        for row in rows:
+            chunk = encoder.row(row)
+            if chunk:
+                yield chunk
+        chunk = encoder.flush(force=True)
+        if chunk:
+            yield chunk
+
+        if filters.cursor and state["position"] is not None:
+            _save_cursor(db, filters.cursor, dataset, _format_value(state["position"]) if dataset == "findings" else str(state["position"]))
+    finally:
+        db.close()
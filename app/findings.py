@@ -0,0 +1,163 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer
+
+from . import jsonio
+from .database import SessionLocal, HawksFinding, HawksScanResult, HawksSettings as HawksSettingsDB
+
+# Limite de parâmetros por IN (...) para não estourar o máximo de variáveis do SQLite
+CHUNK_SIZE = 500
+
+
+def finding_fingerprint(finding: dict) -> str:
+    """Identidade estável de um achado do nuclei entre scans"""
+    parts = (
+        finding.get("template-id", ""),
+        finding.get("host", ""),
+        finding.get("matched-at", ""),
+        finding.get("matcher-name", ""),
+    )
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def _chunks(items: List, size: int = CHUNK_SIZE):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+def ingest_findings(db: Session, target_id: int, findings: List[dict], seen_at: datetime = None,
+                    result_id: int = None, resolve_missing: bool = True) -> Dict[str, int]:
+    """Upsert dos achados de um scan do nuclei no store deduplicado.
+
+    Achados já conhecidos só atualizam last_seen/ocorrências; os que o scan não
+    viu mais são marcados como resolvidos (quando o scan cobriu todos os hosts).
+    Aceita scans fora de ordem (backfill): nada regride para uma data anterior.
+    """
+    now = datetime.utcnow()
+    seen_at = seen_at or now
+    unique = {}
+    for finding in findings:
+        unique.setdefault(finding_fingerprint(finding), finding)
+
+    existing = {}
+    fingerprints = list(unique.keys())
+    for chunk in _chunks(fingerprints):
+        for row in db.query(HawksFinding).filter(
+            HawksFinding.target_id == target_id,
+            HawksFinding.fingerprint.in_(chunk)
+        ):
+            existing[row.fingerprint] = row
+
+    stats = {"new": 0, "updated": 0, "resolved": 0}
+    for fingerprint, finding in unique.items():
+        row = existing.get(fingerprint)
+        if row:
+            row.updated_at = now
+            row.occurrences = (row.occurrences or 0) + 1
+            if seen_at < row.first_seen:
+                row.first_seen = seen_at
+            if seen_at >= row.last_seen:
+                row.last_seen = seen_at
+                row.last_result_id = result_id
+                if row.status != "open":
+                    # Reapareceu depois de resolvido
+                    row.status = "open"
+                    row.resolved_at = None
+            stats["updated"] += 1
+        else:
+            info = finding.get("info") or {}
+            db.add(HawksFinding(
+                target_id=target_id,
+                fingerprint=fingerprint,
+                template_id=finding.get("template-id"),
+                template_name=info.get("name"),
+                severity=info.get("severity", "info"),
+                host=finding.get("host"),
+                matched_at=finding.get("matched-at"),
+                matcher_name=finding.get("matcher-name"),
+                finding_type=finding.get("type"),
+                data=jsonio.dumps(finding),
+                status="open",
+                first_seen=seen_at,
+                last_seen=seen_at,
+                occurrences=1,
+                last_result_id=result_id,
+                updated_at=now
+            ))
+            stats["new"] += 1
+
+    if resolve_missing:
+        # Só resolve o que não foi visto por um scan mais recente que este
+        stale = [
+            row_id for row_id, fingerprint in db.query(HawksFinding.id, HawksFinding.fingerprint).filter(
+                HawksFinding.target_id == target_id,
+                HawksFinding.status == "open",
+                HawksFinding.last_seen < seen_at
+            )
+            if fingerprint not in unique
+        ]
+        for chunk in _chunks(stale):
+            db.query(HawksFinding).filter(HawksFinding.id.in_(chunk)).update(
+                {HawksFinding.status: "resolved", HawksFinding.resolved_at: seen_at, HawksFinding.updated_at: now},
+                synchronize_session=False
+            )
+        stats["resolved"] = len(stale)
+
+    db.commit()
+    return stats
+
+
+def backfill_findings_batch(batch_size: int = 20) -> int:
+    """Alimenta o store com resultados do nuclei gravados antes dele existir.
+
+    O limite (maior id no primeiro backfill) e o progresso ficam em settings, então
+    o backfill continua de onde parou após um restart. Retorna quantos resultados
+    foram processados (0 = concluído).
+    """
+    db = SessionLocal()
+    try:
+        settings = db.query(HawksSettingsDB).filter(HawksSettingsDB.id == 1).first()
+        if not settings:
+            settings = HawksSettingsDB(id=1)
+            db.add(settings)
+        if settings.findings_backfill_max_id is None:
+            # Resultados depois deste id já são ingeridos pelo pipeline
+            settings.findings_backfill_max_id = db.query(func.max(HawksScanResult.id)).scalar() or 0
+            settings.findings_backfill_last_id = 0
+            db.commit()
+        after_id = settings.findings_backfill_last_id or 0
+        if after_id >= settings.findings_backfill_max_id:
+            return 0
+        last_id, count = _backfill_results(db, after_id, settings.findings_backfill_max_id, batch_size)
+        settings.findings_backfill_last_id = last_id if count else settings.findings_backfill_max_id
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _backfill_results(db: Session, after_id: int, max_id: int, batch_size: int) -> tuple:
+    results = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).filter(
+        HawksScanResult.scan_type == "nuclei",
+        HawksScanResult.status == "success",
+        HawksScanResult.id > after_id,
+        HawksScanResult.id <= max_id
+    ).order_by(HawksScanResult.id).limit(batch_size).all()
+    for result in results:
+        try:
+            data = jsonio.loads(result.result_data) if result.result_data else {}
+        except ValueError:
+            continue
+        failed_shards = (data.get("performance") or {}).get("failed_shards")
+        ingest_findings(
+            db, result.target_id, data.get("results") or [],
+            seen_at=result.started_at, result_id=result.id,
+            resolve_missing=not failed_shards
+        )
+    return (results[-1].id, len(results)) if results else (after_id, 0)
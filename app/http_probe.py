@@ -0,0 +1,274 @@
+import asyncio
+import itertools
+import ssl
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .config import hawks_config
+
+USER_AGENT = "Mozilla/5.0 (compatible; Hawks)"
+DEFAULT_PORTS = {"https": 443, "http": 80}
+
+
+def probe_candidates(entry: str) -> List[Tuple[str, str, int]]:
+    """(esquema, host, porta) a tentar para uma linha, na ordem do httpx: HTTPS e depois HTTP"""
+    entry = entry.strip()
+    schemes = ["https", "http"]
+    if "://" in entry:
+        scheme, entry = entry.split("://", 1)
+        if scheme.lower() in DEFAULT_PORTS:
+            schemes = [scheme.lower()]
+    host = entry.split("/", 1)[0]
+    port = None
+    if host.startswith("["):
+        address, _, rest = host[1:].partition("]")
+        host = address
+        if rest.startswith(":") and rest[1:].isdigit():
+            port = int(rest[1:])
+    elif host.count(":") == 1:
+        host, _, port_text = host.partition(":")
+        if port_text.isdigit():
+            port = int(port_text)
+    if not host:
+        return []
+    return [(scheme, host, port or DEFAULT_PORTS[scheme]) for scheme in schemes]
+
+
+def format_url(scheme: str, host: str, port: int) -> str:
+    """URL no formato da saída do httpx (porta omitida quando é a padrão do esquema)"""
+    netloc = f"[{host}]" if ":" in host else host
+    if port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    return f"{scheme}://{netloc}"
+
+
+class _Pacer:
+    """Espaça as requisições de uma sondagem para respeitar o rate do orçamento"""
+
+    def __init__(self, rate: int):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_at = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        at = max(now, self.next_at)
+        self.next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+class HawksHttpProber:
+    """Sonda HTTP/HTTPS dentro do processo, alternativa ao binário do httpx.
+
+    Cada host é tentado em HTTPS e, se falhar, em HTTP; qualquer resposta HTTP
+    conta como host vivo, como no httpx. As conexões que terminam uma resposta
+    com keep-alive voltam para um pool por (esquema, host, porta) e são
+    reaproveitadas se o mesmo host for sondado de novo (retomadas, targets com
+    subdomínios em comum, scans agendados). Conexões ociosas há mais de
+    `pool_idle` segundos são fechadas por uma varredura periódica e, com o pool
+    cheio, a mais antiga dá lugar à nova. A concorrência é global, somando
+    todos os scans.
+    """
+
+    def __init__(self, concurrency: int = 100, timeout: float = 10.0, pool_size: int = 256,
+                 pool_idle: float = 30.0, max_body: int = 65536):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.pool_idle = pool_idle
+        self.max_body = max_body
+        self._loop = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Conexões ociosas na ordem em que voltaram ao pool (= ordem de expiração): {id: (chave, reader, writer, expira_em)}
+        self._idle: "OrderedDict[int, tuple]" = OrderedDict()
+        self._pool: Dict[Tuple[str, str, int], List[int]] = {}  # {chave: [ids em _idle, mais recente por último]}
+        self._ids = itertools.count()
+        self._sweep_handle: Optional[asyncio.TimerHandle] = None
+        self._ssl = ssl.create_default_context()
+        # Como o httpx: certificados inválidos ou autoassinados não impedem a detecção
+        self._ssl.check_hostname = False
+        self._ssl.verify_mode = ssl.CERT_NONE
+        self._ssl.set_alpn_protocols(["http/1.1"])
+        self.stats = {"requests": 0, "live": 0, "failed": 0, "https_fallbacks": 0,
+                      "connections_opened": 0, "connections_reused": 0, "connections_evicted": 0}
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Conexões e semáforo pertencem ao event loop em que foram criados
+            self.close()
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    def _acquire_pooled(self, key: Tuple[str, str, int]):
+        connections = self._pool.get(key)
+        now = time.monotonic()
+        while connections:
+            _, reader, writer, expires_at = self._idle.pop(connections.pop())
+            if expires_at > now and not writer.is_closing() and not reader.at_eof():
+                if not connections:
+                    del self._pool[key]
+                return reader, writer
+            writer.close()
+        self._pool.pop(key, None)
+        return None
+
+    def _evict(self, connection_id: int):
+        key, _, writer, _ = self._idle.pop(connection_id)
+        connections = self._pool[key]
+        connections.remove(connection_id)  # A mais antiga da chave está no início da lista
+        if not connections:
+            del self._pool[key]
+        writer.close()
+        self.stats["connections_evicted"] += 1
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        while self._idle:
+            connection_id, (_, _, _, expires_at) = next(iter(self._idle.items()))
+            if expires_at > now:
+                break
+            self._evict(connection_id)
+
+    def _sweep(self):
+        """Fecha as conexões que expiraram e agenda a próxima varredura enquanto o pool não esvazia"""
+        self._sweep_handle = None
+        self._evict_expired()
+        self._schedule_sweep()
+
+    def _schedule_sweep(self):
+        if self._sweep_handle is not None or not self._idle or self._loop is None:
+            return
+        _, _, _, expires_at = next(iter(self._idle.values()))
+        self._sweep_handle = self._loop.call_later(max(0.0, expires_at - time.monotonic()), self._sweep)
+
+    def _release(self, key: Tuple[str, str, int], reader, writer):
+        if self.pool_size <= 0 or writer.is_closing():
+            writer.close()
+            return
+        self._evict_expired()
+        while len(self._idle) >= self.pool_size:
+            # Pool cheio: a conexão ociosa há mais tempo sai para a nova entrar
+            self._evict(next(iter(self._idle)))
+        connection_id = next(self._ids)
+        self._idle[connection_id] = (key, reader, writer, time.monotonic() + self.pool_idle)
+        self._pool.setdefault(key, []).append(connection_id)
+        self._schedule_sweep()
+
+    async def _request(self, scheme: str, host: str, port: int) -> bool:
+        """GET / no host; True se veio uma resposta HTTP"""
+        key = (scheme, host, port)
+        pooled = self._acquire_pooled(key)
+        if pooled:
+            self.stats["connections_reused"] += 1
+            try:
+                if await self._exchange(key, *pooled):
+                    return True
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            # Conexão do pool fechada pelo servidor enquanto estava ociosa: tenta uma nova
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None
+        )
+        self.stats["connections_opened"] += 1
+        return await self._exchange(key, reader, writer)
+
+    async def _exchange(self, key: Tuple[str, str, int], reader, writer) -> bool:
+        scheme, host, port = key
+        keep = False
+        try:
+            host_header = host if port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+            writer.write(
+                f"GET / HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+                f"Accept: */*\r\nConnection: keep-alive\r\n\r\n".encode("latin-1")
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line.startswith(b"HTTP/"):
+                return False
+
+            # Corpo só é lido para reaproveitar a conexão; respostas grandes ou sem tamanho fecham
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip().lower()
+            length = headers.get("content-length", "")
+            if (length.isdigit() and int(length) <= self.max_body and "close" not in headers.get("connection", "")
+                    and "transfer-encoding" not in headers and not status_line.startswith(b"HTTP/1.0")):
+                await reader.readexactly(int(length))
+                keep = True
+            return True
+        finally:
+            if keep:
+                self._release(key, reader, writer)
+            else:
+                writer.close()
+
+    async def probe_host(self, entry: str, pacer: _Pacer = None) -> Optional[str]:
+        """URL do host vivo (HTTPS preferido) ou None"""
+        self._bind_loop()
+        candidates = probe_candidates(entry)
+        for index, (scheme, host, port) in enumerate(candidates):
+            if pacer:
+                await pacer.wait()
+            self.stats["requests"] += 1
+            try:
+                async with self._semaphore:
+                    alive = await asyncio.wait_for(self._request(scheme, host, port), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ssl.SSLError, UnicodeError, ValueError):
+                alive = False
+            if alive:
+                self.stats["live"] += 1
+                if index:
+                    self.stats["https_fallbacks"] += 1
+                return format_url(scheme, host, port)
+        self.stats["failed"] += 1
+        return None
+
+    async def probe(self, entries: List[str], rate: int = 0) -> List[str]:
+        """Hosts vivos na ordem da entrada, no mesmo formato de live_hosts do httpx"""
+        self._bind_loop()
+        pacer = _Pacer(rate)
+        seen = set()
+        unique = []
+        for entry in entries:
+            entry = entry.strip()
+            if entry and entry not in seen:
+                seen.add(entry)
+                unique.append(entry)
+
+        results = await asyncio.gather(*(self.probe_host(entry, pacer) for entry in unique))
+        return list(dict.fromkeys(url for url in results if url))
+
+    def close(self):
+        if self._sweep_handle is not None:
+            self._sweep_handle.cancel()
+            self._sweep_handle = None
+        for _, _, writer, _ in self._idle.values():
+            writer.close()
+        self._idle.clear()
+        self._pool.clear()
+
+    def status(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+            "pooled_connections": len(self._idle),
+            **self.stats,
+        }
+
+
+def create_http_prober() -> HawksHttpProber:
+    return HawksHttpProber(
+        concurrency=hawks_config.probe_concurrency,
+        timeout=hawks_config.probe_timeout,
+        pool_size=hawks_config.probe_pool_size,
+        pool_idle=hawks_config.probe_pool_idle_seconds
+    )
@@ -0,0 +1,65 @@
+"""Serialização JSON plugável para os caminhos quentes (resultados, JSONL do nuclei e API).
+
+Usa o orjson quando instalado e o json da stdlib caso contrário; `json_backend`
+nas configurações força um dos dois. Os dois backends produzem JSON compatível,
+então blobs gravados por um são lidos pelo outro.
+"""
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from .config import hawks_config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+# Mesma exceção dos dois backends (orjson.JSONDecodeError herda de json.JSONDecodeError)
+JSONDecodeError = json.JSONDecodeError
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _select_backend(name: str) -> str:
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return "stdlib"
+    if orjson is None:
+        print("⚠️ json_backend=orjson mas o orjson não está instalado; usando a stdlib")
+        return "stdlib"
+    return "orjson"
+
+
+backend = _select_backend(hawks_config.json_backend)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    if backend == "orjson":
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Inteiros acima de 64 bits e tipos não suportados: a stdlib decide (ou falha igual)
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data):
+    if backend == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity e outras extensões que só a stdlib aceita
+            pass
+    return json.loads(data)
+
+
+class HawksJSONResponse(JSONResponse):
+    """JSONResponse que serializa pelo backend configurado"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .config import hawks_config
+
+
+class HawksLoopMonitor:
+    """Mede o atraso do event loop para detectar travamentos.
+
+    Uma task dorme `interval` segundos e compara quando acordou com quando
+    deveria ter acordado: a diferença é o tempo em que o loop ficou ocupado
+    com código síncrono (queries, renderização, parse de saída das ferramentas).
+    Atrasos acima de `stall_threshold` contam como travamento.
+    """
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25, window: int = 600):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.task: Optional[asyncio.Task] = None
+        self.lags = deque(maxlen=window)  # Atrasos recentes em segundos (janela para percentis)
+        self.recent_stalls = deque(maxlen=20)  # {"at": epoch, "lag_ms": ...}
+        self.stats = {"samples": 0, "stalls": 0, "max_lag_ms": 0.0, "total_stall_ms": 0.0}
+
+    def start(self):
+        if self.interval > 0 and self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+
+    def record(self, lag: float):
+        self.lags.append(lag)
+        self.stats["samples"] += 1
+        lag_ms = lag * 1000
+        if lag_ms > self.stats["max_lag_ms"]:
+            self.stats["max_lag_ms"] = lag_ms
+        if lag >= self.stall_threshold:
+            self.stats["stalls"] += 1
+            self.stats["total_stall_ms"] += lag_ms
+            self.recent_stalls.append({"at": time.time(), "lag_ms": round(lag_ms, 1)})
+            print(f"🐢 Event loop travado por {lag_ms:.0f} ms")
+
+    def status(self) -> Dict:
+        ordered = sorted(self.lags)
+
+        def percentile(fraction: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+
+        return {
+            "running": self.task is not None,
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "lag_p50_ms": percentile(0.50),
+            "lag_p99_ms": percentile(0.99),
+            "recent_stalls": list(self.recent_stalls),
+            **{key: round(value, 1) if isinstance(value, float) else value for key, value in self.stats.items()},
+        }
+
+
+hawks_loop_monitor = HawksLoopMonitor(
+    hawks_config.loop_monitor_interval_ms / 1000,
+    hawks_config.loop_stall_threshold_ms / 1000
+)
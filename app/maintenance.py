@@ -0,0 +1,176 @@
+import asyncio
+import time
+from typing import Dict
+
+from .config import hawks_config
+from .database import compress_results_batch
+from .findings import backfill_findings_batch
+from .retention import (
+    backfill_summaries_batch, compact_results_batch, count_compactable, purge_stale_checkpoints,
+    incremental_vacuum_enabled, convert_to_incremental_vacuum, incremental_vacuum_step, full_vacuum
+)
+
+
+class HawksMaintenance:
+    """Tarefas de manutenção do banco que rodam em background, em lotes pequenos"""
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "compression": {"running": False, "rows_compressed": 0, "last_id": 0, "error": None},
+            "findings_backfill": {"running": False, "results_ingested": 0, "failures": 0, "error": None},
+            "retention": {"running": False, "runs": 0, "summaries_created": 0, "rows_compacted": 0, "checkpoints_purged": 0,
+                          "pending_compaction": None, "last_vacuum": None, "last_run": None, "error": None},
+        }
+
+    def start(self):
+        if "compression" not in self.tasks and hawks_config.result_compression:
+            self.tasks["compression"] = asyncio.create_task(self._migrate_compression())
+        if "retention" not in self.tasks:
+            self.tasks["retention"] = asyncio.create_task(self._retention_loop())
+
+    async def stop(self):
+        for task in self.tasks.values():
+            task.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+
+    async def _migrate_compression(self, pause: float = 0.5):
+        """Comprime linhas antigas de scan_results sem bloquear o event loop nem o banco"""
+        stats = self.stats["compression"]
+        stats["running"] = True
+        try:
+            while True:
+                last_id, count = await asyncio.to_thread(
+                    compress_results_batch, stats["last_id"], hawks_config.result_migration_batch
+                )
+                if not count:
+                    break
+                stats["last_id"] = last_id
+                stats["rows_compressed"] += count
+                # Pausa entre lotes para não disputar o lock do SQLite com os scans
+                await asyncio.sleep(pause)
+            if stats["rows_compressed"]:
+                print(f"🗜️ Migração de compressão concluída: {stats['rows_compressed']} resultados comprimidos")
+        except Exception as e:
+            stats["error"] = str(e)
+            print(f"⚠️ Erro na migração de compressão: {e}")
+        finally:
+            stats["running"] = False
+
+    async def _retention_loop(self, backoff: float = 30, max_backoff: float = 3600):
+        # Resultados antigos do nuclei precisam chegar ao store de achados antes de serem compactados.
+        # Uma falha (banco travado, blob corrompido) não desliga a retenção: o backfill é
+        # repetido com espera crescente e só então compactação e vacuum começam
+        delay = backoff
+        while not await self._backfill_findings():
+            self.stats["findings_backfill"]["failures"] += 1
+            print(f"🔁 Backfill de achados será repetido em {delay:.0f}s; retenção aguardando")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_backoff)
+        while True:
+            await self.run_retention()
+            await asyncio.sleep(max(1, hawks_config.retention_interval_minutes) * 60)
+
+    async def _backfill_findings(self, pause: float = 0.2) -> bool:
+        stats = self.stats["findings_backfill"]
+        stats["running"] = True
+        try:
+            while True:
+                count = await asyncio.to_thread(backfill_findings_batch)
+                if not count:
+                    break
+                stats["results_ingested"] += count
+                await asyncio.sleep(pause)
+            if stats["results_ingested"]:
+                print(f"🔎 Store de achados: {stats['results_ingested']} resultados antigos do nuclei ingeridos")
+            stats["error"] = None
+            return True
+        except Exception as e:
+            stats["error"] = str(e)
+            print(f"⚠️ Erro no backfill de achados: {e}")
+            return False
+        finally:
+            stats["running"] = False
+
+    async def run_retention(self, pause: float = 0.2):
+        """Resume resultados sem resumo, compacta os antigos e devolve o espaço ao sistema"""
+        stats = self.stats["retention"]
+        stats["running"] = True
+        batch_size = hawks_config.retention_batch_size
+        try:
+            # 1. Garantir que todo resultado tem resumo antes de qualquer remoção
+            while True:
+                count = await asyncio.to_thread(backfill_summaries_batch, batch_size)
+                if not count:
+                    break
+                stats["summaries_created"] += count
+                await asyncio.sleep(pause)
+
+            # 2. Checkpoints que nenhum scan vai retomar não seguram mais resultados nem espaço
+            stats["checkpoints_purged"] += await asyncio.to_thread(
+                purge_stale_checkpoints, hawks_config.checkpoint_max_age_hours
+            )
+
+            # 3. Remover saídas brutas além das N mais recentes, em lotes curtos
+            compacted = 0
+            keep_raw = hawks_config.retention_keep_raw_scans
+            if keep_raw > 0:
+                pending = await asyncio.to_thread(count_compactable, keep_raw)
+                stats["pending_compaction"] = pending
+                if pending["rows"]:
+                    action = "seriam compactados (simulação)" if hawks_config.retention_dry_run else "serão compactados"
+                    print(f"🧹 Retenção: {pending['rows']} resultados brutos de {pending['targets']} targets {action} "
+                          f"(mantendo os {keep_raw} mais recentes por target e tipo)")
+                while pending["rows"] and not hawks_config.retention_dry_run:
+                    count = await asyncio.to_thread(compact_results_batch, keep_raw, batch_size)
+                    if not count:
+                        break
+                    compacted += count
+                    await asyncio.sleep(pause)
+            stats["rows_compacted"] += compacted
+
+            # 4. Vacuum só quando algo foi removido
+            if compacted:
+                await self._vacuum()
+                print(f"🧹 Retenção: {compacted} resultados antigos compactados em resumos")
+            stats["runs"] += 1
+            stats["last_run"] = time.time()
+        except Exception as e:
+            stats["error"] = str(e)
+            print(f"⚠️ Erro na compactação de resultados: {e}")
+        finally:
+            stats["running"] = False
+
+    async def _vacuum(self, pause: float = 0.2):
+        mode = hawks_config.retention_vacuum
+        stats = self.stats["retention"]
+        if mode == "full":
+            await asyncio.to_thread(full_vacuum)
+            stats["last_vacuum"] = "full"
+        elif mode == "incremental":
+            if not await asyncio.to_thread(incremental_vacuum_enabled):
+                # A conversão reescreve o banco inteiro com lock exclusivo: nunca automática
+                print("ℹ️ Retenção: banco sem auto_vacuum incremental, espaço não devolvido ao sistema "
+                      "(converta com POST /api/maintenance/convert-vacuum)")
+                stats["last_vacuum"] = "skipped"
+                return
+            # Poucas páginas por vez para não segurar o lock de escrita
+            while await asyncio.to_thread(incremental_vacuum_step, 1000):
+                await asyncio.sleep(pause)
+            stats["last_vacuum"] = "incremental"
+
+    async def convert_vacuum(self) -> bool:
+        """Conversão única para auto_vacuum incremental, pedida pelo operador (VACUUM completo)"""
+        converted = await asyncio.to_thread(convert_to_incremental_vacuum)
+        if converted:
+            self.stats["retention"]["last_vacuum"] = "full"
+            print("🧹 Banco convertido para auto_vacuum incremental")
+        return converted
+
+    def status(self) -> Dict[str, dict]:
+        return self.stats
+
+
+hawks_maintenance = HawksMaintenance()
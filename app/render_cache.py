@@ -0,0 +1,95 @@
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, Response
+
+from .config import hawks_config
+from .database import data_version
+
+CACHE_HEADERS = {"Cache-Control": "private, no-cache"}
+
+
+class HawksRenderCache:
+    """Cache LRU do HTML renderizado das páginas.
+
+    A chave junta página, filtros, a versão dos dados (incrementada no banco a cada
+    commit, de qualquer processo) e um estado extra em memória quando a página exibe algo que não vem do banco
+    (ex.: a fila de scans). A mesma chave gera o ETag, então a revalidação do
+    navegador é respondida com 304 sem consultar o banco nem renderizar.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[Tuple, bytes]" = OrderedDict()  # {chave: html}
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _key(self, page: str, params: Tuple, extra: Hashable, db: Optional[Session]) -> Tuple:
+        return (page, params, extra) + data_version.read(db)
+
+    @staticmethod
+    def _etag(key: Tuple) -> str:
+        return f'W/"{hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]}"'
+
+    def respond(self, request: Request, page: str, render: Callable[[], Response],
+                params: Tuple = (), extra: Hashable = None, db: Optional[Session] = None) -> Response:
+        """Serve a página do cache (ou 304) e só chama `render` quando os dados mudaram.
+
+        Com a sessão do request, a versão é lida na mesma transação em que `render` consulta.
+        """
+        # Versão lida antes de renderizar: um commit no meio invalida esta entrada, nunca a esconde
+        key = self._key(page, params, extra, db)
+        etag = self._etag(key)
+        headers = {"ETag": etag, **CACHE_HEADERS}
+
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        cached = self.entries.get(key) if self.max_entries else None
+        if cached is not None:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return HTMLResponse(cached, headers=headers)
+
+        self.stats["misses"] += 1
+        response = render()
+        if response.status_code != 200 or not self.max_entries:
+            return response
+        self._store(key, response.body)
+        response.headers.update(headers)
+        return response
+
+    def _store(self, key: Tuple, body: bytes):
+        # Páginas maiores que o cache inteiro (ex.: /scans com milhares de payloads) só ganham o ETag
+        if len(body) > self.max_bytes:
+            return
+        # Entradas de versões anteriores nunca mais serão lidas
+        for stale in [k for k in self.entries if k[-2:] != key[-2:]]:
+            self.size -= len(self.entries.pop(stale))
+        self.entries[key] = body
+        self.size += len(body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self.size -= len(self.entries.popitem(last=False)[1])
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def status(self) -> Dict:
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "data_version": data_version.read()[1],
+            **self.stats,
+        }
+
+
+hawks_render_cache = HawksRenderCache(hawks_config.render_cache_entries, hawks_config.render_cache_max_mb * 1024 * 1024)
@@ -0,0 +1,393 @@
+import asyncio
+import os
+import time
+import multiprocessing
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def read_system_signals() -> Dict:
+    """Lê sinais de carga do sistema (load average, memória disponível, descritores abertos)"""
+    cpu_count = multiprocessing.cpu_count()
+
+    try:
+        load1 = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load1 = 0.0
+
+    mem_total_gb = None
+    mem_available_gb = None
+    try:
+        with open("/proc/meminfo", "r") as f:
+            meminfo = {}
+            for line in f:
+                name, _, value = line.partition(":")
+                meminfo[name] = int(value.split()[0])  # kB
+        mem_total_gb = meminfo["MemTotal"] / (1024 ** 2)
+        mem_available_gb = meminfo.get("MemAvailable", meminfo.get("MemFree", 0)) / (1024 ** 2)
+    except (OSError, KeyError, ValueError, IndexError):
+        if hasattr(os, "sysconf"):
+            try:
+                page_size = os.sysconf("SC_PAGE_SIZE")
+                mem_total_gb = page_size * os.sysconf("SC_PHYS_PAGES") / (1024 ** 3)
+                mem_available_gb = page_size * os.sysconf("SC_AVPHYS_PAGES") / (1024 ** 3)
+            except (ValueError, OSError):
+                pass
+
+    open_fds = None
+    try:
+        open_fds = len(os.listdir("/proc/self/fd"))
+    except OSError:
+        pass
+
+    fd_limit = None
+    if resource is not None:
+        try:
+            fd_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+            if fd_limit == resource.RLIM_INFINITY:
+                fd_limit = None
+        except (ValueError, OSError):
+            pass
+
+    return {
+        "cpu_count": cpu_count,
+        "load1": load1,
+        "load_ratio": load1 / cpu_count if cpu_count else 0.0,
+        "mem_total_gb": mem_total_gb,
+        "mem_available_gb": mem_available_gb,
+        "open_fds": open_fds,
+        "fd_limit": fd_limit,
+        "fd_ratio": (open_fds / fd_limit) if (open_fds is not None and fd_limit) else None,
+    }
+
+
+class HawksConcurrencyController:
+    """Ajusta o número de scans concorrentes e threads das ferramentas a partir da carga atual.
+
+    Aumenta um scan por vez enquanto há folga (AIMD) e reduz pela metade quando
+    CPU, memória ou descritores de arquivo estão saturados.
+    """
+
+    # Limites de decisão
+    LOAD_HIGH = 1.5  # load/cpu acima disso = sobrecarga
+    LOAD_BUSY = 1.0  # load/cpu acima disso = não aumentar e reduzir um
+    LOAD_LOW = 0.7  # load/cpu abaixo disso = pode aumentar
+    MEM_PER_SCAN_GB = 1.0  # memória livre mínima para admitir mais um scan
+    MEM_LOW_GB = 0.5  # memória livre abaixo disso = sobrecarga
+    FD_HIGH = 0.8  # fração do limite de descritores
+    THROUGHPUT_DROP = 0.8  # queda de throughput que desfaz o último aumento
+
+    def __init__(self, min_concurrent: int, max_concurrent: int, initial: int,
+                 adaptive: bool = True, interval: float = 15.0):
+        self.min_concurrent = max(1, min_concurrent)
+        self.max_concurrent = max(self.min_concurrent, max_concurrent)
+        self.current = min(self.max_concurrent, max(self.min_concurrent, initial))
+        self.adaptive = adaptive
+        self.interval = interval
+        # Janela usada para comparar throughput antes/depois de um aumento
+        self.throughput_window = max(60.0, interval * 4)
+        self.cpu_count = multiprocessing.cpu_count()
+
+        self.last_signals: Dict = {}
+        self.last_adjust = 0.0
+        self.decisions = deque(maxlen=20)
+        self._stage_events = deque(maxlen=500)  # (timestamp, stage, duration, items)
+        self._last_increase_throughput: Optional[float] = None
+
+    def record_stage(self, stage: str, duration: float, items: int):
+        """Registra a conclusão de um estágio do pipeline para cálculo de throughput"""
+        self._stage_events.append((time.time(), stage, duration, items))
+
+    def throughput(self, window: float = 300.0) -> Dict:
+        """Itens processados por segundo em cada estágio na janela recente"""
+        cutoff = time.time() - window
+        per_stage = {}
+        for ts, stage, duration, items in self._stage_events:
+            if ts < cutoff:
+                continue
+            stats = per_stage.setdefault(stage, {"runs": 0, "items": 0, "busy_seconds": 0.0})
+            stats["runs"] += 1
+            stats["items"] += items
+            stats["busy_seconds"] += duration
+        for stats in per_stage.values():
+            stats["items_per_second"] = round(stats["items"] / window, 3)
+            stats["busy_seconds"] = round(stats["busy_seconds"], 1)
+        return per_stage
+
+    def _total_throughput(self, window: float) -> float:
+        cutoff = time.time() - window
+        return sum(items for ts, _, _, items in self._stage_events if ts >= cutoff) / window
+
+    def maybe_adjust(self, active_scans: int, queued_scans: int) -> int:
+        """Recalcula o limite se o intervalo já passou; retorna o limite atual"""
+        now = time.time()
+        if not self.adaptive or now - self.last_adjust < self.interval:
+            return self.current
+        self.last_adjust = now
+
+        signals = read_system_signals()
+        self.last_signals = signals
+        previous = self.current
+        reason = "steady"
+        load_ratio = signals["load_ratio"]
+        mem_available = signals["mem_available_gb"]
+        fd_ratio = signals["fd_ratio"]
+
+        if load_ratio > self.LOAD_HIGH:
+            self.current = max(self.min_concurrent, self.current // 2)
+            reason = f"cpu overloaded (load/cpu {load_ratio:.2f})"
+        elif mem_available is not None and mem_available < self.MEM_LOW_GB:
+            self.current = max(self.min_concurrent, self.current // 2)
+            reason = f"low memory ({mem_available:.2f}GB available)"
+        elif fd_ratio is not None and fd_ratio > self.FD_HIGH:
+            self.current = max(self.min_concurrent, self.current // 2)
+            reason = f"file descriptors near limit ({fd_ratio:.0%})"
+        elif load_ratio > self.LOAD_BUSY:
+            self.current = max(self.min_concurrent, self.current - 1)
+            reason = f"cpu busy (load/cpu {load_ratio:.2f})"
+        elif (self._last_increase_throughput is not None
+              and self._total_throughput(self.throughput_window) < self._last_increase_throughput * self.THROUGHPUT_DROP):
+            # O último aumento piorou o throughput: voltar um passo
+            self.current = max(self.min_concurrent, self.current - 1)
+            self._last_increase_throughput = None
+            reason = "throughput dropped after last increase"
+        elif (queued_scans > 0 and active_scans >= self.current
+              and load_ratio < self.LOAD_LOW
+              and (mem_available is None or mem_available > self.MEM_PER_SCAN_GB)):
+            self.current = min(self.max_concurrent, self.current + 1)
+            if self.current > previous:
+                self._last_increase_throughput = self._total_throughput(self.throughput_window)
+            reason = "spare capacity with queued scans"
+
+        if self.current != previous:
+            decision = {
+                "timestamp": now,
+                "from": previous,
+                "to": self.current,
+                "reason": reason,
+                "load1": round(signals["load1"], 2),
+                "mem_available_gb": round(mem_available, 2) if mem_available is not None else None,
+                "open_fds": signals["open_fds"],
+            }
+            self.decisions.append(decision)
+            print(f"🎛️ Concorrência ajustada: {previous} -> {self.current} ({reason})")
+        return self.current
+
+    def tool_concurrency(self, multiplier: float, active_scans: int) -> int:
+        """Threads/concorrência (-c/-t) para uma ferramenta, dividindo a CPU entre os scans ativos"""
+        load_ratio = self.last_signals.get("load_ratio", 0.0) if self.adaptive else 0.0
+        # Folga de CPU: 1.0 com carga baixa, até 0.25 com o sistema saturado
+        headroom = min(1.0, max(0.25, 1.5 - load_ratio))
+        value = int(self.cpu_count * multiplier * headroom / max(1, active_scans))
+        return max(2, value)
+
+    def status(self) -> Dict:
+        return {
+            "adaptive": self.adaptive,
+            "current": self.current,
+            "min": self.min_concurrent,
+            "max": self.max_concurrent,
+            "signals": self.last_signals,
+            "stage_throughput": self.throughput(),
+            "decisions": list(self.decisions),
+        }
+
+
+class HawksStagePool:
+    """Slots de execução de um estágio do pipeline (enumeração, probing, vulnerabilidades).
+
+    Cada estágio tem seu próprio limite, então um target parado num estágio
+    lento de rede não ocupa o slot de um estágio de CPU e vice-versa.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self.completed = 0
+        self._waiters = deque()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for fut in self._waiters if not fut.done())
+
+    def set_limit(self, limit: int):
+        self.limit = max(1, limit)
+        self._wake()
+
+    def _wake(self):
+        # O slot é entregue ao waiter já contabilizado em in_use
+        while self._waiters and self.in_use < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_use += 1
+                fut.set_result(True)
+
+    async def acquire(self):
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # O slot chegou junto com o cancelamento: devolver
+                self.in_use -= 1
+                self._wake()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        self.in_use = max(0, self.in_use - 1)
+        self.completed += 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def status(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+
+class HawksRateLease:
+    """Fatia do orçamento de requisições concedida a um processo httpx/nuclei"""
+
+    __slots__ = ("tool", "domain", "rate", "started_at")
+
+    def __init__(self, tool: str, domain: Optional[str], rate: int):
+        self.tool = tool
+        self.domain = domain
+        self.rate = rate  # requisições/s; 0 = sem limite
+        self.started_at = time.time()
+
+    def to_dict(self) -> Dict:
+        return {
+            "tool": self.tool,
+            "domain": self.domain,
+            "rate": self.rate,
+            "running_seconds": round(time.time() - self.started_at, 1),
+        }
+
+
+class HawksRateBudget:
+    """Orçamento global de requisições/s dividido entre os processos httpx/nuclei em execução.
+
+    Cada processo recebe seu `-rate-limit` ao iniciar, calculado a partir do que
+    ainda está livre e da demanda atual. A soma das fatias nunca passa do limite
+    global (nem do limite por domínio, se configurado); quando não há fatia mínima
+    livre o processo espera alguém terminar.
+    """
+
+    def __init__(self, global_rps: int = 0, domain_rps: int = 0):
+        self.global_rps = max(0, global_rps)
+        self.domain_rps = max(0, domain_rps)
+        self.leases = []
+        self._released = asyncio.Event()
+        self.total_granted = 0
+        self.total_waits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.global_rps > 0 or self.domain_rps > 0
+
+    def _in_use(self, domain: Optional[str] = None) -> int:
+        return sum(lease.rate for lease in self.leases if domain is None or lease.domain == domain)
+
+    def _compute_grant(self, domain: Optional[str], demand: int, max_consumers: int) -> Optional[int]:
+        """Fatia para um novo processo, ou None se ainda não há fatia mínima livre"""
+        grant = None
+        if self.global_rps:
+            available = self.global_rps - self._in_use()
+            # Um processo sozinho fica com no máximo metade quando outros podem chegar,
+            # já que a fatia não muda depois que o processo inicia
+            reserve = 2 if max_consumers > 1 else 1
+            fair = self.global_rps / max(reserve, demand, len(self.leases) + 1)
+            floor = max(1, self.global_rps // max(1, max_consumers))
+            grant = min(available, fair)
+            # Com muita demanda a fatia justa fica abaixo do piso: esperar só se nem ela está livre
+            if grant < min(floor, fair):
+                return None
+        if self.domain_rps and domain:
+            domain_leases = sum(1 for lease in self.leases if lease.domain == domain)
+            available = self.domain_rps - self._in_use(domain)
+            fair = self.domain_rps / (domain_leases + 1)
+            domain_grant = min(available, fair)
+            if domain_grant < 1:
+                return None
+            grant = domain_grant if grant is None else min(grant, domain_grant)
+        return max(1, int(grant))
+
+    async def acquire(self, tool: str, domain: Optional[str] = None,
+                      demand: int = 1, max_consumers: int = 1) -> HawksRateLease:
+        if not self.enabled:
+            lease = HawksRateLease(tool, domain, 0)
+            self.leases.append(lease)
+            return lease
+
+        waited = False
+        while True:
+            grant = self._compute_grant(domain, demand, max_consumers)
+            if grant is not None:
+                break
+            if not waited:
+                waited = True
+                self.total_waits += 1
+                print(f"⏳ Orçamento de rate esgotado ({self._in_use()}/{self.global_rps} req/s), {tool} aguardando...")
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+
+        lease = HawksRateLease(tool, domain, grant)
+        self.leases.append(lease)
+        self.total_granted += 1
+        return lease
+
+    def release(self, lease: HawksRateLease):
+        try:
+            self.leases.remove(lease)
+        except ValueError:
+            return
+        self._released.set()
+
+    @asynccontextmanager
+    async def lease(self, tool: str, domain: Optional[str] = None, demand: int = 1, max_consumers: int = 1):
+        lease = await self.acquire(tool, domain, demand, max_consumers)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "global_rps": self.global_rps,
+            "domain_rps": self.domain_rps,
+            "allocated_rps": self._in_use(),
+            "leases": [lease.to_dict() for lease in self.leases],
+            "total_granted": self.total_granted,
+            "total_waits": self.total_waits,
+        }
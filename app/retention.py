@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import undefer
+
+from . import jsonio
+from .database import engine, SessionLocal, HawksScanResult, HawksScanSummary, HawksScanCheckpoint
+from .findings import finding_fingerprint
+
+
+def summarize_result_data(scan_type: str, data: dict) -> Dict:
+    """Contagens e fingerprints que sobrevivem à remoção da saída bruta"""
+    summary = {"item_count": 0, "severity_counts": None, "fingerprints": None}
+    if scan_type in ("subfinder", "chaos"):
+        summary["item_count"] = len(data.get("subdomains") or [])
+    elif scan_type == "httpx":
+        summary["item_count"] = len(data.get("live_hosts") or [])
+    elif scan_type == "nuclei":
+        findings = data.get("results") or []
+        severity_counts = {}
+        for finding in findings:
+            severity = (finding.get("info") or {}).get("severity", "unknown")
+            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+        summary["item_count"] = len(findings)
+        summary["severity_counts"] = severity_counts
+        summary["fingerprints"] = sorted({finding_fingerprint(finding) for finding in findings})
+    return summary
+
+
+def build_scan_summary(scan_result: HawksScanResult, data) -> HawksScanSummary:
+    summary = summarize_result_data(scan_result.scan_type, data if isinstance(data, dict) else {})
+    return HawksScanSummary(
+        target_id=scan_result.target_id,
+        result_id=scan_result.id,
+        scan_type=scan_result.scan_type,
+        status=scan_result.status,
+        item_count=summary["item_count"],
+        severity_counts=jsonio.dumps(summary["severity_counts"]) if summary["severity_counts"] is not None else None,
+        fingerprints=jsonio.dumps(summary["fingerprints"]) if summary["fingerprints"] is not None else None,
+        started_at=scan_result.started_at
+    )
+
+
+def _load_result_data(result: HawksScanResult) -> dict:
+    try:
+        return jsonio.loads(result.result_data) if result.result_data else {}
+    except ValueError:
+        return {}
+
+
+def backfill_summaries_batch(batch_size: int = 100) -> int:
+    """Cria resumos para resultados gravados antes de scan_summaries existir"""
+    db = SessionLocal()
+    try:
+        ids = [row[0] for row in db.execute(
+            text(
+                "SELECT r.id FROM scan_results r "
+                "LEFT JOIN scan_summaries s ON s.result_id = r.id "
+                "WHERE s.id IS NULL ORDER BY r.id LIMIT :batch_size"
+            ),
+            {"batch_size": batch_size}
+        )]
+        if not ids:
+            return 0
+        results = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).filter(HawksScanResult.id.in_(ids)).all()
+        for result in results:
+            db.add(build_scan_summary(result, _load_result_data(result)))
+        db.commit()
+        return len(ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def compact_results_batch(keep_raw: int, batch_size: int = 100) -> int:
+    """Remove saídas brutas além das `keep_raw` mais recentes por target e tipo de scan.
+
+    Cada lote é uma transação curta; resultados referenciados por checkpoints
+    de scans interrompidos são preservados.
+    """
+    db = SessionLocal()
+    try:
+        # Ordenar por id (rowid) evita ler os payloads só para achar as linhas antigas
+        ids = [row[0] for row in db.execute(
+            text(
+                "SELECT id FROM ("
+                "  SELECT id, ROW_NUMBER() OVER (PARTITION BY target_id, scan_type ORDER BY id DESC) AS position"
+                "  FROM scan_results"
+                ") WHERE position > :keep_raw "
+                "AND id NOT IN (SELECT result_id FROM scan_checkpoints WHERE result_id IS NOT NULL) "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"keep_raw": keep_raw, "batch_size": batch_size}
+        )]
+        if not ids:
+            return 0
+
+        summarized = {row[0] for row in db.query(HawksScanSummary.result_id).filter(HawksScanSummary.result_id.in_(ids))}
+        missing = [result_id for result_id in ids if result_id not in summarized]
+        if missing:
+            results = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).filter(HawksScanResult.id.in_(missing)).all()
+            for result in results:
+                db.add(build_scan_summary(result, _load_result_data(result)))
+
+        db.query(HawksScanResult).filter(HawksScanResult.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        return len(ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def purge_stale_checkpoints(max_age_hours: int) -> int:
+    """Remove checkpoints velhos demais para serem retomados (o scan ignoraria e recomeçaria do zero).
+
+    Libera também os resultados brutos que eles protegiam da compactação.
+    """
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+        count = db.query(HawksScanCheckpoint).filter(HawksScanCheckpoint.created_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def count_compactable(keep_raw: int) -> Dict[str, int]:
+    """Quantas saídas brutas (e de quantos targets) a compactação com `keep_raw` removeria"""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT COUNT(*), COUNT(DISTINCT target_id) FROM ("
+                "  SELECT id, target_id, ROW_NUMBER() OVER (PARTITION BY target_id, scan_type ORDER BY id DESC) AS position"
+                "  FROM scan_results"
+                ") WHERE position > :keep_raw "
+                "AND id NOT IN (SELECT result_id FROM scan_checkpoints WHERE result_id IS NOT NULL)"
+            ),
+            {"keep_raw": keep_raw}
+        ).one()
+    return {"rows": row[0] or 0, "targets": row[1] or 0}
+
+
+def incremental_vacuum_enabled() -> bool:
+    """O banco já usa auto_vacuum=INCREMENTAL (só então o vacuum em passos curtos funciona)"""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        # Uma leitura antes relê o cabeçalho do arquivo (o pragma sozinho devolve o valor em cache da conexão)
+        conn.execute(text("SELECT count(*) FROM sqlite_master")).scalar()
+        return conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+
+def convert_to_incremental_vacuum() -> bool:
+    """Ativa auto_vacuum=INCREMENTAL num banco existente.
+
+    Exige um VACUUM completo, que reescreve o arquivo inteiro segurando o lock
+    exclusivo; por isso só roda quando o operador pede. Retorna True se converteu.
+    """
+    if engine.dialect.name != "sqlite" or incremental_vacuum_enabled():
+        return False
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+    return True
+
+
+def incremental_vacuum_step(pages: int = 1000) -> int:
+    """Devolve até `pages` páginas livres ao sistema; retorna quantas ainda restam"""
+    if engine.dialect.name != "sqlite":
+        return 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # No sqlite3 o pragma só libera todas as páginas se o cursor for consumido até o fim
+        cursor = conn.connection.driver_connection.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+        cursor.fetchall()
+        return conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+
+
+def full_vacuum():
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+
+def build_trends(summaries: List[HawksScanSummary]) -> List[Dict]:
+    """Série histórica por scan; para o nuclei inclui achados novos e resolvidos entre scans consecutivos"""
+    trends = []
+    previous: Optional[set] = None
+    for summary in summaries:
+        point = {
+            "result_id": summary.result_id,
+            "scan_type": summary.scan_type,
+            "status": summary.status,
+            "started_at": summary.started_at,
+            "item_count": summary.item_count,
+        }
+        if summary.scan_type == "nuclei":
+            point["severity_counts"] = jsonio.loads(summary.severity_counts) if summary.severity_counts else {}
+            if summary.status == "success":
+                current = set(jsonio.loads(summary.fingerprints)) if summary.fingerprints else set()
+                if previous is not None:
+                    point["new_findings"] = len(current - previous)
+                    point["resolved_findings"] = len(previous - current)
+                previous = current
+        trends.append(point)
+    return trends
@@ -0,0 +1,181 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, List, Optional
+
+# Prioridades de enfileiramento (menor valor = mais urgente)
+PRIORITY_INTERACTIVE = 0  # Scan individual disparado pelo usuário
+PRIORITY_SELECTED = 1  # Scan de targets selecionados
+PRIORITY_SCAN_ALL = 2  # Scan de todos os targets
+PRIORITY_SCHEDULED = 3  # Scans recorrentes/agendados
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_SELECTED: "selected",
+    PRIORITY_SCAN_ALL: "scan-all",
+    PRIORITY_SCHEDULED: "scheduled",
+}
+
+DEFAULT_GROUP = "default"
+
+
+class HawksQueueJob:
+    """Scan aguardando na fila"""
+
+    __slots__ = ("target_id", "target", "priority", "group", "data", "enqueued_at", "seq", "sort_key", "valid")
+
+    def __init__(self, target_id: int, target: str, priority: int, group: str, data: dict, seq: int, aging_seconds: int):
+        self.target_id = target_id
+        self.target = target
+        self.priority = priority
+        self.group = group or DEFAULT_GROUP
+        self.data = data
+        self.enqueued_at = time.time()
+        self.seq = seq
+        # Aging: cada `aging_seconds` de espera equivale a subir um nível de prioridade.
+        # Como todos os jobs envelhecem na mesma velocidade, a chave é estática e cabe num heap.
+        self.sort_key = priority * aging_seconds + self.enqueued_at
+        self.valid = True
+
+    def to_dict(self) -> dict:
+        return {
+            "target_id": self.target_id,
+            "target": self.target,
+            "priority": self.priority,
+            "priority_name": PRIORITY_NAMES.get(self.priority, str(self.priority)),
+            "group": self.group,
+            "enqueued_at": self.enqueued_at,
+            "waiting_seconds": round(time.time() - self.enqueued_at, 1),
+        }
+
+
+class HawksScanQueue:
+    """Fila de scans com prioridade, aging e divisão justa de slots entre grupos de targets"""
+
+    def __init__(self, aging_seconds: int = 3600, fair_share: bool = True):
+        self.aging_seconds = max(1, aging_seconds)
+        self.fair_share = fair_share
+        self._heaps: Dict[str, list] = {}  # {group: [(sort_key, seq, job)]}
+        self._jobs: Dict[int, HawksQueueJob] = {}  # {target_id: job} - no máximo um job por target
+        self._running: Dict[str, int] = {}  # {group: scans em execução}
+        self._seq = itertools.count()
+        self._event = asyncio.Event()
+
+    def qsize(self) -> int:
+        return len(self._jobs)
+
+    def get_job(self, target_id: int) -> Optional[HawksQueueJob]:
+        return self._jobs.get(target_id)
+
+    def put(self, target_id: int, target: str, priority: int, group: str = None, data: dict = None) -> HawksQueueJob:
+        """Enfileira um target. Se ele já estiver na fila, mantém a prioridade mais urgente"""
+        existing = self._jobs.get(target_id)
+        if existing:
+            if priority >= existing.priority:
+                return existing
+            # Reenfileirar com prioridade maior; a entrada antiga é descartada de forma preguiçosa
+            existing.valid = False
+
+        job = HawksQueueJob(target_id, target, priority, group, data or {}, next(self._seq), self.aging_seconds)
+        if existing:
+            # Preservar o tempo de espera já acumulado
+            job.enqueued_at = existing.enqueued_at
+            job.sort_key = priority * self.aging_seconds + job.enqueued_at
+
+        self._jobs[target_id] = job
+        heapq.heappush(self._heaps.setdefault(job.group, []), (job.sort_key, job.seq, job))
+        self._event.set()
+        return job
+
+    def remove(self, target_id: int) -> bool:
+        """Remove um target da fila (remoção preguiçosa, O(1))"""
+        job = self._jobs.pop(target_id, None)
+        if not job:
+            return False
+        job.valid = False
+        return True
+
+    def _head(self, group: str) -> Optional[HawksQueueJob]:
+        heap = self._heaps.get(group)
+        while heap and not heap[0][2].valid:
+            heapq.heappop(heap)
+        if not heap:
+            self._heaps.pop(group, None)
+            return None
+        return heap[0][2]
+
+    def pop_next(self, max_concurrent: int) -> Optional[HawksQueueJob]:
+        """Retorna o próximo job a executar respeitando prioridade e fair-share"""
+        heads = []
+        for group in list(self._heaps.keys()):
+            job = self._head(group)
+            if job:
+                heads.append(job)
+        if not heads:
+            return None
+
+        candidates = heads
+        if self.fair_share:
+            # Grupos com demanda = grupos com jobs na fila ou em execução
+            demand = {job.group for job in heads} | {g for g, n in self._running.items() if n > 0}
+            share = max(1, math.ceil(max_concurrent / len(demand)))
+            under_share = [job for job in heads if self._running.get(job.group, 0) < share]
+            # Se todos os grupos já usam sua cota, não deixar slots ociosos
+            if under_share:
+                candidates = under_share
+
+        job = min(candidates, key=lambda j: (j.sort_key, j.seq))
+        heapq.heappop(self._heaps[job.group])
+        job.valid = False
+        self._jobs.pop(job.target_id, None)
+        return job
+
+    def mark_started(self, job: HawksQueueJob):
+        self._running[job.group] = self._running.get(job.group, 0) + 1
+
+    def mark_finished(self, job: HawksQueueJob):
+        remaining = self._running.get(job.group, 0) - 1
+        if remaining > 0:
+            self._running[job.group] = remaining
+        else:
+            self._running.pop(job.group, None)
+        # Slot liberado: acordar o processador
+        self._event.set()
+
+    async def wait(self, timeout: float):
+        """Aguarda até um novo job/slot livre ou o timeout"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+    def ordered_jobs(self) -> List[HawksQueueJob]:
+        """Jobs válidos na ordem de prioridade efetiva (sem considerar fair-share)"""
+        return sorted(self._jobs.values(), key=lambda j: (j.sort_key, j.seq))
+
+    def snapshot(self, limit: int = 50) -> List[dict]:
+        """Lista os próximos jobs com posição e prioridade"""
+        jobs = []
+        for position, job in enumerate(self.ordered_jobs()[:max(0, limit)], start=1):
+            info = job.to_dict()
+            info["position"] = position
+            jobs.append(info)
+        return jobs
+
+    def position(self, target_id: int) -> Optional[int]:
+        job = self._jobs.get(target_id)
+        if not job:
+            return None
+        key = (job.sort_key, job.seq)
+        return 1 + sum(1 for other in self._jobs.values() if (other.sort_key, other.seq) < key)
+
+    def groups_status(self) -> Dict[str, dict]:
+        groups = {}
+        for job in self._jobs.values():
+            groups.setdefault(job.group, {"queued": 0, "running": 0})["queued"] += 1
+        for group, running in self._running.items():
+            groups.setdefault(group, {"queued": 0, "running": 0})["running"] = running
+        return groups
@@ -1,23 +1,47 @@
 import asyncio
+import hashlib
 import subprocess
-import json
-import tempfile
 import os
 import shutil
+import signal
+import time
+import uuid
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from .database import HawksScanResult, HawksTemplate, HawksSettings as HawksSettingsDB, SessionLocal
+from . import jsonio
+from .database import HawksScanResult, HawksScanCheckpoint, HawksTemplate, HawksSettings as HawksSettingsDB, open_session, close_session
 from .config import hawks_config
+from .scan_queue import HawksScanQueue, PRIORITY_INTERACTIVE, PRIORITY_NAMES
+from .resources import HawksConcurrencyController, HawksStagePool, HawksRateBudget, read_system_signals
+from .workspace import (
+    HawksWorkspace, HawksWorkspaceManager, HawksWorkspaceQuotaError, QUOTA_POLL_SECONDS, fsize_limited_command
+)
+from .retention import build_scan_summary
+from .findings import ingest_findings
+from .dns_resolver import create_dns_resolver
+from .enumeration import HawksSubdomainSet
+from .http_probe import create_http_prober
+
+# Estágios do pipeline com pools de concorrência independentes
+STAGE_ENUMERATION = "enumeration"  # subfinder + chaos (rede)
+STAGE_PROBING = "probing"  # httpx
+STAGE_VULNERABILITY = "vulnerability"  # nuclei (CPU)
 
 class HawksScanner:
     def __init__(self):
         # Estado simplificado da fila
         self.scan_jobs = {}  # {scan_id: {"status": str, "progress": list, "error": str}}
         self.stop_flags = {}  # {scan_id: bool}
+        self.scan_tasks = {}  # {scan_id: asyncio.Task} - pipelines em execução
+        self.scan_processes = {}  # {scan_id: set(Process)} - processos das ferramentas
         
-        # Sistema de fila simplificado
-        self.scan_queue = asyncio.Queue()
+        # Fila com prioridade, aging e fair-share entre grupos de targets
+        self.scan_queue = HawksScanQueue(
+            aging_seconds=hawks_config.queue_aging_seconds,
+            fair_share=hawks_config.queue_fair_share
+        )
         self.active_scans = set()  # Set simples ao invés de dict
         self.processor_running = False
         self.processor_task = None
@@ -25,24 +49,97 @@ class HawksScanner:
         # Configurações
         self.tools_path = self._get_tools_path()
         
-        # Otimizar número de scans concorrentes baseado nos recursos do sistema
-        import multiprocessing
-        cpu_count = multiprocessing.cpu_count()
-        memory_gb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024**3) if hasattr(os, 'sysconf') else 4
+        # Diretório exclusivo por scan para os artefatos entre estágios
+        self.workspaces = HawksWorkspaceManager(
+            base_dir=hawks_config.workspace_dir,
+            use_tmpfs=hawks_config.workspace_tmpfs,
+            quota_mb=hawks_config.workspace_quota_mb
+        )
+        
+        # Valor inicial de scans concorrentes baseado nos recursos do sistema;
+        # depois o controlador ajusta a partir da carga atual
+        signals = read_system_signals()
+        cpu_count = signals["cpu_count"]
+        memory_gb = signals["mem_available_gb"] if signals["mem_available_gb"] is not None else 4
         
         # Calcular scans concorrentes baseado em CPU e memória
         optimal_scans = min(
             cpu_count,  # Máximo 1 scan por CPU
-            int(memory_gb / 2),  # Máximo 1 scan por 2GB de RAM
+            int(memory_gb / 2),  # Máximo 1 scan por 2GB de RAM livre
             hawks_config.max_concurrent_scans  # Respeitar configuração do usuário
         )
         
-        self.max_concurrent = max(1, optimal_scans)  # Mínimo 1 scan
-        print(f"🔧 Sistema otimizado: {cpu_count} CPUs, {memory_gb:.1f}GB RAM, {self.max_concurrent} scans concorrentes")
+        self.concurrency = HawksConcurrencyController(
+            min_concurrent=hawks_config.min_concurrent_scans,
+            max_concurrent=hawks_config.max_concurrent_scans,
+            initial=max(1, optimal_scans),  # Mínimo 1 scan
+            adaptive=hawks_config.adaptive_concurrency,
+            interval=hawks_config.concurrency_adjust_interval
+        )
+        self.concurrency.last_signals = signals
+        
+        # Pools por estágio: targets avançam como numa linha de montagem
+        self.stage_pools = {
+            STAGE_ENUMERATION: HawksStagePool(STAGE_ENUMERATION, hawks_config.enumeration_concurrency),
+            STAGE_PROBING: HawksStagePool(STAGE_PROBING, hawks_config.probing_concurrency),
+            STAGE_VULNERABILITY: HawksStagePool(STAGE_VULNERABILITY, self.concurrency.current),
+        }
+        self._sync_stage_limits()
+        
+        # Processos nuclei (shards) em execução, somando todos os scans
+        self.nuclei_shards = HawksStagePool(
+            "nuclei-shards",
+            hawks_config.nuclei_shard_concurrency or max(2, cpu_count)
+        )
+        
+        # Orçamento global de requisições/s compartilhado por httpx e nuclei
+        self.rate_budget = HawksRateBudget(
+            global_rps=hawks_config.global_rate_limit,
+            domain_rps=hawks_config.domain_rate_limit
+        )
+        
+        # Pré-filtro DNS opcional: cache e limite de consultas compartilhados entre os scans
+        self.dns_resolver = create_dns_resolver() if hawks_config.dns_prefilter else None
+        # Motor nativo de sondagem HTTP no lugar do binário do httpx (probe_engine=native)
+        self.http_prober = create_http_prober() if hawks_config.probe_engine == "native" else None
+        print(f"🔧 Sistema otimizado: {cpu_count} CPUs, {memory_gb:.1f}GB RAM livre, {self.max_concurrent} scans concorrentes")
+
+    @property
+    def max_concurrent(self) -> int:
+        """Limite de pipelines em andamento: max_concurrent_scans, sem passar do que os estágios comportam"""
+        return max(1, min(hawks_config.max_concurrent_scans, sum(pool.limit for pool in self.stage_pools.values())))
+
+    def _sync_stage_limits(self):
+        """Aplica o limite adaptativo aos estágios sem limite fixo"""
+        if hawks_config.vulnerability_concurrency > 0:
+            self.stage_pools[STAGE_VULNERABILITY].set_limit(hawks_config.vulnerability_concurrency)
+        else:
+            self.stage_pools[STAGE_VULNERABILITY].set_limit(self.concurrency.current)
+
+    def _rate_lease(self, tool: str, domain: Optional[str]):
+        """Reserva a fatia do orçamento de rate para um processo httpx/nuclei"""
+        probing = self.stage_pools[STAGE_PROBING]
+        shards = self.nuclei_shards
+        # Demanda = processos que consomem rate rodando ou aguardando slot agora
+        # (cada shard do nuclei é um processo próprio)
+        demand = probing.in_use + probing.waiting + shards.in_use + shards.waiting
+        return self.rate_budget.lease(
+            tool, domain,
+            demand=demand,
+            max_consumers=probing.limit + shards.limit
+        )
+
+    def _tool_threads(self, multiplier: float, stage: str) -> int:
+        """Concorrência para uma ferramenta considerando carga e processos ativos no estágio"""
+        return self.concurrency.tool_concurrency(multiplier, self.stage_pools[stage].in_use)
 
     async def start_queue_processor(self):
         """Inicia o processador de fila"""
         if not self.processor_running:
+            # Workspaces deixados por processos que morreram sem limpar
+            removed = self.workspaces.sweep_orphans()
+            if removed:
+                print(f"🧹 Removidos {removed} workspaces/arquivos órfãos")
             self.processor_running = True
             self.processor_task = asyncio.create_task(self._queue_processor_loop())
             print("🚀 Hawks Scanner - Processador de fila iniciado")
@@ -50,6 +147,9 @@ class HawksScanner:
     async def stop_queue_processor(self):
         """Para o processador de fila"""
         self.processor_running = False
+        # Encerrar pipelines e processos em execução para liberar a máquina
+        for scan_id in list(self.scan_tasks.keys()):
+            self._cancel_running_scan(scan_id)
         if self.processor_task:
             self.processor_task.cancel()
             try:
@@ -57,6 +157,14 @@ class HawksScanner:
             except asyncio.CancelledError:
                 pass
             self.processor_task = None
+        # Aguardar os pipelines cancelados liberarem seus workspaces e apagar o que sobrar
+        if self.scan_tasks:
+            await asyncio.gather(*self.scan_tasks.values(), return_exceptions=True)
+        self.workspaces.release_all()
+        if self.dns_resolver:
+            self.dns_resolver.close()
+        if self.http_prober:
+            self.http_prober.close()
         print("🛑 Hawks Scanner - Processador de fila parado")
 
     async def _queue_processor_loop(self):
@@ -69,28 +177,30 @@ class HawksScanner:
                 queue_size = self.scan_queue.qsize()
                 active_count = len(self.active_scans)
                 
+                # Reavaliar limite de concorrência com sinais atuais do sistema;
+                # o controlador governa o estágio de vulnerabilidades (CPU)
+                vuln_pool = self.stage_pools[STAGE_VULNERABILITY]
+                self.concurrency.maybe_adjust(vuln_pool.in_use, vuln_pool.waiting + queue_size)
+                self._sync_stage_limits()
+                
                 # Log apenas quando há atividade
                 if queue_size > 0 or active_count > 0:
                     print(f"📊 Fila: {queue_size} aguardando | {active_count}/{self.max_concurrent} ativos")
 
                 # Verificar se pode processar mais scans
                 if active_count < self.max_concurrent and queue_size > 0:
-                    try:
-                        # Pegar próximo scan da fila (timeout curto)
-                        scan_data = await asyncio.wait_for(
-                            self.scan_queue.get(), 
-                            timeout=0.5
-                        )
-                        
-                        # Processar scan imediatamente
-                        asyncio.create_task(self._execute_queued_scan(scan_data))
-                        
-                    except asyncio.TimeoutError:
-                        # Timeout esperado, continuar loop
-                        pass
+                    # Pegar próximo scan pela prioridade efetiva
+                    job = self.scan_queue.pop_next(self.max_concurrent)
+                    if job:
+                        # Marcar como ativo antes de criar a task para não ultrapassar o limite
+                        self.active_scans.add(f"scan_{job.target_id}")
+                        self.scan_queue.mark_started(job)
+                        self.scan_tasks[f"scan_{job.target_id}"] = asyncio.create_task(self._execute_queued_scan(job))
+                    else:
+                        await self.scan_queue.wait(timeout=2)
                 else:
-                    # Aguardar antes de verificar novamente
-                    await asyncio.sleep(2)
+                    # Aguardar novo job ou slot livre antes de verificar novamente
+                    await self.scan_queue.wait(timeout=2)
                     
             except asyncio.CancelledError:
                 print("❌ Processador de fila cancelado")
@@ -100,9 +210,9 @@ class HawksScanner:
                 # Aguardar antes de tentar novamente
                 await asyncio.sleep(5)
 
-    async def _execute_queued_scan(self, scan_data):
+    async def _execute_queued_scan(self, job):
         """Executa um scan vindo da fila - método simplificado"""
-        target_id, target, db_session_data = scan_data
+        target_id, target, db_session_data = job.target_id, job.target, job.data
         scan_id = f"scan_{target_id}"
         
         # Adicionar aos scans ativos
@@ -112,52 +222,68 @@ class HawksScanner:
         if scan_id in self.scan_jobs:
             self.scan_jobs[scan_id]["status"] = "running"
         
-        print(f"🔍 Iniciando scan: Target {target_id} ({target})")
+        print(f"🔍 Iniciando scan: Target {target_id} ({target}) [{PRIORITY_NAMES.get(job.priority)} / {job.group}]")
         
         try:
             # Executar pipeline de scan
             await self._run_scan_pipeline(target_id, target, db_session_data)
             print(f"✅ Scan concluído: Target {target_id}")
             
+        except asyncio.CancelledError:
+            # Cancelado por stop_scan: processos já foram sinalizados, só liberar o slot
+            print(f"🛑 Scan cancelado: Target {target_id}")
+            if scan_id in self.scan_jobs:
+                self.scan_jobs[scan_id]["status"] = "stopped"
         except Exception as e:
             print(f"❌ Erro no scan {target_id}: {e}")
             if scan_id in self.scan_jobs:
                 self.scan_jobs[scan_id]["status"] = "error"
                 self.scan_jobs[scan_id]["error"] = str(e)
         finally:
-            # Sempre remover dos scans ativos
+            # Sempre remover dos scans ativos e apagar o workspace (sucesso, erro ou cancelamento)
             self.active_scans.discard(scan_id)
+            self.scan_queue.mark_finished(job)
+            self.scan_tasks.pop(scan_id, None)
+            self.workspaces.release(scan_id)
 
-    async def scan_target(self, target_id: int, target: str, db: Session):
-        """Interface principal para iniciar scan de um target"""
+    async def scan_target(self, target_id: int, target: str, db: Session,
+                          priority: int = PRIORITY_INTERACTIVE, group: str = None, resume: bool = True):
+        """Interface principal para iniciar scan de um target.
+
+        Com resume=True o pipeline pula estágios já concluídos por um scan interrompido;
+        com resume=False os checkpoints são descartados e o scan recomeça do subfinder.
+        """
         scan_id = f"scan_{target_id}"
         
         # Inicializar job
         self.scan_jobs[scan_id] = {
             "status": "queued", 
             "progress": [], 
-            "error": None
+            "error": None,
+            "priority": priority
         }
         self.stop_flags[scan_id] = False
         
-        print(f"📨 Adicionando à fila: Target {target_id} ({target})")
+        print(f"📨 Adicionando à fila: Target {target_id} ({target}) prioridade {PRIORITY_NAMES.get(priority, priority)}")
         
         # Sempre adicionar à fila para processamento uniforme
         # Serializar dados necessários do banco para evitar problemas de sessão
         db_data = self._serialize_db_session(db)
-        await self.scan_queue.put((target_id, target, db_data))
+        db_data["resume"] = resume
+        self.scan_queue.put(target_id, target, priority, group=group, data=db_data)
         
         # Atualizar status no banco
         self._update_target_status(target_id, "queued", db)
 
-    async def scan_multiple_targets(self, target_ids: List[int], db: Session):
+    async def scan_multiple_targets(self, target_ids: List[int], db: Session, priority: int = PRIORITY_INTERACTIVE,
+                                    resume: bool = True):
         """Adiciona múltiplos targets à fila"""
         from .database import HawksTarget as HawksTargetDB
         
-        for target_id in target_ids:
-            target_obj = db.query(HawksTargetDB).filter(HawksTargetDB.id == target_id).first()
-            if target_obj:
-                await self.scan_target(target_id, target_obj.domain_ip, db)
+        targets = db.query(HawksTargetDB).filter(HawksTargetDB.id.in_(target_ids)).all()
+        for target_obj in targets:
+            await self.scan_target(target_obj.id, target_obj.domain_ip, db, priority=priority,
+                                   group=target_obj.group_name, resume=resume)
 
     def _serialize_db_session(self, db: Session):
         """Serializa dados necessários da sessão do banco"""
@@ -165,6 +291,70 @@ class HawksScanner:
             "database_url": hawks_config.database_url
         }
 
+    def _load_checkpoints(self, db: Session, target_id: int) -> Dict:
+        """Saídas de estágios concluídos por um scan anterior que não terminou"""
+        cutoff = datetime.utcnow() - timedelta(hours=hawks_config.checkpoint_max_age_hours)
+        rows = db.query(HawksScanCheckpoint).filter(HawksScanCheckpoint.target_id == target_id).all()
+        if any(row.created_at and row.created_at < cutoff for row in rows):
+            # Checkpoint velho: os dados podem estar desatualizados, recomeçar do zero
+            self._clear_checkpoints(db, target_id)
+            return {"nuclei_shards": {}}
+        
+        checkpoints = {"nuclei_shards": {}}
+        result_ids = [row.result_id for row in rows if row.result_id]
+        results = {}
+        if result_ids:
+            for result in db.query(HawksScanResult).filter(HawksScanResult.id.in_(result_ids)).all():
+                results[result.id] = result
+        for row in rows:
+            try:
+                if row.stage == "nuclei_shard":
+                    checkpoints["nuclei_shards"][row.shard_key] = jsonio.loads(row.data)
+                elif row.result_id in results:
+                    checkpoints[row.stage] = jsonio.loads(results[row.result_id].result_data)
+            except (TypeError, ValueError):
+                continue
+        return checkpoints
+
+    def _save_checkpoint(self, db: Session, target_id: int, stage: str, result_id: int = None,
+                         shard_key: str = None, data: dict = None):
+        """Registra um estágio (ou shard do nuclei) concluído"""
+        try:
+            db.add(HawksScanCheckpoint(
+                target_id=target_id,
+                stage=stage,
+                shard_key=shard_key,
+                result_id=result_id,
+                data=jsonio.dumps(data) if data is not None else None
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Erro ao salvar checkpoint {stage} do target {target_id}: {e}")
+
+    def _clear_checkpoints(self, db: Session, target_id: int):
+        try:
+            db.query(HawksScanCheckpoint).filter(HawksScanCheckpoint.target_id == target_id).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Erro ao limpar checkpoints do target {target_id}: {e}")
+
+    def _save_stage_result(self, db: Session, target_id: int, scan_type: str, result: Dict) -> HawksScanResult:
+        """Grava a saída bruta do estágio junto com o resumo usado pelas tendências e pela retenção"""
+        scan_result = HawksScanResult(
+            target_id=target_id,
+            scan_type=scan_type,
+            status="success" if result["status"] == "success" else "error",
+            result_data=jsonio.dumps(result),
+            error_msg=result.get("error")
+        )
+        db.add(scan_result)
+        db.flush()
+        db.add(build_scan_summary(scan_result, result))
+        db.commit()
+        return scan_result
+
     def _update_target_status(self, target_id: int, status: str, db: Session):
         """Atualiza status do target no banco de forma segura"""
         try:
@@ -177,7 +367,7 @@ class HawksScanner:
         except Exception as e:
             print(f"⚠️ Erro ao atualizar status do target {target_id}: {e}")
 
-    def get_queue_status(self):
+    def get_queue_status(self, jobs_limit: int = 50):
         """Retorna status atual da fila"""
         return {
             "active_scans": len(self.active_scans),
@@ -186,22 +376,189 @@ class HawksScanner:
             "scan_threads": hawks_config.scan_threads,
             "queue_processor_running": self.processor_running,
             "active_scan_ids": list(self.active_scans),
-            "scan_jobs_count": len(self.scan_jobs)
+            "scan_jobs_count": len(self.scan_jobs),
+            "fair_share": self.scan_queue.fair_share,
+            "aging_seconds": self.scan_queue.aging_seconds,
+            "groups": self.scan_queue.groups_status(),
+            "queued_jobs": self.scan_queue.snapshot(limit=jobs_limit),
+            "concurrency": self.concurrency.status(),
+            "stages": {name: pool.status() for name, pool in self.stage_pools.items()},
+            "rate_budget": self.rate_budget.status(),
+            "workspaces": self.workspaces.status(),
+            "dns": self.dns_resolver.status() if self.dns_resolver else None,
+            "probe_engine": self.http_prober.status() if self.http_prober else "httpx"
         }
 
+    def get_target_queue_info(self, target_id: int) -> Optional[Dict]:
+        """Posição e prioridade de um target na fila (None se não estiver enfileirado)"""
+        job = self.scan_queue.get_job(target_id)
+        if not job:
+            return None
+        info = job.to_dict()
+        info["position"] = self.scan_queue.position(target_id)
+        return info
+
     def stop_scan(self, target_id: int):
         """Para um scan específico"""
         scan_id = f"scan_{target_id}"
         self.stop_flags[scan_id] = True
+        # Se ainda estiver na fila, sai dela sem ocupar slot
+        self.scan_queue.remove(target_id)
         if scan_id in self.scan_jobs:
             self.scan_jobs[scan_id]["status"] = "stopped"
+        # Se estiver rodando, encerrar processos e cancelar o pipeline agora
+        self._cancel_running_scan(scan_id)
         print(f"🛑 Parando scan: {scan_id}")
 
+    def stop_scans(self, target_ids: List[int]) -> int:
+        """Para vários scans (enfileirados ou em execução); retorna quantos foram afetados"""
+        stopped = 0
+        for target_id in target_ids:
+            scan_id = f"scan_{target_id}"
+            if self.scan_queue.get_job(target_id) or scan_id in self.scan_tasks:
+                stopped += 1
+            self.stop_scan(target_id)
+        return stopped
+
+    def stop_all_scans(self) -> List[int]:
+        """Esvazia a fila e para todos os scans em execução; retorna os targets afetados"""
+        target_ids = [job.target_id for job in self.scan_queue.ordered_jobs()]
+        target_ids += [int(scan_id.split("_", 1)[1]) for scan_id in list(self.scan_tasks.keys())]
+        self.stop_scans(target_ids)
+        return target_ids
+
+    def _cancel_running_scan(self, scan_id: str):
+        """Sinaliza os processos do scan (SIGTERM -> SIGKILL) e cancela a task do pipeline"""
+        processes = list(self.scan_processes.get(scan_id, ()))
+        for process in processes:
+            self._signal_process_group(process, signal.SIGTERM)
+        if processes:
+            asyncio.get_running_loop().create_task(self._escalate_kill(processes))
+        task = self.scan_tasks.get(scan_id)
+        if task and not task.done():
+            task.cancel()
+
+    def _signal_process_group(self, process, sig):
+        """Envia um sinal ao grupo de processos da ferramenta (inclui filhos)"""
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError, AttributeError):
+            try:
+                process.send_signal(sig)
+            except ProcessLookupError:
+                pass
+
+    async def _escalate_kill(self, processes, grace: float = 3.0):
+        """Aguarda o SIGTERM surtir efeito e força SIGKILL em quem sobrou"""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(process.wait() for process in processes)),
+                timeout=grace
+            )
+        except asyncio.TimeoutError:
+            for process in processes:
+                self._signal_process_group(process, signal.SIGKILL)
+
+    async def _spawn(self, scan_id: Optional[str], *cmd, workspace: HawksWorkspace = None, **kwargs):
+        """Inicia uma ferramenta em seu próprio grupo de processos e registra no scan.
+
+        Com workspace, nenhum arquivo escrito pela ferramenta passa da cota (RLIMIT_FSIZE,
+        aplicado por um processo intermediário que faz exec da ferramenta).
+        """
+        if workspace is not None and workspace.quota_bytes:
+            cmd = fsize_limited_command(cmd, workspace.quota_bytes)
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            **kwargs
+        )
+        if scan_id:
+            self.scan_processes.setdefault(scan_id, set()).add(process)
+        return process
+
+    async def _communicate(self, scan_id: Optional[str], process, timeout: float = None,
+                           workspace: HawksWorkspace = None):
+        """Aguarda a ferramenta; em timeout, cancelamento ou estouro da cota do workspace encerra o grupo inteiro"""
+        watcher = None
+        if workspace is not None and workspace.quota_bytes:
+            watcher = asyncio.create_task(self._watch_quota(workspace, process))
+        try:
+            if timeout:
+                output = await asyncio.wait_for(process.communicate(), timeout=timeout)
+            else:
+                output = await process.communicate()
+        except asyncio.TimeoutError:
+            self._signal_process_group(process, signal.SIGTERM)
+            await self._escalate_kill([process])
+            raise
+        except asyncio.CancelledError:
+            # Não bloquear o cancelamento: o SIGKILL fica por conta de uma task separada
+            self._signal_process_group(process, signal.SIGTERM)
+            asyncio.get_running_loop().create_task(self._escalate_kill([process]))
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if scan_id and scan_id in self.scan_processes:
+                self.scan_processes[scan_id].discard(process)
+                if not self.scan_processes[scan_id]:
+                    del self.scan_processes[scan_id]
+        if watcher is not None and watcher.done() and not watcher.cancelled() and watcher.result():
+            raise HawksWorkspaceQuotaError(watcher.result())
+        if workspace is not None:
+            # Arquivo cortado pelo RLIMIT_FSIZE (SIGXFSZ ou EFBIG na ferramenta) fica no limite da cota
+            workspace.check_quota()
+        return output
+
+    async def _watch_quota(self, workspace: HawksWorkspace, process) -> Optional[str]:
+        """Mede o workspace enquanto a ferramenta escreve; passou da cota, o grupo morre na hora
+        (sem esperar a ferramenta terminar de encher o tmpfs)"""
+        while process.returncode is None:
+            await asyncio.sleep(QUOTA_POLL_SECONDS)
+            error = workspace.quota_error()
+            if error:
+                self._signal_process_group(process, signal.SIGKILL)
+                return error
+        return None
+
+    def _workspace(self, scan_id: str) -> HawksWorkspace:
+        """Workspace do scan (criado na primeira chamada, removido ao final do scan)"""
+        return self.workspaces.create(scan_id)
+
+    async def _run_adhoc(self, method, *args, **kwargs) -> Dict:
+        """Chamada avulsa de uma ferramenta (sem scan_id): workspace próprio, removido ao terminar"""
+        scan_id = f"adhoc-{uuid.uuid4().hex[:8]}"
+        try:
+            return await method(*args, scan_id=scan_id, **kwargs)
+        finally:
+            self.workspaces.release(scan_id)
+
+    @asynccontextmanager
+    async def _stage_slot(self, scan_id: str, stage: str):
+        """Ocupa um slot do pool do estágio e registra em que estágio o scan está"""
+        job = self.scan_jobs.get(scan_id)
+        if job is not None:
+            job["stage"] = f"waiting:{stage}"
+        try:
+            async with self.stage_pools[stage].slot():
+                if job is not None:
+                    job["stage"] = stage
+                yield
+        finally:
+            if job is not None:
+                job["stage"] = None
+
     def _should_stop(self, scan_id: str) -> bool:
         """Verifica se um scan deve ser parado"""
         return self.stop_flags.get(scan_id, False)
 
     def _get_tools_path(self) -> str:
+        if hawks_config.tools_path:
+            return os.path.expanduser(hawks_config.tools_path)
         home_go_bin = os.path.expanduser("~/go/bin")
         if os.path.exists(home_go_bin):
             return home_go_bin
@@ -242,26 +599,30 @@ class HawksScanner:
         # Se nada funcionar, retornar o nome da ferramenta (pode funcionar se estiver no PATH)
         return tool_name
     
-    async def run_subfinder(self, target: str) -> Dict:
+    async def run_subfinder(self, target: str, scan_id: str = None) -> Dict:
+        if not scan_id:
+            return await self._run_adhoc(self.run_subfinder, target)
         try:
             print(f"SUBFINDER: Executando para target: {target}")
             subfinder_path = self._get_tool_path("subfinder")
             print(f"SUBFINDER: Caminho do executável: {subfinder_path}")
             
-            # Criar arquivo temporário para salvar subdomínios
-            subfinder_output_file = tempfile.mktemp(suffix='_subfinder.txt')
+            # Saída bruta no workspace; o pipeline junta com as outras fontes em subdomains.txt
+            workspace = self._workspace(scan_id)
+            subfinder_output_file = workspace.file("subfinder.txt")
             
             # Obter número de CPUs para otimização
             import multiprocessing
             cpu_count = multiprocessing.cpu_count()
+            threads = self._tool_threads(2, STAGE_ENUMERATION)
             
-            # Comando otimizado com máximo de threads e concorrência
+            # Comando otimizado com threads divididas entre os scans ativos
             cmd = [
                 subfinder_path, 
                 "-d", target, 
                 "-o", subfinder_output_file, 
                 "-silent",
-                "-t", str(cpu_count * 2),  # Threads = 2x CPUs
+                "-t", str(threads),  # Threads = 2x CPUs / scans ativos
                 "-timeout", "30",  # Timeout otimizado
                 "-max-time", "300"  # Tempo máximo de execução
             ]
@@ -272,16 +633,11 @@ class HawksScanner:
             env = os.environ.copy()
             env.update({
                 "GOMAXPROCS": str(cpu_count),
-                "SUBFINDER_THREADS": str(cpu_count * 2),
+                "SUBFINDER_THREADS": str(threads),
             })
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd, 
-                stdout=asyncio.subprocess.PIPE, 
-                stderr=asyncio.subprocess.PIPE,
-                env=env
-            )
-            stdout, stderr = await process.communicate()
+            process = await self._spawn(scan_id, *cmd, env=env, workspace=workspace)
+            stdout, stderr = await self._communicate(scan_id, process, workspace=workspace)
             
             print(f"SUBFINDER: Return code: {process.returncode}")
             print(f"SUBFINDER: Stderr: {stderr.decode()[:200]}...")
@@ -289,34 +645,18 @@ class HawksScanner:
             if process.returncode == 0:
                 # Verificar se arquivo foi criado e ler conteúdo
                 if os.path.exists(subfinder_output_file):
+                    workspace.check_quota()
                     with open(subfinder_output_file, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if content:
-                            subdomains = [s.strip() for s in content.split('\n') if s.strip()]
-                            print(f"SUBFINDER: Encontrados {len(subdomains)} subdomínios")
-                            return {
-                                "status": "success", 
-                                "subdomains": subdomains,
-                                "output_file": subfinder_output_file  # Para usar com cat | httpx
-                            }
-                        else:
-                            # Arquivo vazio, limpar
-                            try:
-                                os.unlink(subfinder_output_file)
-                            except:
-                                pass
-                            print("SUBFINDER: Nenhum subdomínio encontrado")
-                            return {"status": "success", "subdomains": []}
+                        subdomains = [s.strip() for s in f if s.strip()]
+                    if subdomains:
+                        print(f"SUBFINDER: Encontrados {len(subdomains)} subdomínios")
+                        return {"status": "success", "subdomains": subdomains}
+                    print("SUBFINDER: Nenhum subdomínio encontrado")
+                    return {"status": "success", "subdomains": []}
                 else:
                     print("SUBFINDER: Arquivo de saída não foi criado")
                     return {"status": "error", "error": "Subfinder output file not created"}
             else:
-                # Limpar arquivo em caso de erro
-                if os.path.exists(subfinder_output_file):
-                    try:
-                        os.unlink(subfinder_output_file)
-                    except:
-                        pass
                 error_msg = stderr.decode().strip()
                 print(f"SUBFINDER: Erro - {error_msg}")
                 return {"status": "error", "error": error_msg}
@@ -324,7 +664,7 @@ class HawksScanner:
             print(f"SUBFINDER: Exception - {str(e)}")
             return {"status": "error", "error": str(e)}
     
-    async def run_chaos(self, target: str, api_key: str) -> Dict:
+    async def run_chaos(self, target: str, api_key: str, scan_id: str = None) -> Dict:
         if not api_key:
             return {"status": "skipped", "reason": "No API key provided"}
         
@@ -332,10 +672,8 @@ class HawksScanner:
             chaos_path = self._get_tool_path("chaos")
             cmd = [chaos_path, "-d", target, "-key", api_key, "-silent"]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
+            process = await self._spawn(scan_id, *cmd)
+            stdout, stderr = await self._communicate(scan_id, process)
             
             if process.returncode == 0:
                 subdomains = stdout.decode().strip().split('\n')
@@ -345,16 +683,37 @@ class HawksScanner:
         except Exception as e:
             return {"status": "error", "error": str(e)}
     
-    async def run_httpx(self, subdomains: List[str] = None, subfinder_file: str = None) -> Dict:
+    async def run_dns_prefilter(self, subdomains: List[str], domain: str = None, scan_id: str = None) -> Dict:
+        """Resolve os subdomínios e mantém só os que existem (sem resposta do DNS o nome segue adiante)"""
+        try:
+            kept, stats = await self.dns_resolver.filter_resolvable(subdomains, domain=domain)
+            print(f"DNS: {stats['resolved']} resolvem, {stats['unresolved']} descartados, "
+                  f"{stats['errors']} sem resposta ({stats['cache_hits']} do cache) em {stats['elapsed']:.1f}s")
+            if stats["wildcard_collapsed"]:
+                print(f"DNS: {stats['wildcard_collapsed']} nomes de wildcard colapsados em {stats['wildcard_zones']} zonas")
+            return {"status": "success", "subdomains": kept, "stats": stats}
+        except Exception as e:
+            print(f"DNS: Exception - {str(e)}")
+            return {"status": "error", "error": str(e), "subdomains": subdomains}
+    
+    async def run_httpx(self, subdomains: List[str] = None, subfinder_file: str = None, domain: str = None,
+                        scan_id: str = None) -> Dict:
+        if not scan_id:
+            return await self._run_adhoc(self.run_httpx, subdomains, subfinder_file, domain=domain)
+        if self.http_prober:
+            if subfinder_file and os.path.exists(subfinder_file):
+                with open(subfinder_file, 'r', encoding='utf-8') as f:
+                    subdomains = [line.strip() for line in f if line.strip()]
+            return await self._run_native_probe(subdomains or [], domain=domain, scan_id=scan_id)
         # Priorizar arquivo do subfinder se disponível
         if subfinder_file and os.path.exists(subfinder_file):
-            return await self._run_httpx_from_file(subfinder_file)
+            return await self._run_httpx_from_file(subfinder_file, domain=domain, scan_id=scan_id)
         elif subdomains:
-            return await self._run_httpx_from_list(subdomains)
+            return await self._run_httpx_from_list(subdomains, domain=domain, scan_id=scan_id)
         else:
             return {"status": "error", "error": "No subdomains or file provided"}
     
-    async def _run_httpx_from_file(self, subfinder_file: str) -> Dict:
+    async def _run_httpx_from_file(self, subfinder_file: str, domain: str = None, scan_id: str = None) -> Dict:
         """Executa HTTPX usando a flag -l para ler de um arquivo"""
         try:
             print(f"HTTPX: Processando arquivo do subfinder: {subfinder_file}")
@@ -364,90 +723,59 @@ class HawksScanner:
                 return {"status": "error", "error": "Subfinder file not found"}
             
             with open(subfinder_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:
-                    return {"status": "success", "live_hosts": [], "output_file": None}
-                
-                subdomains_count = len([line for line in content.split('\n') if line.strip()])
-                print(f"HTTPX: Arquivo contém {subdomains_count} subdomínios")
+                subdomains_count = sum(1 for line in f if line.strip())
+            if not subdomains_count:
+                return {"status": "success", "live_hosts": []}
+            print(f"HTTPX: Arquivo contém {subdomains_count} subdomínios")
             
             httpx_path = self._get_tool_path("httpx")
             print(f"HTTPX: Executável: {httpx_path}")
             
-            # Criar arquivo de saída para o HTTPX
-            httpx_output_file = tempfile.mktemp(suffix='_httpx.txt')
+            # Hosts vivos ficam no workspace para o Nuclei ler direto com -l
+            workspace = self._workspace(scan_id)
+            httpx_output_file = workspace.file("live_hosts.txt")
             
             # Obter número de CPUs para otimização
             import multiprocessing
             cpu_count = multiprocessing.cpu_count()
-            
-            # Comando otimizado com -l e máximo de threads
-            cmd = [
-                httpx_path,
-                "-l", subfinder_file,
-                "-silent",
-                "-o", httpx_output_file,
-                "-c", str(cpu_count * 2),
-                "-rate-limit", "0",
-                "-timeout", "10"
-            ]
-            print(f"HTTPX: Comando otimizado: {' '.join(cmd)}")
+            threads = self._tool_threads(2, STAGE_PROBING)
             
             # Configurar ambiente otimizado
             env = os.environ.copy()
             env.update({
                 "GOMAXPROCS": str(cpu_count),
-                "HTTPX_THREADS": str(cpu_count * 2),
-                "HTTPX_CONCURRENCY": str(cpu_count * 2),
+                "HTTPX_THREADS": str(threads),
+                "HTTPX_CONCURRENCY": str(threads),
             })
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env=env
+            # Comando otimizado com -l, threads divididas entre os scans ativos
+            # e rate-limit calculado a partir do orçamento global
+            def build_cmd(input_file: str, output_file: str, rate: int) -> List[str]:
+                return [
+                    httpx_path,
+                    "-l", input_file,
+                    "-silent",
+                    "-o", output_file,
+                    "-c", str(threads),
+                    "-rate-limit", str(rate),
+                    "-timeout", "10"
+                ]
+            
+            returncode, stderr = await self._run_httpx_batches(
+                scan_id, workspace, subfinder_file, httpx_output_file, domain, build_cmd, env
             )
             
-            stdout, stderr = await process.communicate()
-            
-            print(f"HTTPX: Return code: {process.returncode}")
+            print(f"HTTPX: Return code: {returncode}")
             print(f"HTTPX: Stderr: {stderr.decode()[:200]}...")
             
-            if process.returncode == 0:
-                if os.path.exists(httpx_output_file):
-                    with open(httpx_output_file, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if content:
-                            live_hosts = [line.strip() for line in content.split('\n') if line.strip()]
-                            print(f"HTTPX: Encontrados {len(live_hosts)} hosts vivos (via arquivo)")
-                            
-                            try:
-                                os.unlink(subfinder_file)
-                            except:
-                                pass
-                            
-                            return {
-                                "status": "success", 
-                                "live_hosts": live_hosts,
-                                "output_file": httpx_output_file
-                            }
-                        else:
-                            try:
-                                os.unlink(httpx_output_file)
-                                os.unlink(subfinder_file)
-                            except:
-                                pass
-                            return {"status": "success", "live_hosts": [], "output_file": None}
-                else:
-                    try:
-                        os.unlink(subfinder_file)
-                    except:
-                        pass
-                    return {"status": "success", "live_hosts": [], "output_file": None}
+            if returncode == 0:
+                live_hosts = self._read_live_hosts(workspace, httpx_output_file)
+                print(f"HTTPX: Encontrados {len(live_hosts)} hosts vivos (via arquivo)")
+                return {"status": "success", "live_hosts": live_hosts}
             else:
                 error_msg = stderr.decode().strip()
                 if not error_msg:
-                    error_msg = f"HTTPX failed with return code {process.returncode}"
+                    error_msg = f"HTTPX failed with return code {returncode}"
                 print(f"HTTPX: Erro - {error_msg}")
                 return {"status": "error", "error": error_msg}
                 
@@ -457,12 +785,11 @@ class HawksScanner:
             traceback.print_exc()
             return {"status": "error", "error": str(e)}
     
-    async def _run_httpx_from_list(self, subdomains: List[str]) -> Dict:
+    async def _run_httpx_from_list(self, subdomains: List[str], domain: str = None, scan_id: str = None) -> Dict:
         """Versão fallback para quando não há arquivo do subfinder"""
         if not subdomains:
-            return {"status": "success", "live_hosts": [], "output_file": None}
+            return {"status": "success", "live_hosts": []}
         
-        input_file = None
         try:
             print(f"HTTPX: Verificando {len(subdomains)} subdomínios (via lista)...")
             
@@ -480,45 +807,33 @@ class HawksScanner:
                     hosts_to_check.append(subdomain)
             
             if not hosts_to_check:
-                return {"status": "success", "live_hosts": [], "output_file": None}
+                return {"status": "success", "live_hosts": []}
             
             print(f"HTTPX: Processando {len(hosts_to_check)} hosts...")
             
             httpx_path = self._get_tool_path("httpx")
             
-            # Criar arquivo temporário para a lista de hosts
-            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='_httpx_input.txt', encoding='utf-8') as f:
-                f.write('\n'.join(hosts_to_check))
-                input_file = f.name
-            
-            httpx_output_file = tempfile.mktemp(suffix='_httpx.txt')
+            # Lista de hosts e saída ficam no workspace do scan
+            workspace = self._workspace(scan_id)
+            input_file = workspace.write_lines("httpx_input.txt", hosts_to_check)
+            httpx_output_file = workspace.file("live_hosts.txt")
             
             # Comando otimizado com -l
-            cmd = [httpx_path, "-l", input_file, "-silent", "-o", httpx_output_file, "-timeout", "10"]
-            print(f"HTTPX: Comando: {' '.join(cmd)}")
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env=os.environ.copy()
+            def build_cmd(batch_file: str, output_file: str, rate: int) -> List[str]:
+                cmd = [httpx_path, "-l", batch_file, "-silent", "-o", output_file, "-timeout", "10"]
+                if rate:
+                    cmd.extend(["-rate-limit", str(rate)])
+                return cmd
+            
+            returncode, stderr = await self._run_httpx_batches(
+                scan_id, workspace, input_file, httpx_output_file, domain, build_cmd, os.environ.copy()
             )
             
-            stdout, stderr = await process.communicate()
+            # A lista de entrada não é usada pelos próximos estágios
+            workspace.remove("httpx_input.txt")
             
-            if process.returncode == 0:
-                if os.path.exists(httpx_output_file):
-                    with open(httpx_output_file, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if content:
-                            live_hosts = [line.strip() for line in content.split('\n') if line.strip()]
-                            return {
-                                "status": "success", 
-                                "live_hosts": live_hosts,
-                                "output_file": httpx_output_file
-                            }
-                # Se não houver hosts vivos, o arquivo de saída pode estar vazio ou não ser criado
-                return {"status": "success", "live_hosts": [], "output_file": None}
+            if returncode == 0:
+                return {"status": "success", "live_hosts": self._read_live_hosts(workspace, httpx_output_file)}
             else:
                 error_msg = stderr.decode().strip()
                 return {"status": "error", "error": error_msg}
@@ -526,51 +841,115 @@ class HawksScanner:
         except Exception as e:
             print(f"HTTPX: Exception - {str(e)}")
             return {"status": "error", "error": str(e)}
+    
+    def _httpx_batch_size(self, hosts_count: int) -> int:
+        """Hosts por lote do httpx: lotes só fazem sentido com orçamento de rate (cada um renova a fatia)"""
+        batch_size = hawks_config.httpx_batch_size
+        if not self.rate_budget.enabled or batch_size <= 0:
+            return max(1, hosts_count)
+        return batch_size
+    
+    async def _run_httpx_batches(self, scan_id: str, workspace: HawksWorkspace, input_file: str, output_file: str,
+                                 domain: Optional[str], build_cmd, env: dict):
+        """Roda o httpx sobre `input_file`, em lotes quando o orçamento de rate está ativo.
+        
+        Cada lote é um processo com a fatia do orçamento vigente quando ele começa, então
+        o rate acompanha os scans que entram e saem. Retorna (returncode, stderr) do último
+        processo ou do primeiro que falhou; a saída de todos os lotes fica em `output_file`.
+        """
+        batches = [(input_file, output_file)]
+        if self.rate_budget.enabled and hawks_config.httpx_batch_size > 0:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                hosts = [line.strip() for line in f if line.strip()]
+            batch_size = self._httpx_batch_size(len(hosts))
+            if len(hosts) > batch_size:
+                batches = [
+                    (workspace.write_lines(f"httpx_batch_{index}.txt", hosts[offset:offset + batch_size]),
+                     workspace.file(f"live_hosts_{index}.txt"))
+                    for index, offset in enumerate(range(0, len(hosts), batch_size))
+                ]
+                print(f"HTTPX: {len(hosts)} hosts divididos em {len(batches)} lotes de até {batch_size}")
+                open(output_file, 'w').close()
+        
+        returncode, stderr = 0, b""
+        try:
+            for batch_file, batch_output in batches:
+                async with self._rate_lease("httpx", domain) as lease:
+                    cmd = build_cmd(batch_file, batch_output, lease.rate)
+                    print(f"HTTPX: Comando: {' '.join(cmd)}")
+                    process = await self._spawn(scan_id, *cmd, env=env, workspace=workspace)
+                    stdout, stderr = await self._communicate(scan_id, process, workspace=workspace)
+                returncode = process.returncode
+                if returncode != 0:
+                    break
+                if len(batches) > 1:
+                    # Saída do lote vai para o arquivo final (lido pelo nuclei) e o lote sai do workspace
+                    if os.path.exists(batch_output):
+                        with open(batch_output, 'r', encoding='utf-8') as src, open(output_file, 'a', encoding='utf-8') as dst:
+                            shutil.copyfileobj(src, dst)
+                    workspace.check_quota()
         finally:
-            # Limpar arquivo de input temporário
-            if input_file and os.path.exists(input_file):
-                try:
-                    os.unlink(input_file)
-                except:
-                    pass
+            if len(batches) > 1:
+                for batch_file, batch_output in batches:
+                    workspace.remove(os.path.basename(batch_file))
+                    workspace.remove(os.path.basename(batch_output))
+        return returncode, stderr
     
-    async def run_nuclei(self, httpx_output_file: str = None, live_hosts: List[str] = None) -> Dict:
+    async def _run_native_probe(self, hosts: List[str], domain: str = None, scan_id: str = None) -> Dict:
+        """Sondagem HTTP dentro do processo: mesmo formato de live_hosts do httpx, sem processo nem arquivos"""
+        if not hosts:
+            return {"status": "success", "live_hosts": []}
+        try:
+            print(f"PROBE: Verificando {len(hosts)} hosts (motor nativo)...")
+            # Em lotes com orçamento de rate ativo: cada lote sonda com a fatia vigente
+            batch_size = self._httpx_batch_size(len(hosts))
+            live_hosts = []
+            for offset in range(0, len(hosts), batch_size):
+                async with self._rate_lease("httpx", domain) as lease:
+                    live_hosts.extend(await self.http_prober.probe(hosts[offset:offset + batch_size], rate=lease.rate))
+            live_hosts = list(dict.fromkeys(live_hosts))
+            print(f"PROBE: Encontrados {len(live_hosts)} hosts vivos")
+            return {"status": "success", "live_hosts": live_hosts}
+        except Exception as e:
+            print(f"PROBE: Exception - {str(e)}")
+            return {"status": "error", "error": str(e)}
+    
+    def _read_live_hosts(self, workspace: HawksWorkspace, httpx_output_file: str) -> List[str]:
+        """Lê a saída do HTTPX (o arquivo pode não ser criado quando não há hosts vivos)"""
+        if not os.path.exists(httpx_output_file):
+            return []
+        workspace.check_quota()
+        with open(httpx_output_file, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+    
+    async def run_nuclei(self, httpx_output_file: str = None, live_hosts: List[str] = None, domain: str = None,
+                         scan_id: str = None, completed_shards: Dict[str, list] = None, on_shard_done=None) -> Dict:
         if not httpx_output_file and not live_hosts:
             return {"status": "error", "error": "No hosts to scan"}
+        if not scan_id:
+            return await self._run_adhoc(self.run_nuclei, httpx_output_file, live_hosts, domain=domain,
+                                         completed_shards=completed_shards, on_shard_done=on_shard_done)
         
         try:
             print(f"NUCLEI: Iniciando scan...")
             
-            # Usar arquivo do HTTPX se disponível, senão criar arquivo temporário
-            hosts_file = None
-            cleanup_file = False
-            
+            # Usar arquivo do HTTPX se disponível, senão gravar a lista no workspace
+            workspace = self._workspace(scan_id)
             if httpx_output_file and os.path.exists(httpx_output_file):
                 hosts_file = httpx_output_file
                 print(f"NUCLEI: Usando arquivo do HTTPX: {hosts_file}")
             elif live_hosts:
-                # Criar arquivo temporário se não temos arquivo do HTTPX
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as f:
-                    for host in live_hosts:
-                        f.write(f"{host}\n")
-                    hosts_file = f.name
-                    cleanup_file = True
-                print(f"NUCLEI: Criado arquivo temporário: {hosts_file}")
+                hosts_file = workspace.write_lines("nuclei_hosts.txt", live_hosts)
+                print(f"NUCLEI: Criado arquivo de hosts no workspace: {hosts_file}")
             else:
                 return {"status": "error", "error": "No valid hosts file or list"}
             
-            # Verificar se arquivo existe e tem conteúdo
-            if not os.path.exists(hosts_file):
-                return {"status": "error", "error": "Hosts file not found"}
-            
-            with open(hosts_file, 'r') as f:
-                hosts_content = f.read().strip()
-                if not hosts_content:
-                    if cleanup_file:
-                        os.unlink(hosts_file)
-                    return {"status": "error", "error": "Hosts file is empty"}
-                hosts_count = len([line for line in hosts_content.split('\n') if line.strip()])
-                print(f"NUCLEI: Arquivo contém {hosts_count} hosts")
+            with open(hosts_file, 'r', encoding='utf-8') as f:
+                hosts = [line.strip() for line in f if line.strip()]
+            if not hosts:
+                return {"status": "error", "error": "Hosts file is empty"}
+            hosts_count = len(hosts)
+            print(f"NUCLEI: Arquivo contém {hosts_count} hosts")
             
             nuclei_path = self._get_tool_path("nuclei")
             print(f"NUCLEI: Executável: {nuclei_path}")
@@ -584,12 +963,8 @@ class HawksScanner:
             
             # Testar se o nuclei funciona executando --version
             try:
-                test_process = await asyncio.create_subprocess_exec(
-                    nuclei_path, "--version",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                test_stdout, test_stderr = await asyncio.wait_for(test_process.communicate(), timeout=10)
+                test_process = await self._spawn(scan_id, nuclei_path, "--version")
+                test_stdout, test_stderr = await self._communicate(scan_id, test_process, timeout=10)
                 if test_process.returncode != 0:
                     return {"status": "error", "error": f"NUCLEI test failed: {test_stderr.decode()}"}
                 print(f"NUCLEI: Version test passed - {test_stdout.decode().strip()}")
@@ -628,12 +1003,8 @@ class HawksScanner:
                 list_cmd = [nuclei_path, "-t", custom_templates_dir, "-tl"]
                 print(f"NUCLEI: Testando listagem de templates: {' '.join(list_cmd)}")
                 
-                list_process = await asyncio.create_subprocess_exec(
-                    *list_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                list_stdout, list_stderr = await asyncio.wait_for(list_process.communicate(), timeout=30)
+                list_process = await self._spawn(scan_id, *list_cmd)
+                list_stdout, list_stderr = await self._communicate(scan_id, list_process, timeout=30)
                 
                 if list_process.returncode == 0:
                     print(f"NUCLEI: Templates listados com sucesso: {list_stdout.decode()[:200]}...")
@@ -642,220 +1013,295 @@ class HawksScanner:
             except Exception as e:
                 print(f"NUCLEI: Erro no teste de listagem: {e}")
             
-            # Obter número de CPUs para otimização
-            import multiprocessing
-            cpu_count = multiprocessing.cpu_count()
-            print(f"NUCLEI: Sistema tem {cpu_count} CPUs disponíveis")
-            
-            # Múltiplas configurações otimizadas para máximo desempenho
-            template_configs = [
-                # Configuração principal com máximo de threads e concorrência
-                ("max-performance", [
-                    "-t", custom_templates_dir,
-                    "-c", str(cpu_count * 2),  # Concorrência = 2x CPUs
-                    "-rate-limit", "0",  # Sem limite de rate
-                    "-bulk-size", "50",  # Bulk size maior
-                    "-headless",  # Modo headless para mais velocidade
-                    "-timeout", "10"  # Timeout reduzido
+            # Dividir hosts em shards: cada shard roda em um processo nuclei próprio,
+            # com timeout proporcional ao seu tamanho
+            shards = self._split_nuclei_shards(hosts)
+            shard_keys = [self._nuclei_shard_key(shard) for shard in shards]
+            shard_files = self._write_nuclei_shards(workspace, hosts_file, shards)
+            total_shards = len(shard_files)
+            print(f"NUCLEI: {hosts_count} hosts divididos em {total_shards} shard(s)")
+            
+            # Configuração que funcionou em um shard passa a ser a primeira tentativa dos demais
+            ladder = {"preferred": None}
+            shard_results = {}
+            pending = list(range(total_shards))
+            start_time = datetime.now()
+            
+            # Shards já concluídos por um scan interrompido (mesmos hosts) não rodam de novo
+            if completed_shards:
+                for index in pending:
+                    if shard_keys[index] in completed_shards:
+                        shard_results[index] = {"status": "success", "results": completed_shards[shard_keys[index]]}
+                pending = [index for index in pending if index not in shard_results]
+                if shard_results:
+                    print(f"NUCLEI: Retomando - {len(shard_results)} de {total_shards} shard(s) já concluídos")
+            
+            async def run_shard(index):
+                outcome = await self._run_nuclei_shard(
+                    scan_id, index, total_shards, shard_files[index], domain,
+                    nuclei_path, custom_templates_dir, yaml_files, ladder
+                )
+                if outcome["status"] == "success" and on_shard_done:
+                    on_shard_done(shard_keys[index], outcome["results"])
+                return outcome
+            
+            for attempt in range(1 + max(0, hawks_config.nuclei_shard_retries)):
+                if not pending:
+                    break
+                if attempt:
+                    print(f"NUCLEI: Repetindo {len(pending)} shard(s) com falha (tentativa {attempt + 1})")
+                outcomes = await asyncio.gather(*(run_shard(index) for index in pending))
+                for index, outcome in zip(pending, outcomes):
+                    shard_results[index] = outcome
+                # Só os shards que falharam voltam para a próxima rodada
+                pending = [index for index in pending if shard_results[index]["status"] != "success"]
+            
+            if len(pending) == total_shards:
+                # Se chegou aqui, todas as configurações falharam em todos os shards
+                error_msg = f"All nuclei configurations failed. Tried {shard_results[pending[0]].get('configs_tried', 0)} configurations. Check if nuclei is properly installed and templates are valid."
+                print(f"NUCLEI: {error_msg}")
+                print(f"NUCLEI: Nuclei path: {nuclei_path}")
+                print(f"NUCLEI: Templates directory: {custom_templates_dir}")
+                print(f"NUCLEI: Available templates: {yaml_files}")
+                last_error = shard_results[pending[0]].get("error") if pending else None
+                if last_error:
+                    print(f"NUCLEI: Último erro: {last_error}")
+                return {"status": "error", "error": error_msg}
+            
+            # Juntar resultados dos shards na ordem original dos hosts
+            results = []
+            for index in sorted(shard_results):
+                results.extend(shard_results[index].get("results", []))
+            
+            execution_time = (datetime.now() - start_time).total_seconds()
+            hosts_per_second = hosts_count / execution_time if execution_time > 0 else 0
+            
+            if pending:
+                print(f"NUCLEI: ⚠️  {len(pending)} de {total_shards} shard(s) falharam após {hawks_config.nuclei_shard_retries} nova(s) tentativa(s)")
+            print(f"NUCLEI: Encontradas {len(results)} vulnerabilidades em {total_shards} shard(s)")
+            print(f"NUCLEI: Performance: {execution_time:.1f}s, {hosts_per_second:.1f} hosts/s, {len(results)} resultados")
+            
+            return {"status": "success", "results": results, "config_used": ladder["preferred"] or "checkpoint", "performance": {
+                "execution_time": execution_time,
+                "hosts_per_second": hosts_per_second,
+                "hosts_scanned": hosts_count,
+                "results_found": len(results),
+                "shards": total_shards,
+                "failed_shards": pending
+            }}
+                    
+        except Exception as e:
+            print(f"NUCLEI: Exception - {str(e)}")
+            return {"status": "error", "error": str(e)}
+    
+    def _split_nuclei_shards(self, hosts: List[str]) -> List[List[str]]:
+        """Divide a lista de hosts em shards de até `nuclei_shard_size` hosts"""
+        shard_size = hawks_config.nuclei_shard_size
+        if shard_size <= 0 or len(hosts) <= shard_size:
+            return [hosts]
+        return [hosts[offset:offset + shard_size] for offset in range(0, len(hosts), shard_size)]
+    
+    def _nuclei_shard_key(self, hosts: List[str]) -> str:
+        """Identifica um shard pelo conjunto de hosts (independe da ordem e do índice)"""
+        return hashlib.sha1("\n".join(sorted(hosts)).encode()).hexdigest()
+    
+    def _write_nuclei_shards(self, workspace: HawksWorkspace, hosts_file: str, shards: List[List[str]]) -> List[str]:
+        """Grava um arquivo por shard (com um único shard reaproveita o arquivo de hosts)"""
+        if len(shards) == 1:
+            return [hosts_file]
+        return [workspace.write_lines(f"nuclei_shard_{index}.txt", shard) for index, shard in enumerate(shards)]
+    
+    def _nuclei_template_configs(self, custom_templates_dir: str, yaml_files: List[str], rate_limit: str,
+                                 concurrency: int, aggressive_concurrency: int, optimized_concurrency: int) -> List[tuple]:
+        """Configurações do nuclei em ordem de tentativa"""
+        # Múltiplas configurações otimizadas para máximo desempenho
+        template_configs = [
+            # Configuração principal com máximo de threads e concorrência
+            ("max-performance", [
+                "-t", custom_templates_dir,
+                "-c", str(concurrency),  # Concorrência = 2x CPUs / processos nuclei ativos
+                "-rate-limit", rate_limit,  # Fatia do orçamento global (0 = sem limite)
+                "-bulk-size", "50",  # Bulk size maior
+                "-headless",  # Modo headless para mais velocidade
+                "-timeout", "10"  # Timeout reduzido
+            ]),
+            # Configuração agressiva
+            ("aggressive", [
+                "-t", custom_templates_dir,
+                "-c", str(aggressive_concurrency),  # Concorrência = 3x CPUs / processos nuclei ativos
+                "-rate-limit", rate_limit,
+                "-bulk-size", "100",
+                "-headless",
+                "-timeout", "5"
+            ]),
+            # Configuração padrão otimizada
+            ("optimized", [
+                "-t", custom_templates_dir,
+                "-c", str(optimized_concurrency),
+                "-rate-limit", rate_limit,
+                "-bulk-size", "25"
+            ]),
+            # Configuração de fallback
+            ("fallback", ["-t", custom_templates_dir] + (["-rate-limit", rate_limit] if rate_limit != "0" else []))
+        ]
+        
+        # Adicionar configurações com templates específicos se houver apenas um template
+        if len(yaml_files) == 1:
+            specific_template = os.path.join(custom_templates_dir, yaml_files[0])
+            template_configs.extend([
+                ("specific-max-performance", [
+                    "-t", specific_template,
+                    "-c", str(concurrency),
+                    "-rate-limit", rate_limit,
+                    "-bulk-size", "50",
+                    "-headless",
+                    "-timeout", "10"
                 ]),
-                # Configuração agressiva
-                ("aggressive", [
-                    "-t", custom_templates_dir,
-                    "-c", str(cpu_count * 3),  # Concorrência = 3x CPUs
-                    "-rate-limit", "0",
+                ("specific-aggressive", [
+                    "-t", specific_template,
+                    "-c", str(aggressive_concurrency),
+                    "-rate-limit", rate_limit,
                     "-bulk-size", "100",
                     "-headless",
                     "-timeout", "5"
-                ]),
-                # Configuração padrão otimizada
-                ("optimized", [
-                    "-t", custom_templates_dir,
-                    "-c", str(cpu_count),
-                    "-rate-limit", "0",
-                    "-bulk-size", "25"
-                ]),
-                # Configuração de fallback
-                ("fallback", ["-t", custom_templates_dir])
-            ]
-            
-            # Adicionar configurações com templates específicos se houver apenas um template
-            if len(yaml_files) == 1:
-                specific_template = os.path.join(custom_templates_dir, yaml_files[0])
-                template_configs.extend([
-                    ("specific-max-performance", [
-                        "-t", specific_template,
-                        "-c", str(cpu_count * 2),
-                        "-rate-limit", "0",
-                        "-bulk-size", "50",
-                        "-headless",
-                        "-timeout", "10"
-                    ]),
-                    ("specific-aggressive", [
-                        "-t", specific_template,
-                        "-c", str(cpu_count * 3),
-                        "-rate-limit", "0",
-                        "-bulk-size", "100",
-                        "-headless",
-                        "-timeout", "5"
-                    ])
                 ])
-            
-            # Tentar cada configuração até uma funcionar
-            for config_name, template_args in template_configs:
-                print(f"NUCLEI: Tentando configuração '{config_name}'...")
-                
-                # Montar comando nuclei
-                nuclei_cmd = [nuclei_path, "-jsonl", "-l", hosts_file]
-                
-                # Adicionar templates se especificados
-                if template_args:
-                    nuclei_cmd.extend(template_args)
-                
-                print(f"NUCLEI: Comando: {' '.join(nuclei_cmd)}")
-                print(f"NUCLEI: Configuração de performance: {cpu_count} CPUs, concorrência {cpu_count * 2}")
-                
-                # Log de início do scan
-                start_time = datetime.now()
-                print(f"NUCLEI: Iniciando scan em {start_time.strftime('%H:%M:%S')}")
+            ])
+        return template_configs
+    
+    async def _run_nuclei_shard(self, scan_id: Optional[str], index: int, total_shards: int, hosts_file: str,
+                                domain: Optional[str], nuclei_path: str, custom_templates_dir: str,
+                                yaml_files: List[str], ladder: dict) -> Dict:
+        """Executa um shard de hosts percorrendo as configurações até uma funcionar"""
+        label = f"shard {index + 1}/{total_shards}"
+        with open(hosts_file, 'r', encoding='utf-8') as f:
+            hosts_count = sum(1 for line in f if line.strip())
+        
+        # Slot no orçamento de processos nuclei compartilhado por todos os scans
+        async with self.nuclei_shards.slot():
+            # Reservar fatia do orçamento global de requisições/s enquanto o shard roda
+            async with self._rate_lease("nuclei", domain) as lease:
+                rate_limit = str(lease.rate)
                 
-                # Configurar ambiente otimizado para máximo desempenho
-                env = os.environ.copy()
-                env.update({
-                    "GOMAXPROCS": str(cpu_count),  # Usar todas as CPUs
-                    "GOROUTINES": str(cpu_count * 100),  # Mais goroutines
-                    "NUCLEI_THREADS": str(cpu_count * 2),  # Threads do nuclei
-                    "NUCLEI_CONCURRENCY": str(cpu_count * 2),  # Concorrência
-                })
+                # Obter número de CPUs para otimização
+                import multiprocessing
+                cpu_count = multiprocessing.cpu_count()
+                active = self.nuclei_shards.in_use
+                concurrency = self.concurrency.tool_concurrency(2, active)
+                aggressive_concurrency = self.concurrency.tool_concurrency(3, active)
+                optimized_concurrency = self.concurrency.tool_concurrency(1, active)
+                print(f"NUCLEI: [{label}] {hosts_count} hosts, {cpu_count} CPUs disponíveis, {active} processos nuclei ativos")
                 
-                # Timeout otimizado baseado no número de hosts
-                timeout_seconds = min(300, max(60, hosts_count * 2))  # 1-5 minutos baseado no número de hosts
-                print(f"NUCLEI: Timeout configurado para {timeout_seconds} segundos")
+                template_configs = self._nuclei_template_configs(
+                    custom_templates_dir, yaml_files, rate_limit,
+                    concurrency, aggressive_concurrency, optimized_concurrency
+                )
+                # Começar pela configuração que já funcionou em outro shard
+                if ladder["preferred"]:
+                    template_configs.sort(key=lambda config: config[0] != ladder["preferred"])
                 
-                try:
-                    # Executar nuclei diretamente usando o arquivo de hosts
-                    process = await asyncio.create_subprocess_exec(
-                        *nuclei_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                        env=env,
-                        preexec_fn=lambda: os.nice(-10) if hasattr(os, 'nice') else None  # Alta prioridade se possível
-                    )
+                last_error = None
+                # Tentar cada configuração até uma funcionar
+                for config_name, template_args in template_configs:
+                    print(f"NUCLEI: [{label}] Tentando configuração '{config_name}'...")
                     
-                    try:
-                        stdout, stderr = await asyncio.wait_for(
-                            process.communicate(), 
-                            timeout=timeout_seconds
-                        )
-                    except asyncio.TimeoutError:
-                        process.kill()
-                        await process.wait()
-                        raise asyncio.TimeoutError(f"Nuclei timeout after {timeout_seconds} seconds")
+                    # Montar comando nuclei
+                    nuclei_cmd = [nuclei_path, "-jsonl", "-l", hosts_file]
+                    
+                    # Adicionar templates se especificados
+                    if template_args:
+                        nuclei_cmd.extend(template_args)
+                    
+                    print(f"NUCLEI: Comando: {' '.join(nuclei_cmd)}")
+                    print(f"NUCLEI: Configuração de performance: {cpu_count} CPUs, concorrência {concurrency}")
                     
-                    print(f"NUCLEI: Return code: {process.returncode}")
-                    stderr_content = stderr.decode().strip()
-                    if stderr_content:
-                        print(f"NUCLEI: Stderr: {stderr_content[:200]}...")
+                    # Log de início do shard
+                    start_time = datetime.now()
+                    print(f"NUCLEI: [{label}] Iniciando scan em {start_time.strftime('%H:%M:%S')}")
                     
-                    # Nuclei pode retornar 0 (sucesso) ou 1 (quando não há resultados)
-                    if process.returncode in [0, 1]:
-                        results = []
-                        output_text = stdout.decode().strip()
+                    # Configurar ambiente otimizado para máximo desempenho
+                    env = os.environ.copy()
+                    env.update({
+                        "GOMAXPROCS": str(cpu_count),  # Usar todas as CPUs
+                        "GOROUTINES": str(cpu_count * 100),  # Mais goroutines
+                        "NUCLEI_THREADS": str(concurrency),  # Threads do nuclei
+                        "NUCLEI_CONCURRENCY": str(concurrency),  # Concorrência
+                    })
+                    
+                    # Timeout baseado no número de hosts do shard
+                    timeout_seconds = min(300, max(60, hosts_count * 2))  # 1-5 minutos por shard
+                    print(f"NUCLEI: [{label}] Timeout configurado para {timeout_seconds} segundos")
+                    
+                    try:
+                        # Executar nuclei diretamente usando o arquivo de hosts
+                        process = await self._spawn(
+                            scan_id,
+                            *nuclei_cmd,
+                            env=env,
+                            preexec_fn=lambda: os.nice(-10) if hasattr(os, 'nice') else None  # Alta prioridade se possível
+                        )
                         
-                        if output_text:
-                            output_lines = output_text.split('\n')
-                            print(f"NUCLEI: Processando {len(output_lines)} linhas de saída com configuração '{config_name}'...")
-                            
-                            for line in output_lines:
-                                line = line.strip()
-                                if line and line.startswith('{'):
-                                    try:
-                                        result = json.loads(line)
-                                        results.append(result)
-                                        # Log específico para detecção de .git
-                                        if result.get('template-id') == 'git-exposure-check':
-                                            print(f"NUCLEI: ⚠️  EXPOSIÇÃO DE .GIT DETECTADA em {result.get('matched-at', 'unknown')}")
-                                    except json.JSONDecodeError:
-                                        continue
+                        try:
+                            # Em timeout o grupo inteiro do nuclei é encerrado (SIGTERM -> SIGKILL)
+                            stdout, stderr = await self._communicate(scan_id, process, timeout=timeout_seconds)
+                        except asyncio.TimeoutError:
+                            raise asyncio.TimeoutError(f"Nuclei timeout after {timeout_seconds} seconds")
                         
-                        # Calcular tempo de execução
-                        end_time = datetime.now()
-                        execution_time = (end_time - start_time).total_seconds()
-                        hosts_per_second = hosts_count / execution_time if execution_time > 0 else 0
+                        print(f"NUCLEI: [{label}] Return code: {process.returncode}")
+                        stderr_content = stderr.decode().strip()
+                        if stderr_content:
+                            print(f"NUCLEI: Stderr: {stderr_content[:200]}...")
                         
-                        print(f"NUCLEI: Encontradas {len(results)} vulnerabilidades com configuração '{config_name}'")
-                        print(f"NUCLEI: Performance: {execution_time:.1f}s, {hosts_per_second:.1f} hosts/s, {len(results)} resultados")
+                        # Nuclei pode retornar 0 (sucesso) ou 1 (quando não há resultados)
+                        if process.returncode in [0, 1]:
+                            results = []
+                            # Linhas em bytes vão direto ao parser, sem decodificar a saída inteira antes
+                            output_lines = stdout.strip().splitlines()
+                            
+                            if output_lines:
+                                print(f"NUCLEI: [{label}] Processando {len(output_lines)} linhas de saída com configuração '{config_name}'...")
+                                
+                                for line in output_lines:
+                                    line = line.strip()
+                                    if line and line.startswith(b'{'):
+                                        try:
+                                            result = jsonio.loads(line)
+                                            results.append(result)
+                                            # Log específico para detecção de .git
+                                            if result.get('template-id') == 'git-exposure-check':
+                                                print(f"NUCLEI: ⚠️  EXPOSIÇÃO DE .GIT DETECTADA em {result.get('matched-at', 'unknown')}")
+                                        except jsonio.JSONDecodeError:
+                                            continue
+                            
+                            execution_time = (datetime.now() - start_time).total_seconds()
+                            print(f"NUCLEI: [{label}] {len(results)} vulnerabilidades em {execution_time:.1f}s com configuração '{config_name}'")
+                            
+                            if not ladder["preferred"]:
+                                ladder["preferred"] = config_name
+                            return {"status": "success", "results": results, "config_used": config_name}
                         
-                        # Limpar arquivo temporário se foi criado por nós
-                        if cleanup_file and os.path.exists(hosts_file):
-                            try:
-                                os.unlink(hosts_file)
-                            except:
-                                pass
+                        elif process.returncode == 2:
+                            print(f"NUCLEI: [{label}] Configuração '{config_name}' falhou com return code 2 (template não encontrado), tentando próxima...")
+                            last_error = f"'{config_name}' returned 2"
+                            continue  # Tentar próxima configuração
                         
-                        return {"status": "success", "results": results, "config_used": config_name, "performance": {
-                            "execution_time": execution_time,
-                            "hosts_per_second": hosts_per_second,
-                            "hosts_scanned": hosts_count,
-                            "results_found": len(results)
-                        }}
-                    
-                    elif process.returncode == 2:
-                        print(f"NUCLEI: Configuração '{config_name}' falhou com return code 2 (template não encontrado), tentando próxima...")
-                        continue  # Tentar próxima configuração
-                    
-                    elif process.returncode == 1:
-                        # Return code 1 pode significar "não há resultados" ou erro
-                        if stderr_content and ("no templates found" in stderr_content.lower() or "template" in stderr_content.lower()):
-                            print(f"NUCLEI: Configuração '{config_name}' falhou - problema com templates, tentando próxima...")
-                            continue
                         else:
-                            # Pode ser que não há vulnerabilidades encontradas, mas o comando funcionou
-                            end_time = datetime.now()
-                            execution_time = (end_time - start_time).total_seconds()
-                            hosts_per_second = hosts_count / execution_time if execution_time > 0 else 0
+                            print(f"NUCLEI: [{label}] Configuração '{config_name}' falhou com return code {process.returncode}")
+                            error_output = stderr_content[:500] if stderr_content else "No error output"
+                            print(f"NUCLEI: Error output: {error_output}")
+                            last_error = f"'{config_name}' returned {process.returncode}: {error_output}"
+                            continue  # Tentar próxima configuração
                             
-                            print(f"NUCLEI: Configuração '{config_name}' executou com sucesso (return code 1 - sem vulnerabilidades)")
-                            print(f"NUCLEI: Performance: {execution_time:.1f}s, {hosts_per_second:.1f} hosts/s, 0 resultados")
-                            
-                            return {"status": "success", "results": [], "config_used": config_name, "performance": {
-                                "execution_time": execution_time,
-                                "hosts_per_second": hosts_per_second,
-                                "hosts_scanned": hosts_count,
-                                "results_found": 0
-                            }}
-                    
-                    else:
-                        print(f"NUCLEI: Configuração '{config_name}' falhou com return code {process.returncode}")
-                        error_output = stderr_content[:500] if stderr_content else "No error output"
-                        print(f"NUCLEI: Error output: {error_output}")
-                        continue  # Tentar próxima configuração
-                        
-                except asyncio.TimeoutError:
-                    print(f"NUCLEI: Timeout na configuração '{config_name}', tentando próxima...")
-                    continue
-                except Exception as e:
-                    print(f"NUCLEI: Erro na configuração '{config_name}': {e}")
-                    continue
-            
-            # Se chegou aqui, todas as configurações falharam
-            error_msg = f"All nuclei configurations failed. Tried {len(template_configs)} configurations. Check if nuclei is properly installed and templates are valid."
-            print(f"NUCLEI: {error_msg}")
-            print(f"NUCLEI: Nuclei path: {nuclei_path}")
-            print(f"NUCLEI: Templates directory: {custom_templates_dir}")
-            print(f"NUCLEI: Available templates: {yaml_files}")
-            
-            # Limpar arquivo temporário se foi criado por nós
-            if cleanup_file and os.path.exists(hosts_file):
-                try:
-                    os.unlink(hosts_file)
-                except:
-                    pass
-            
-            return {"status": "error", "error": error_msg}
+                    except asyncio.TimeoutError as e:
+                        print(f"NUCLEI: [{label}] Timeout na configuração '{config_name}', tentando próxima...")
+                        last_error = str(e)
+                        continue
+                    except Exception as e:
+                        print(f"NUCLEI: [{label}] Erro na configuração '{config_name}': {e}")
+                        last_error = str(e)
+                        continue
                 
-        except Exception as e:
-            print(f"NUCLEI: Exception - {str(e)}")
-            return {"status": "error", "error": str(e)}
+                return {"status": "error", "error": last_error or "All nuclei configurations failed",
+                        "configs_tried": len(template_configs)}
     
     async def _run_scan_pipeline(self, target_id: int, target: str, db_session_data: dict):
         """Pipeline de scan corrigido e simplificado"""
@@ -866,9 +1312,13 @@ class HawksScanner:
             self.scan_jobs[scan_id]["status"] = "running"
             self.scan_jobs[scan_id]["progress"] = []
         
-        # Criar nova sessão de banco para este scan
+        # Criar nova sessão de banco para este scan, com conexão própria obtida fora do event loop
         from .database import HawksTarget as HawksTargetDB
-        db = SessionLocal()
+        # Sem expirar no commit: as configurações lidas no início não voltam ao banco entre estágios
+        db = await open_session(expire_on_commit=False)
+        
+        # Artefatos entre estágios ficam no workspace do scan (removido ao final do scan)
+        workspace = self._workspace(scan_id)
         
         # Obter configurações do banco de dados
         settings = db.query(HawksSettingsDB).filter(HawksSettingsDB.id == 1).first()
@@ -885,107 +1335,152 @@ class HawksScanner:
                 target_obj.scan_status = "running"
                 db.commit()
             
-            # 1. SUBFINDER
-            if self._should_stop(scan_id):
-                return
-                
-            print(f"🔍 {scan_id}: Executando Subfinder...")
-            subfinder_result = await self.run_subfinder(target)
-            
-            # Salvar resultado do subfinder
-            scan_result = HawksScanResult(
-                target_id=target_id,
-                scan_type="subfinder",
-                status="success" if subfinder_result["status"] == "success" else "error",
-                result_data=json.dumps(subfinder_result),
-                error_msg=subfinder_result.get("error")
-            )
-            db.add(scan_result)
+            # Checkpoints: retomar do último estágio concluído ou recomeçar do zero
+            if not db_session_data.get("resume", True):
+                self._clear_checkpoints(db, target_id)
+            checkpoints = self._load_checkpoints(db, target_id)
+            # Encerrar a transação de leitura: o scan não fica com uma transação aberta
+            # enquanto espera slot de estágio ou as ferramentas rodam
             db.commit()
             
+            # 1. ENUMERAÇÃO (subfinder + chaos em paralelo)
             if self._should_stop(scan_id):
                 return
+            dns_stats = None
+            
+            async with self._stage_slot(scan_id, STAGE_ENUMERATION):
+                # Fontes passivas independentes: rodam juntas e cada saída entra no conjunto ao terminar
+                sources = {"subfinder": lambda: self.run_subfinder(target, scan_id=scan_id)}
+                if settings and settings.chaos_enabled and settings.chaos_api_key:
+                    sources["chaos"] = lambda: self.run_chaos(target, settings.chaos_api_key, scan_id=scan_id)
                 
-            # 2. HTTPX - usar arquivo do subfinder se disponível
-            print(f"🌐 {scan_id}: Executando HTTPX...")
-            subfinder_file = subfinder_result.get("output_file")
-            all_subdomains = subfinder_result.get("subdomains", [])
-            
-            # Chaos (se API key disponível e ativado)
-            if settings and settings.chaos_enabled and settings.chaos_api_key and not self._should_stop(scan_id):
-                chaos_result = await self.run_chaos(target, settings.chaos_api_key)
-                scan_result = HawksScanResult(
-                    target_id=target_id,
-                    scan_type="chaos",
-                    status="success" if chaos_result["status"] == "success" else "error",
-                    result_data=json.dumps(chaos_result),
-                    error_msg=chaos_result.get("error")
-                )
-                db.add(scan_result)
-                db.commit()
+                enumeration = HawksSubdomainSet()
+                for source in list(sources):
+                    if source in checkpoints:
+                        print(f"♻️ {scan_id}: Retomando - {source.title()} já concluído")
+                        if checkpoints[source].get("status") == "success":
+                            enumeration.add(source, checkpoints[source].get("subdomains", []))
+                        del sources[source]
                 
-                if chaos_result["status"] == "success":
-                    chaos_subdomains = chaos_result.get("subdomains", [])
-                    if chaos_subdomains:
-                        all_subdomains.extend(chaos_subdomains)
-                        all_subdomains = list(set(all_subdomains))
-                        
-                        # Se temos arquivo do subfinder, adicionar chaos domains ao arquivo
-                        if subfinder_file and os.path.exists(subfinder_file):
-                            with open(subfinder_file, 'a', encoding='utf-8') as f:
-                                for domain in chaos_subdomains:
-                                    if domain not in subfinder_result.get("subdomains", []):
-                                        f.write(f"\n{domain}")
-                            print(f"CHAOS: Adicionados {len(chaos_subdomains)} domínios ao arquivo do subfinder")
+                async def run_source(source):
+                    stage_start = time.monotonic()
+                    result = await sources[source]()
+                    self.concurrency.record_stage(source, time.monotonic() - stage_start, len(result.get("subdomains", [])))
+                    return source, result
+                
+                if sources:
+                    print(f"🔍 {scan_id}: Executando {', '.join(name.title() for name in sources)}...")
+                tasks = [asyncio.create_task(run_source(source)) for source in sources]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        source, result = await next_done
+                        if result["status"] == "success":
+                            result["contribution"] = enumeration.add(source, result.get("subdomains", []))
+                        scan_result = self._save_stage_result(db, target_id, source, result)
+                        if result["status"] == "success":
+                            self._save_checkpoint(db, target_id, source, result_id=scan_result.id)
+                finally:
+                    # Erro ou cancelamento do scan: não deixar fontes rodando sozinhas
+                    for task in tasks:
+                        task.cancel()
+                workspace.remove("subfinder.txt")
+                
+                if self._should_stop(scan_id):
+                    return
+                
+                all_subdomains = enumeration.names()
+                contributions = enumeration.contributions()
+                print(f"🔗 {scan_id}: {len(all_subdomains)} subdomínios únicos (" + ", ".join(
+                    f"{source}: {stats['found']} encontrados, {stats['unique']} exclusivos"
+                    for source, stats in contributions.items()
+                ) + ")")
+                subdomains_file = None
+                if "httpx" not in checkpoints:
+                    subdomains_file = workspace.write_lines("subdomains.txt", all_subdomains)
+            
+            # Pré-filtro DNS: nomes que não resolvem não gastam o timeout do httpx. Roda fora do slot
+            # de enumeração (o resolvedor tem limite de consultas próprio), que fica livre para outros targets
+            if self.dns_resolver and "httpx" not in checkpoints and not self._should_stop(scan_id):
+                print(f"🧭 {scan_id}: Resolvendo {len(all_subdomains)} subdomínios...")
+                stage_start = time.monotonic()
+                dns_result = await self.run_dns_prefilter(all_subdomains, domain=target, scan_id=scan_id)
+                self.concurrency.record_stage("dns", time.monotonic() - stage_start, len(all_subdomains))
+                if dns_result["status"] == "success":
+                    all_subdomains = dns_result["subdomains"]
+                    dns_stats = dns_result["stats"]
+                    if subdomains_file:
+                        workspace.write_lines("subdomains.txt", all_subdomains)
             
             if self._should_stop(scan_id):
                 return
-                
-            # HTTPX - priorizar arquivo do subfinder
-            if subfinder_file and os.path.exists(subfinder_file):
-                print("PIPELINE: Usando arquivo do subfinder para HTTPX")
-                httpx_result = await self.run_httpx(subfinder_file=subfinder_file)
+            
+            # 2. HTTPX - priorizar arquivo de subdomínios do workspace
+            if "httpx" in checkpoints:
+                print(f"♻️ {scan_id}: Retomando - HTTPX já concluído")
+                httpx_result = checkpoints["httpx"]
             else:
-                print("PIPELINE: Usando lista de subdomínios para HTTPX")
-                httpx_result = await self.run_httpx(subdomains=all_subdomains)
-            scan_result = HawksScanResult(
-                target_id=target_id,
-                scan_type="httpx",
-                status="success" if httpx_result["status"] == "success" else "error",
-                result_data=json.dumps(httpx_result),
-                error_msg=httpx_result.get("error")
-            )
-            db.add(scan_result)
-            db.commit()
+                async with self._stage_slot(scan_id, STAGE_PROBING):
+                    print(f"🌐 {scan_id}: Executando HTTPX...")
+                    stage_start = time.monotonic()
+                    if subdomains_file and os.path.exists(subdomains_file):
+                        print("PIPELINE: Usando arquivo de subdomínios para HTTPX")
+                        httpx_result = await self.run_httpx(subfinder_file=subdomains_file, domain=target, scan_id=scan_id)
+                    else:
+                        print("PIPELINE: Usando lista de subdomínios para HTTPX")
+                        httpx_result = await self.run_httpx(subdomains=all_subdomains, domain=target, scan_id=scan_id)
+                    self.concurrency.record_stage("httpx", time.monotonic() - stage_start, len(all_subdomains))
+                # Subdomínios já foram consumidos pelo HTTPX: liberar espaço do workspace
+                workspace.remove("subdomains.txt")
+                httpx_result["enumeration"] = {"merged": len(all_subdomains), "sources": contributions}
+                if dns_stats:
+                    httpx_result["dns"] = dns_stats
+                scan_result = self._save_stage_result(db, target_id, "httpx", httpx_result)
+                if httpx_result["status"] == "success":
+                    self._save_checkpoint(db, target_id, "httpx", result_id=scan_result.id)
             
             if self._should_stop(scan_id):
                 return
             
-            # Nuclei - usar templates custom salvos fisicamente
+            # 3. Nuclei - usar templates custom salvos fisicamente
+            nuclei_result = None
             if httpx_result["status"] == "success" and not self._should_stop(scan_id):
                 # Usar arquivo de saída do HTTPX diretamente
-                httpx_output_file = httpx_result.get("output_file")
-                nuclei_result = await self.run_nuclei(httpx_output_file=httpx_output_file, live_hosts=httpx_result.get("live_hosts", []))
-                scan_result = HawksScanResult(
-                    target_id=target_id,
-                    scan_type="nuclei",
-                    status="success" if nuclei_result["status"] == "success" else "error",
-                    result_data=json.dumps(nuclei_result),
-                    error_msg=nuclei_result.get("error")
-                )
-                db.add(scan_result)
-                db.commit()
-                
-                # Limpar arquivo temporário do HTTPX após uso do Nuclei
-                if httpx_output_file and os.path.exists(httpx_output_file):
-                    try:
-                        os.unlink(httpx_output_file)
-                    except:
-                        pass
+                httpx_output_file = workspace.artifact("live_hosts.txt")
+                async with self._stage_slot(scan_id, STAGE_VULNERABILITY):
+                    stage_start = time.monotonic()
+                    nuclei_result = await self.run_nuclei(
+                        httpx_output_file=httpx_output_file,
+                        live_hosts=httpx_result.get("live_hosts", []),
+                        domain=target,
+                        scan_id=scan_id,
+                        completed_shards=checkpoints["nuclei_shards"],
+                        # Cada shard concluído vira checkpoint: um nuclei interrompido não recomeça do zero
+                        on_shard_done=lambda shard_key, results: self._save_checkpoint(
+                            db, target_id, "nuclei_shard", shard_key=shard_key, data=results
+                        )
+                    )
+                    self.concurrency.record_stage("nuclei", time.monotonic() - stage_start, len(httpx_result.get("live_hosts", [])))
+                scan_result = self._save_stage_result(db, target_id, "nuclei", nuclei_result)
+                if nuclei_result["status"] == "success":
+                    # Achados repetidos viram updates no store; os que sumiram ficam resolvidos
+                    failed_shards = nuclei_result.get("performance", {}).get("failed_shards")
+                    stats = ingest_findings(
+                        db, target_id, nuclei_result.get("results", []),
+                        seen_at=scan_result.started_at, result_id=scan_result.id,
+                        resolve_missing=not failed_shards
+                    )
+                    print(f"🔎 {scan_id}: Achados - {stats['new']} novos, {stats['updated']} repetidos, {stats['resolved']} resolvidos")
             
             # Finalizar scan com sucesso
             status = "stopped" if self._should_stop(scan_id) else "completed"
             
+            # Scan completo: checkpoints só ficam se o nuclei falhou ou deixou shards pendentes
+            nuclei_incomplete = nuclei_result is not None and (
+                nuclei_result["status"] != "success" or nuclei_result.get("performance", {}).get("failed_shards")
+            )
+            if status == "completed" and not nuclei_incomplete:
+                self._clear_checkpoints(db, target_id)
+            
             if scan_id in self.scan_jobs:
                 self.scan_jobs[scan_id]["status"] = status
                 
@@ -1016,7 +1511,14 @@ class HawksScanner:
                 pass
                 
         finally:
-            # Sempre fechar sessão do banco
-            db.close()
+            # Sempre fechar sessão do banco (e devolver a conexão ao pool)
+            close_session(db)
+
+hawks_scanner: Optional[HawksScanner] = None
 
-hawks_scanner = HawksScanner()
+def get_hawks_scanner() -> HawksScanner:
+    """Instância global criada no primeiro uso (normalmente no lifespan da aplicação)"""
+    global hawks_scanner
+    if hawks_scanner is None:
+        hawks_scanner = HawksScanner()
+    return hawks_scanner
@@ -0,0 +1,160 @@
+import asyncio
+import calendar
+import hashlib
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import hawks_config
+from .database import HawksScanSchedule, HawksTarget, SessionLocal, open_session, close_session
+from .scan_queue import PRIORITY_SCHEDULED
+
+
+def schedule_offset(schedule_id: int, target_id: int, interval: int) -> int:
+    """Posição estável do target dentro do período (espalha os targets pelo período inteiro)"""
+    digest = hashlib.sha1(f"{schedule_id}:{target_id}".encode("utf-8")).hexdigest()
+    return int(digest[:12], 16) % interval
+
+
+def last_due_time(schedule_id: int, target_id: int, interval: int, jitter: float, now: float) -> float:
+    """Momento (epoch) em que o target ficou devido pela última vez até `now`.
+
+    Cada período tem um jitter próprio, derivado do hash e portanto igual entre
+    reinícios, para que targets com o mesmo offset não acordem sempre juntos.
+    """
+    offset = schedule_offset(schedule_id, target_id, interval)
+    max_jitter = min(max(jitter, 0.0), 0.5) * interval
+    slot = int((now - offset) // interval)
+    for period in (slot, slot - 1):
+        due = period * interval + offset + random.Random(f"{schedule_id}:{target_id}:{period}").random() * max_jitter
+        if due <= now:
+            return due
+    # Inalcançável com jitter <= metade do período
+    return (slot - 1) * interval + offset
+
+
+class HawksScheduler:
+    """Scans recorrentes executados dentro do processo, com carga distribuída.
+
+    A cada tick as agendas são avaliadas e os targets cujo horário (offset por
+    hash + jitter dentro do período) já passou desde o último scan entram na fila
+    com prioridade de agendamento. Targets já na fila ou rodando são pulados e o
+    total enfileirado nunca passa de `max_backlog`: o restante fica para os
+    próximos ticks, então os workers recebem um fluxo constante em vez de picos.
+    """
+
+    def __init__(self, tick_seconds: int = 60, max_backlog: int = 50, jitter: float = 0.1):
+        self.tick_seconds = max(1, tick_seconds)
+        self.max_backlog = max_backlog
+        self.jitter = jitter
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {"ticks": 0, "enqueued": 0, "skipped_busy": 0, "deferred_backlog": 0,
+                      "last_tick": None, "last_due": 0, "error": None}
+
+    def start(self):
+        if hawks_config.scheduler_enabled and self.task is None:
+            self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["error"] = str(e)
+                print(f"⚠️ Erro no agendador de scans: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+    def collect_due(self, now: float) -> List[dict]:
+        """Targets devidos de todas as agendas ativas, do mais atrasado para o mais recente"""
+        db = SessionLocal()
+        try:
+            due = {}
+            for schedule in db.query(HawksScanSchedule).filter(HawksScanSchedule.enabled == True).all():  # noqa: E712
+                interval = max(1, schedule.interval_hours) * 3600
+                query = db.query(HawksTarget.id, HawksTarget.domain_ip, HawksTarget.group_name, HawksTarget.last_scan)
+                if schedule.target_id is not None:
+                    query = query.filter(HawksTarget.id == schedule.target_id)
+                elif schedule.group_name:
+                    query = query.filter(HawksTarget.group_name == schedule.group_name)
+                for target_id, domain, group, last_scan in query:
+                    due_at = last_due_time(schedule.id, target_id, interval, self.jitter, now)
+                    # last_scan é marcado ao enfileirar: um scan (agendado ou manual) depois do horário conta
+                    if last_scan is not None and calendar.timegm(last_scan.utctimetuple()) >= due_at:
+                        continue
+                    # Um target em várias agendas entra uma vez, pela que está mais atrasada
+                    if target_id not in due or due_at < due[target_id]["due_at"]:
+                        due[target_id] = {"target_id": target_id, "domain": domain, "group": group,
+                                          "due_at": due_at, "schedule_id": schedule.id,
+                                          "resume": schedule.mode != "restart"}
+            return sorted(due.values(), key=lambda item: item["due_at"])
+        finally:
+            db.close()
+
+    async def run_tick(self, now: float = None) -> Dict[str, int]:
+        from .scanner import get_hawks_scanner
+
+        scanner = get_hawks_scanner()
+        now = now or time.time()
+        # Consultas fora do event loop: com muitos targets o cálculo de horários não é trivial
+        due = await asyncio.to_thread(self.collect_due, now)
+
+        result = {"due": len(due), "enqueued": 0, "skipped_busy": 0, "deferred_backlog": 0}
+        capacity = max(0, self.max_backlog - scanner.scan_queue.qsize()) if self.max_backlog else len(due)
+        enqueued_schedules = set()
+        db = await open_session()
+        try:
+            for item in due:
+                if scanner.scan_queue.get_job(item["target_id"]) or f"scan_{item['target_id']}" in scanner.active_scans:
+                    result["skipped_busy"] += 1
+                    continue
+                if result["enqueued"] >= capacity:
+                    result["deferred_backlog"] += 1
+                    continue
+                await scanner.scan_target(item["target_id"], item["domain"], db, priority=PRIORITY_SCHEDULED,
+                                          group=item["group"], resume=item["resume"])
+                result["enqueued"] += 1
+                enqueued_schedules.add(item["schedule_id"])
+            if enqueued_schedules:
+                db.query(HawksScanSchedule).filter(HawksScanSchedule.id.in_(enqueued_schedules)).update(
+                    {HawksScanSchedule.last_enqueued_at: datetime.utcnow()}, synchronize_session=False
+                )
+                db.commit()
+        finally:
+            close_session(db)
+
+        self.stats["ticks"] += 1
+        self.stats["last_tick"] = datetime.utcnow().isoformat()
+        self.stats["last_due"] = result["due"]
+        for key in ("enqueued", "skipped_busy", "deferred_backlog"):
+            self.stats[key] += result[key]
+        if result["enqueued"]:
+            print(f"⏰ Agendador: {result['enqueued']} scans enfileirados, {result['deferred_backlog']} aguardando espaço na fila")
+        return result
+
+    def status(self) -> Dict:
+        return {
+            "running": self.task is not None,
+            "tick_seconds": self.tick_seconds,
+            "max_backlog": self.max_backlog,
+            "jitter": self.jitter,
+            **self.stats,
+        }
+
+
+hawks_scheduler = HawksScheduler(
+    hawks_config.scheduler_tick_seconds,
+    hawks_config.scheduler_max_backlog,
+    hawks_config.scheduler_jitter
+)
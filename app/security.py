@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import jwt
+
+
+class HawksTokenCache:
+    """LRU de tokens JWT já verificados, válidos até o `exp` de cada um.
+
+    Evita decodificar e verificar a assinatura a cada request (inclusive os
+    pollings da interface). Só tokens válidos entram no cache, então tokens
+    inventados não conseguem expulsar as sessões reais.
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # {token: (usuário, exp)}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, token: str) -> Optional[str]:
+        cached = self.entries.get(token)
+        if cached is None:
+            self.stats["misses"] += 1
+            return None
+        username, expires_at = cached
+        if expires_at <= self.clock():
+            del self.entries[token]
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(token)
+        self.stats["hits"] += 1
+        return username
+
+    def put(self, token: str, username: str, expires_at: float):
+        if not self.max_entries:
+            return
+        self.entries[token] = (username, expires_at)
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard(self, token: str):
+        self.entries.pop(token, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def decode_token(token: str, secret_key: str, cache: Optional[HawksTokenCache] = None) -> Optional[str]:
+    """Usuário do token (None se inválido ou expirado), consultando o cache antes do jwt"""
+    if cache is not None:
+        username = cache.get(token)
+        if username is not None:
+            return username
+    try:
+        payload = jwt.decode(token, secret_key, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+    # Sem exp o token não expira sozinho: não fica em cache
+    if cache is not None and isinstance(payload.get("exp"), (int, float)):
+        cache.put(token, username, payload["exp"])
+    return username
+
+
+class HawksLoginLimiter:
+    """Limite de tentativas de login por IP com custo O(1) por operação.
+
+    As entradas ficam num OrderedDict ordenado pela última tentativa: cada
+    falha move o IP para o fim, e as entradas vencidas são descartadas a partir
+    do início conforme as próximas chamadas passam (expiração preguiçosa).
+    """
+
+    def __init__(self, max_attempts: int = 5, window: float = 900, max_entries: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self.attempts: "OrderedDict[str, list]" = OrderedDict()  # {ip: [falhas, última tentativa]}
+
+    def _expire(self, now: float, budget: int = 8):
+        # Limpa no máximo `budget` entradas por chamada para manter o custo constante
+        while budget and self.attempts:
+            ip, (count, last_attempt) = next(iter(self.attempts.items()))
+            if now - last_attempt <= self.window:
+                break
+            del self.attempts[ip]
+            budget -= 1
+
+    def is_limited(self, ip_address: str) -> bool:
+        now = self.clock()
+        self._expire(now)
+        entry = self.attempts.get(ip_address)
+        if entry is None:
+            return False
+        count, last_attempt = entry
+        if now - last_attempt > self.window:
+            del self.attempts[ip_address]
+            return False
+        return count >= self.max_attempts
+
+    def record_failure(self, ip_address: str):
+        now = self.clock()
+        self._expire(now)
+        entry = self.attempts.pop(ip_address, None)
+        if entry is None or now - entry[1] > self.window:
+            entry = [0, now]
+        entry[0] += 1
+        entry[1] = now
+        self.attempts[ip_address] = entry
+        # Rajadas de IPs distintos não crescem sem limite: sai quem está há mais tempo sem tentar
+        while len(self.attempts) > self.max_entries:
+            self.attempts.popitem(last=False)
+
+    def reset(self, ip_address: str):
+        self.attempts.pop(ip_address, None)
+
+    def status(self) -> Dict:
+        return {"tracked_ips": len(self.attempts), "max_attempts": self.max_attempts, "window": self.window}
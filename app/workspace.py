@@ -0,0 +1,225 @@
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WORKSPACE_DIRNAME = "hawks-workspaces"
+TMPFS_PATH = "/dev/shm"
+
+# Arquivos deixados por versões que usavam tempfile.mktemp direto em /tmp
+LEGACY_TEMP_PATTERNS = ("tmp*_subfinder.txt", "tmp*_httpx.txt", "tmp*_httpx_input.txt")
+LEGACY_TEMP_MAX_AGE = 24 * 3600
+# Intervalo entre medições do workspace enquanto uma ferramenta escreve nele
+QUOTA_POLL_SECONDS = 0.25
+
+# Processo intermediário que aplica RLIMIT_FSIZE e faz exec da ferramenta. Um preexec_fn
+# faria o mesmo, mas roda entre o fork e o exec e não é seguro com outras threads ativas
+# (asyncio.to_thread). SIGPIPE/SIGXFSZ voltam ao padrão, que o interpretador ignora ao iniciar
+FSIZE_EXEC = (
+    "import os, resource, signal, sys\n"
+    "limit = int(sys.argv[1])\n"
+    "hard = resource.getrlimit(resource.RLIMIT_FSIZE)[1]\n"
+    "if hard != resource.RLIM_INFINITY:\n"
+    "    limit = min(limit, hard)\n"
+    "resource.setrlimit(resource.RLIMIT_FSIZE, (limit, limit))\n"
+    "signal.signal(signal.SIGPIPE, signal.SIG_DFL)\n"
+    "signal.signal(signal.SIGXFSZ, signal.SIG_DFL)\n"
+    "try:\n"
+    "    os.execvp(sys.argv[2], sys.argv[2:])\n"
+    "except OSError as e:\n"
+    "    sys.exit(f'{sys.argv[2]}: {e}')\n"
+)
+
+
+def fsize_limited_command(cmd: Iterable[str], limit: int) -> List[str]:
+    """Comando que executa `cmd` sem poder gravar arquivos maiores que `limit` bytes (inalterado sem RLIMIT_FSIZE)"""
+    if resource is None or not limit:
+        return list(cmd)
+    return [sys.executable, "-S", "-c", FSIZE_EXEC, str(limit), *cmd]
+
+
+class HawksWorkspaceQuotaError(Exception):
+    """Artefatos do scan ultrapassaram a cota do workspace"""
+
+
+class HawksWorkspace:
+    """Diretório exclusivo de um scan com os artefatos produzidos por cada estágio"""
+
+    def __init__(self, scan_id: str, path: str, quota_bytes: int):
+        self.scan_id = scan_id
+        self.path = path
+        self.quota_bytes = quota_bytes
+        self.artifacts: Dict[str, str] = {}  # {nome: caminho}
+        self.created_at = time.time()
+
+    def file(self, name: str) -> str:
+        """Caminho de um artefato do workspace; fica registrado para os próximos estágios"""
+        path = os.path.join(self.path, name)
+        self.artifacts[name] = path
+        return path
+
+    def artifact(self, name: str) -> Optional[str]:
+        """Caminho de um artefato já produzido (None se não existir)"""
+        path = self.artifacts.get(name)
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    def write_lines(self, name: str, lines: Iterable[str]) -> str:
+        path = self.file(name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(f"{line}\n")
+        self.check_quota()
+        return path
+
+    def remove(self, name: str):
+        """Descarta um artefato que nenhum estágio seguinte vai usar"""
+        path = self.artifacts.pop(name, None)
+        if path and os.path.exists(path):
+            os.unlink(path)
+
+    def usage(self) -> int:
+        total = 0
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            pass
+        return total
+
+    def quota_error(self) -> Optional[str]:
+        """Mensagem de erro se os artefatos passaram da cota (None se estão dentro)"""
+        if not self.quota_bytes:
+            return None
+        used = self.usage()
+        # Um arquivo nunca passa da cota (RLIMIT_FSIZE das ferramentas): atingi-la já é estouro
+        if used >= self.quota_bytes:
+            return f"Workspace quota exceeded for {self.scan_id}: {used} bytes used, quota {self.quota_bytes}"
+        return None
+
+    def check_quota(self):
+        error = self.quota_error()
+        if error:
+            raise HawksWorkspaceQuotaError(error)
+
+    def status(self) -> dict:
+        return {
+            "path": self.path,
+            "artifacts": sorted(self.artifacts.keys()),
+            "bytes": self.usage(),
+            "quota_bytes": self.quota_bytes,
+        }
+
+
+class HawksWorkspaceManager:
+    """Cria, limita e remove os workspaces dos scans.
+
+    Com tmpfs habilitado os workspaces ficam em /dev/shm (memória), com
+    fallback para o disco quando não há espaço livre para a cota inteira.
+    """
+
+    def __init__(self, base_dir: str = "", use_tmpfs: bool = True, quota_mb: int = 512):
+        self.quota_bytes = max(0, quota_mb) * 1024 * 1024
+        self.disk_root = os.path.join(base_dir or tempfile.gettempdir(), WORKSPACE_DIRNAME)
+        self.tmpfs_root = None
+        if use_tmpfs and not base_dir and os.path.isdir(TMPFS_PATH) and os.access(TMPFS_PATH, os.W_OK):
+            self.tmpfs_root = os.path.join(TMPFS_PATH, WORKSPACE_DIRNAME)
+        self.workspaces: Dict[str, HawksWorkspace] = {}
+
+    def _pick_root(self) -> str:
+        if self.tmpfs_root:
+            try:
+                os.makedirs(self.tmpfs_root, mode=0o700, exist_ok=True)
+                if shutil.disk_usage(self.tmpfs_root).free >= self.quota_bytes:
+                    return self.tmpfs_root
+            except OSError:
+                pass
+        os.makedirs(self.disk_root, mode=0o700, exist_ok=True)
+        return self.disk_root
+
+    def create(self, scan_id: str) -> HawksWorkspace:
+        """Workspace do scan (criado na primeira chamada)"""
+        workspace = self.workspaces.get(scan_id)
+        if workspace:
+            return workspace
+        # O pid no nome permite ao sweep distinguir workspaces de outros processos vivos
+        path = os.path.join(self._pick_root(), f"{os.getpid()}-{scan_id}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(path, mode=0o700)
+        workspace = HawksWorkspace(scan_id, path, self.quota_bytes)
+        self.workspaces[scan_id] = workspace
+        return workspace
+
+    def get(self, scan_id: str) -> Optional[HawksWorkspace]:
+        return self.workspaces.get(scan_id)
+
+    def release(self, scan_id: str):
+        """Remove o workspace e todos os artefatos do scan"""
+        workspace = self.workspaces.pop(scan_id, None)
+        if workspace:
+            shutil.rmtree(workspace.path, ignore_errors=True)
+
+    def release_all(self):
+        for scan_id in list(self.workspaces.keys()):
+            self.release(scan_id)
+
+    def sweep_orphans(self) -> int:
+        """Remove workspaces de processos que morreram sem limpar (e sobras antigas de /tmp)"""
+        removed = 0
+        active = {workspace.path for workspace in self.workspaces.values()}
+        for root in filter(None, {self.tmpfs_root, self.disk_root}):
+            if not os.path.isdir(root):
+                continue
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                if path in active:
+                    continue
+                try:
+                    pid = int(name.split("-", 1)[0])
+                except ValueError:
+                    pid = None
+                if pid and pid != os.getpid() and _pid_alive(pid):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+
+        cutoff = time.time() - LEGACY_TEMP_MAX_AGE
+        for pattern in LEGACY_TEMP_PATTERNS:
+            for path in glob.glob(os.path.join(tempfile.gettempdir(), pattern)):
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def status(self) -> dict:
+        return {
+            "root": self.tmpfs_root or self.disk_root,
+            "tmpfs": bool(self.tmpfs_root),
+            "quota_bytes": self.quota_bytes,
+            "active": len(self.workspaces),
+            "bytes": sum(workspace.usage() for workspace in self.workspaces.values()),
+        }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,155 @@
+"""Teste de carga da autenticação: limite de login e verificação de token.
+
+Chama o app ASGI diretamente (sem rede) para medir o overhead por request:
+
+- rajada de logins falhos vindos de milhares de IPs distintos, comparando o
+  limitador antigo (varre todos os IPs a cada login) com o HawksLoginLimiter;
+- requests autenticados repetidos com o mesmo cookie, com e sem o cache de tokens.
+
+Uso:
+    python benchmarks/bench_auth.py --ips 5000 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="hawks-bench-")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ADMIN_USERNAME", "bench")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.chdir(ROOT)
+
+import main  # noqa: E402
+from app.security import HawksLoginLimiter, HawksTokenCache  # noqa: E402
+
+
+class LegacyLoginLimiter:
+    """Comportamento anterior: dict simples varrido inteiro a cada verificação"""
+
+    def __init__(self, max_attempts: int, window: float):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.attempts = {}
+
+    def is_limited(self, ip_address: str) -> bool:
+        now = time.time()
+        for ip in list(self.attempts.keys()):
+            if now - self.attempts[ip]["last_attempt"] > self.window:
+                del self.attempts[ip]
+        attempts = self.attempts.get(ip_address)
+        if not attempts:
+            return False
+        if attempts["count"] >= self.max_attempts:
+            if now - attempts["last_attempt"] < self.window:
+                return True
+            del self.attempts[ip_address]
+        return False
+
+    def record_failure(self, ip_address: str):
+        entry = self.attempts.setdefault(ip_address, {"count": 0, "last_attempt": time.time()})
+        entry["count"] += 1
+        entry["last_attempt"] = time.time()
+
+    def reset(self, ip_address: str):
+        self.attempts.pop(ip_address, None)
+
+
+async def asgi_request(method: str, path: str, client_ip: str = "127.0.0.1", headers=None, body: bytes = b"") -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": (client_ip, 40000), "server": ("bench", 80),
+    }
+    sent = False
+    status = {}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await main.app(scope, receive, send)
+    return status.get("code", 0)
+
+
+async def login_flood(ips: int, attempts_per_ip: int) -> dict:
+    body = urlencode({"username": "attacker", "password": "wrong"}).encode()
+    headers = {"content-type": "application/x-www-form-urlencoded", "content-length": str(len(body))}
+    codes = {}
+    latencies = []
+    for attempt in range(attempts_per_ip):
+        for i in range(ips):
+            ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+            start = time.perf_counter()
+            code = await asgi_request("POST", "/login", ip, headers, body)
+            latencies.append(time.perf_counter() - start)
+            codes[code] = codes.get(code, 0) + 1
+    # Os últimos requests pagam pelo maior número de IPs rastreados
+    tail = latencies[-1000:]
+    latencies.sort()
+    return {
+        "mean_us": sum(latencies) * 1e6 / len(latencies),
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "last_1000_us": sum(tail) * 1e6 / len(tail),
+        "codes": codes,
+    }
+
+
+async def authenticated_polling(requests: int) -> dict:
+    token = main.create_access_token({"sub": os.environ["ADMIN_USERNAME"], "iat": time.time()})
+    headers = {"cookie": f"access_token={token}"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert await asgi_request("GET", "/api/maintenance-status", headers=headers) == 200
+    total = time.perf_counter() - start
+
+    # Só a verificação, sem o resto do request
+    start = time.perf_counter()
+    for _ in range(requests):
+        main.verify_token(token)
+    verify = time.perf_counter() - start
+    return {"request_us": total * 1e6 / requests, "verify_us": verify * 1e6 / requests}
+
+
+async def run(args):
+    print(f"Rajada de login: {args.ips} IPs distintos x {args.attempts} tentativas")
+    print(f"{'':22}{'média µs':>12}{'p99 µs':>12}{'últimos 1000 µs':>18}")
+    for label, limiter in (("limitador antigo", LegacyLoginLimiter(main.RATE_LIMIT_ATTEMPTS, main.RATE_LIMIT_WINDOW)),
+                           ("HawksLoginLimiter", HawksLoginLimiter(main.RATE_LIMIT_ATTEMPTS, main.RATE_LIMIT_WINDOW))):
+        main.login_limiter = limiter
+        result = await login_flood(args.ips, args.attempts)
+        print(f"{label:22}{result['mean_us']:>12.1f}{result['p99_us']:>12.1f}{result['last_1000_us']:>18.1f}  {result['codes']}")
+
+    print(f"\nRequests autenticados: {args.requests} com o mesmo cookie")
+    print(f"{'':22}{'request µs':>12}{'verify µs':>12}")
+    for label, cache in (("sem cache", HawksTokenCache(0)), ("HawksTokenCache", HawksTokenCache(1024))):
+        main.token_cache = cache
+        result = await authenticated_polling(args.requests)
+        print(f"{label:22}{result['request_us']:>12.1f}{result['verify_us']:>12.2f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ips", type=int, default=5000, help="IPs distintos na rajada de login")
+    parser.add_argument("--attempts", type=int, default=1, help="Tentativas por IP")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests autenticados")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,148 @@
+"""Benchmark da compressão de scan_results.result_data.
+
+Mede tamanho no banco e latência de escrita/leitura com e sem compressão,
+usando saída real do nuclei (JSONL, um achado por linha) ou dados sintéticos
+com corpos de request/response quando --input não é informado.
+
+Uso:
+    python benchmarks/bench_compression.py --input nuclei-output.jsonl
+    python benchmarks/bench_compression.py --rows 200 --findings 50
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="hawks-bench-")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ADMIN_USERNAME", "bench")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+
+from sqlalchemy.orm import undefer  # noqa: E402
+
+from app.config import hawks_config  # noqa: E402
+from app.database import Base, HawksScanResult, SessionLocal, engine, compress_text  # noqa: E402
+
+
+def synthetic_findings(count: int) -> list:
+    # Páginas HTML com estrutura repetida e trechos variáveis, como respostas reais
+    def body(blocks):
+        token = lambda: "".join(random.choices(string.ascii_letters + string.digits, k=12))
+        return "".join(
+            f'<div class="item" id="{token()}"><a href="/p/{token()}">{token()}</a><span>{random.randint(0, 99999)}</span></div>\n'
+            for _ in range(blocks)
+        )
+    findings = []
+    for i in range(count):
+        host = f"https://app{i % 17}.example.com"
+        findings.append({
+            "template-id": random.choice(["git-exposure-check", "exposed-panel", "cors-misconfig"]),
+            "info": {"name": "Synthetic finding", "severity": random.choice(["info", "low", "medium", "high"])},
+            "type": "http",
+            "host": host,
+            "matched-at": f"{host}/path/{i}",
+            "request": f"GET /path/{i} HTTP/1.1\r\nHost: app{i % 17}.example.com\r\nUser-Agent: Mozilla/5.0\r\n\r\n",
+            "response": "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<html><body>" + body(40) + "</body></html>",
+            "timestamp": "2024-01-01T00:00:00Z",
+        })
+    return findings
+
+
+def load_findings(path: str) -> list:
+    findings = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("{"):
+                try:
+                    findings.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return findings
+
+
+def run(payloads: list, compressed: bool) -> dict:
+    hawks_config.result_compression = compressed
+    # Banco novo a cada rodada para o tamanho do arquivo ser comparável
+    engine.dispose()
+    db_path = os.environ["DATABASE_URL"].replace("sqlite:///", "")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    start = time.perf_counter()
+    for payload in payloads:
+        db.add(HawksScanResult(target_id=1, scan_type="nuclei", status="success", result_data=payload))
+        db.commit()
+    write_seconds = time.perf_counter() - start
+    db.close()
+
+    db = SessionLocal()
+    start = time.perf_counter()
+    rows = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).all()
+    total_chars = sum(len(row.result_data) for row in rows)
+    read_seconds = time.perf_counter() - start
+    db.close()
+
+    db = SessionLocal()
+    start = time.perf_counter()
+    listed = db.query(HawksScanResult).all()  # listagem sem payload (coluna deferred)
+    list_seconds = time.perf_counter() - start
+    db.close()
+
+    engine.dispose()
+    assert total_chars == sum(len(p) for p in payloads) and len(listed) == len(payloads)
+    return {
+        "db_bytes": os.path.getsize(db_path),
+        "write_ms_per_row": write_seconds * 1000 / len(payloads),
+        "read_ms_per_row": read_seconds * 1000 / len(payloads),
+        "list_ms_total": list_seconds * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Saída JSONL do nuclei (-jsonl)")
+    parser.add_argument("--rows", type=int, default=100, help="Linhas de scan_results gravadas")
+    parser.add_argument("--findings", type=int, default=40, help="Achados por linha (sintético ou amostrado do --input)")
+    parser.add_argument("--level", type=int, default=hawks_config.result_compression_level, help="Nível do zlib")
+    args = parser.parse_args()
+
+    hawks_config.result_compression_level = args.level
+    source = load_findings(args.input) if args.input else synthetic_findings(args.findings * 4)
+    if not source:
+        sys.exit("Nenhum achado encontrado na entrada")
+
+    payloads = []
+    for i in range(args.rows):
+        offset = (i * args.findings) % len(source)
+        results = (source[offset:] + source[:offset])[:args.findings]
+        payloads.append(json.dumps({"status": "success", "results": results}))
+
+    raw_bytes = sum(len(p.encode("utf-8")) for p in payloads)
+    stored_bytes = sum(len(compress_text(p).encode("utf-8")) for p in payloads)
+
+    print(f"Entrada: {args.input or 'sintética'} | {args.rows} linhas x {args.findings} achados | zlib nível {args.level}")
+    print(f"Payload: {raw_bytes / 1024 / 1024:.2f} MB cru -> {stored_bytes / 1024 / 1024:.2f} MB armazenado "
+          f"({raw_bytes / max(1, stored_bytes):.1f}x, -{100 - stored_bytes * 100 / raw_bytes:.1f}%)")
+
+    plain = run(payloads, compressed=False)
+    packed = run(payloads, compressed=True)
+    print(f"{'':18}{'sem compressão':>16}{'comprimido':>14}")
+    print(f"{'banco (MB)':18}{plain['db_bytes'] / 1024 / 1024:>16.2f}{packed['db_bytes'] / 1024 / 1024:>14.2f}")
+    for key, label in (("write_ms_per_row", "escrita ms/linha"), ("read_ms_per_row", "leitura ms/linha"),
+                       ("list_ms_total", "listagem ms")):
+        print(f"{label:18}{plain[key]:>16.3f}{packed[key]:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
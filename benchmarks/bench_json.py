@@ -0,0 +1,115 @@
+"""Microbenchmark da serialização JSON (app/jsonio.py) com stdlib e orjson.
+
+Mede os caminhos quentes: parse do JSONL do nuclei, json do resultado do
+estágio gravado em scan_results, leitura desse blob nas páginas e render de
+uma resposta da API. Usa saída real do nuclei (--input, JSONL) ou achados
+sintéticos com corpos de request/response.
+
+Uso:
+    python benchmarks/bench_json.py --input nuclei-output.jsonl
+    python benchmarks/bench_json.py --findings 2000 --repeat 5
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ADMIN_USERNAME", "bench")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+
+from app import jsonio  # noqa: E402
+
+
+def synthetic_jsonl(count: int) -> bytes:
+    token = lambda: "".join(random.choices(string.ascii_letters + string.digits, k=12))
+    lines = []
+    for i in range(count):
+        host = f"https://app{i % 17}.example.com"
+        body = "".join(f'<div id="{token()}"><a href="/p/{token()}">{token()}</a></div>\n' for _ in range(30))
+        lines.append(jsonio.dumps({
+            "template-id": random.choice(["git-exposure-check", "exposed-panel", "cors-misconfig"]),
+            "info": {"name": "Synthetic finding", "severity": random.choice(["info", "low", "medium", "high"]),
+                     "tags": ["exposure", "misconfig"], "reference": [f"https://example.com/ref/{i}"]},
+            "type": "http",
+            "host": host,
+            "matched-at": f"{host}/path/{i}",
+            "extracted-results": [token() for _ in range(3)],
+            "request": f"GET /path/{i} HTTP/1.1\r\nHost: app{i % 17}.example.com\r\n\r\n",
+            "response": "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<html><body>" + body + "</body></html>",
+            "curl-command": f"curl -X 'GET' '{host}/path/{i}'",
+            "timestamp": "2024-01-01T00:00:00.000000000Z",
+        }))
+    return "\n".join(lines).encode("utf-8")
+
+
+def best_of(repeat: int, fn) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(raw: bytes, repeat: int) -> dict:
+    # Mesmo fluxo do run_nuclei: linhas em bytes direto para o parser
+    lines = [line.strip() for line in raw.strip().splitlines() if line.strip().startswith(b"{")]
+    results = [jsonio.loads(line) for line in lines]
+    stage_result = {"status": "success", "results": results}
+    blob = jsonio.dumps(stage_result)
+    page = {"items": [{"id": i, "scan_type": "nuclei", "status": "success", "data": stage_result}
+                      for i in range(3)], "next_cursor": None}
+    response = jsonio.HawksJSONResponse(content=None)
+
+    return {
+        "jsonl_parse": best_of(repeat, lambda: [jsonio.loads(line) for line in lines]),
+        "result_dumps": best_of(repeat, lambda: jsonio.dumps(stage_result)),
+        "blob_loads": best_of(repeat, lambda: jsonio.loads(blob)),
+        "api_render": best_of(repeat, lambda: response.render(page)),
+        "lines": len(lines),
+        "blob_bytes": len(blob.encode("utf-8")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Saída JSONL do nuclei (-jsonl)")
+    parser.add_argument("--findings", type=int, default=1000, help="Achados sintéticos quando não há --input")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale a melhor)")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            raw = f.read()
+    else:
+        random.seed(1)
+        raw = synthetic_jsonl(args.findings)
+
+    backends = ["stdlib"] + (["orjson"] if jsonio.orjson else [])
+    measured = {}
+    for name in backends:
+        jsonio.backend = name
+        measured[name] = measure(raw, args.repeat)
+
+    sample = measured["stdlib"]
+    print(f"Entrada: {args.input or 'sintética'} | {sample['lines']} achados | blob {sample['blob_bytes'] / 1024 / 1024:.2f} MB | melhor de {args.repeat}")
+    print(f"{'':16}" + "".join(f"{name + ' ms':>14}" for name in backends) + (f"{'ganho':>10}" if len(backends) > 1 else ""))
+    for key, label in (("jsonl_parse", "parse JSONL"), ("result_dumps", "dumps resultado"),
+                       ("blob_loads", "loads blob"), ("api_render", "render API")):
+        row = f"{label:16}" + "".join(f"{measured[name][key] * 1000:>14.2f}" for name in backends)
+        if len(backends) > 1:
+            row += f"{measured['stdlib'][key] / measured['orjson'][key]:>9.1f}x"
+        print(row)
+    if len(backends) == 1:
+        print("orjson não instalado: apenas a stdlib foi medida (pip install orjson)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""Teste de carga HTTP da API e das páginas com o scanner ocupado.
+
+Sobe uma instância real do Hawks (uvicorn) num diretório temporário, com banco
+populado pelo seed_data.py e as ferramentas falsas de benchmarks/stubs no lugar
+de subfinder/httpx/nuclei, dispara um scan-all para manter a fila ocupada e
+solta N clientes simultâneos. Cada cliente faz login, mantém a sessão (cookie)
+numa conexão keep-alive e executa uma mistura configurável de operações:
+
+    queue-status    GET /api/queue-status
+    target-status   GET /api/targets/{id}/status
+    page            GET de uma das páginas de --pages
+    api             GET /api/v1/targets
+    scan            POST /targets/{id}/scan
+
+Reporta throughput, distribuição de latência e taxa de erro por operação e,
+via /api/loop-status, o atraso do event loop do servidor durante o teste,
+sinalizando travamentos (exit 1 com --fail-on-stall).
+
+Uso:
+    python benchmarks/bench_load.py --clients 20 --duration 30
+    python benchmarks/bench_load.py --mix queue-status=60,target-status=30,scan=10 --stub-latency 2
+    python benchmarks/bench_load.py --pages /dashboard,/targets,/nuclei-results --mix page=100 --clients 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "benchmarks", "stubs")
+
+DEFAULT_MIX = "queue-status=40,target-status=25,page=20,api=10,scan=5"
+DEFAULT_PAGES = "/dashboard,/targets,/nuclei-results"
+
+TEMPLATE = """id: bench-template
+info:
+  name: Bench Template
+  author: hawks
+  severity: info
+http:
+  - method: GET
+    path:
+      - "{{BaseURL}}/"
+"""
+
+
+class HttpSession:
+    """Cliente HTTP/1.1 mínimo com keep-alive e o cookie da sessão"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.cookie = ""
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, form: dict = None) -> tuple:
+        """Retorna (status, headers, corpo); reconecta se o servidor fechou a conexão"""
+        body = urlencode(form).encode() if form is not None else b""
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive",
+                   f"Content-Length: {len(body)}"]
+        if form is not None:
+            headers.append("Content-Type: application/x-www-form-urlencoded")
+        if self.cookie:
+            headers.append(f"Cookie: {self.cookie}")
+        payload = ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(payload)
+                await self.writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self) -> tuple:
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                name = name.strip().lower()
+                if name == "set-cookie" and value.strip().startswith("access_token="):
+                    self.cookie = value.strip().split(";", 1)[0]
+                headers[name] = value.strip()
+
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        else:
+            body = await self.reader.read()
+            await self.close()
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, headers, body
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip():
+            weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - {"queue-status", "target-status", "page", "api", "scan"}
+    if unknown:
+        raise SystemExit(f"Operações desconhecidas em --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_instance(args) -> tuple:
+    """Diretório de trabalho, banco populado e ambiente do servidor"""
+    workdir = tempfile.mkdtemp(prefix="hawks-load-")
+    # O app procura app/templates e app/static no cwd e o nuclei usa ./templates/custom
+    os.symlink(os.path.join(ROOT, "app"), os.path.join(workdir, "app"))
+    os.makedirs(os.path.join(workdir, "templates", "custom"))
+    with open(os.path.join(workdir, "templates", "custom", "bench.yaml"), "w") as f:
+        f.write(TEMPLATE)
+
+    env = dict(os.environ)
+    env.update({
+        "SECRET_KEY": "bench-load",
+        "ADMIN_USERNAME": "bench",
+        "ADMIN_PASSWORD": "bench",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "WORKSPACE_DIR": os.path.join(workdir, "workspaces"),
+        "TOOLS_PATH": STUBS,
+        "PYTHONPATH": ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+        "HAWKS_STUB_LATENCY": str(args.stub_latency),
+        "HAWKS_STUB_SUBDOMAINS": str(args.stub_subdomains),
+    })
+    subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "seed_data.py"),
+                    "--database-url", env["DATABASE_URL"], "--targets", str(args.targets),
+                    "--results-per-target", str(args.results_per_target)],
+                   env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return workdir, env
+
+
+async def wait_ready(port: int, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("Servidor encerrou durante a inicialização (veja server.log)")
+        session = HttpSession("127.0.0.1", port)
+        try:
+            status, _, _ = await session.request("GET", "/login")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            await session.close()
+        await asyncio.sleep(0.2)
+    raise SystemExit("Servidor não respondeu a tempo")
+
+
+async def login(port: int) -> HttpSession:
+    session = HttpSession("127.0.0.1", port)
+    status, _, _ = await session.request("POST", "/login", {"username": "bench", "password": "bench"})
+    if status != 302 or not session.cookie:
+        raise SystemExit(f"Login falhou (HTTP {status})")
+    return session
+
+
+async def client(index: int, port: int, args, weights: dict, pages: list, deadline: float, results: dict):
+    rng = random.Random(args.seed * 1000 + index)
+    operations, cumulative = list(weights), list(weights.values())
+    session = await login(port)
+    try:
+        while time.monotonic() < deadline:
+            operation = rng.choices(operations, cumulative)[0]
+            target_id = rng.randint(1, args.targets)
+            if operation == "queue-status":
+                method, path = "GET", "/api/queue-status"
+            elif operation == "target-status":
+                method, path = "GET", f"/api/targets/{target_id}/status"
+            elif operation == "page":
+                method, path = "GET", rng.choice(pages)
+            elif operation == "api":
+                method, path = "GET", "/api/v1/targets?limit=100"
+            else:
+                method, path = "POST", f"/targets/{target_id}/scan"
+
+            stats = results.setdefault(operation, {"latencies": [], "errors": 0, "statuses": {}, "bytes": 0})
+            start = time.perf_counter()
+            try:
+                status, _, body = await session.request(method, path)
+                stats["bytes"] += len(body)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                status = type(e).__name__
+            stats["latencies"].append(time.perf_counter() - start)
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+            if not isinstance(status, int) or status >= 400:
+                stats["errors"] += 1
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+    finally:
+        await session.close()
+
+
+async def loop_status(session: HttpSession) -> dict:
+    status, _, body = await session.request("GET", "/api/loop-status")
+    return json.loads(body) if status == 200 else {}
+
+
+async def run(args):
+    weights = parse_mix(args.mix)
+    pages = [page.strip() for page in args.pages.split(",") if page.strip()]
+    print(f"Preparando instância: {args.targets} targets, {args.results_per_target} resultados por target...", file=sys.stderr)
+    workdir, env = prepare_instance(args)
+    port = free_port()
+    log = open(os.path.join(workdir, "server.log"), "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    try:
+        await wait_ready(port, server)
+        admin = await login(port)
+        if args.busy:
+            # Todos os targets na fila: o scanner fica ocupado durante o teste inteiro
+            status, _, _ = await admin.request("POST", "/targets/scan-all?mode=restart")
+            print(f"scan-all: HTTP {status}", file=sys.stderr)
+        before = await loop_status(admin)
+
+        results = {}
+        samples = []
+        start = time.monotonic()
+        deadline = start + args.duration
+
+        async def sample_loop():
+            while time.monotonic() < deadline:
+                await asyncio.sleep(1)
+                _, _, body = await admin.request("GET", "/api/queue-status?limit=0")
+                queue = json.loads(body)
+                samples.append((queue.get("active_scans", 0), queue.get("queued_scans", 0)))
+
+        await asyncio.gather(
+            sample_loop(),
+            *(client(i, port, args, weights, pages, deadline, results) for i in range(args.clients))
+        )
+        elapsed = time.monotonic() - start
+        after = await loop_status(admin)
+        await admin.close()
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+
+    total = sum(len(stats["latencies"]) for stats in results.values())
+    errors = sum(stats["errors"] for stats in results.values())
+    print(f"\n{args.clients} clientes por {elapsed:.0f}s | {total} requests ({total / elapsed:.0f} req/s) | "
+          f"erros {errors} ({errors / max(1, total):.1%})")
+    if samples:
+        print(f"scanner: {max(active for active, _ in samples)} scans ativos no pico, "
+              f"{samples[-1][1]} ainda na fila ao final")
+    print(f"\n{'operação':16}{'requests':>10}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'erros':>8}  status")
+    for operation in weights:
+        stats = results.get(operation)
+        if not stats:
+            continue
+        latencies = sorted(stats["latencies"])
+        print(f"{operation:16}{len(latencies):>10}{len(latencies) / elapsed:>8.1f}"
+              f"{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>9.1f}{latencies[-1] * 1000:>9.1f}"
+              f"{stats['errors'] / len(latencies):>8.1%}  {stats['statuses']}")
+
+    stalls = after.get("stalls", 0) - before.get("stalls", 0)
+    print(f"\nevent loop: atraso p50 {after.get('lag_p50_ms', 0)} ms | p99 {after.get('lag_p99_ms', 0)} ms | "
+          f"máx {after.get('max_lag_ms', 0)} ms | travamentos (>{after.get('stall_threshold_ms', 0):.0f} ms): {stalls}")
+    window = [stall for stall in after.get("recent_stalls", []) if stall["at"] >= time.time() - elapsed - 5]
+    if stalls:
+        print("⚠️ Event loop travou durante o teste: " + ", ".join(f"{stall['lag_ms']:.0f} ms" for stall in window[-10:]))
+    print(f"Log do servidor: {os.path.join(workdir, 'server.log')}")
+    if args.fail_on_stall and stalls:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="Clientes simultâneos (cada um com sua sessão)")
+    parser.add_argument("--duration", type=float, default=30, help="Duração do teste em segundos")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos das operações, ex.: queue-status=60,scan=10")
+    parser.add_argument("--pages", default=DEFAULT_PAGES, help="Páginas sorteadas pela operação page")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pausa média entre requests de cada cliente")
+    parser.add_argument("--targets", type=int, default=500, help="Targets no banco gerado")
+    parser.add_argument("--results-per-target", type=int, default=4, help="scan_results por target no banco gerado")
+    parser.add_argument("--no-busy", dest="busy", action="store_false", help="Não dispara o scan-all antes do teste")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="Espera de cada ferramenta falsa em segundos")
+    parser.add_argument("--stub-subdomains", type=int, default=50, help="Subdomínios gerados por target")
+    parser.add_argument("--fail-on-stall", action="store_true", help="Sai com código 1 se o event loop travar")
+    parser.add_argument("--seed", type=int, default=1, help="Semente das escolhas dos clientes")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
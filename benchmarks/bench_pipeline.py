@@ -0,0 +1,325 @@
+"""Benchmark ponta a ponta do pipeline (subfinder → chaos → httpx → nuclei) com ferramentas falsas.
+
+As ferramentas reais são trocadas pelos stubs de benchmarks/stubs (via TOOLS_PATH),
+que geram volumes, ritmos, falhas e travamentos configuráveis sem tocar a rede.
+Cada cenário roda num processo novo com banco, workspace e templates próprios,
+passando pela fila de verdade (scan_multiple_targets → processador de fila).
+
+Mede, por cenário:
+- targets/hora ponta a ponta e contagem de status finais;
+- overhead por estágio: tempo do método do estágio menos o tempo com ferramenta rodando;
+- latência de despacho da fila (enfileirado → pipeline iniciado);
+- tempo gasto em escritas no banco (resultados, checkpoints, status e achados);
+- pico de memória do processo do Hawks e do maior processo filho.
+
+Com --dns um servidor DNS falso (benchmarks/stubs/dns_stub.py) é iniciado e o
+pré-filtro DNS é ligado; combine com --dead-host-seconds para que o httpx falso
+pague pelos nomes mortos como o real paga pelo timeout.
+
+Cenários: huge (1 target com 20.000 subdomínios), tiny (1.000 targets com 3
+subdomínios) e mixed (200 targets de tamanhos variados), multiplicados por --scale.
+
+Uso:
+    python benchmarks/bench_pipeline.py --scale 0.1
+    python benchmarks/bench_pipeline.py --scenarios tiny --fail httpx=0.05 --hang subfinder=0.01
+    python benchmarks/bench_pipeline.py --scenarios huge --lines-per-sec 2000 --findings-per-host 1.5
+    python benchmarks/bench_pipeline.py --scenarios mixed --scale 0.2 --alive-ratio 0.1 --dead-host-seconds 2 --dns
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "benchmarks", "stubs")
+
+STAGES = ("subfinder", "chaos", "dns_prefilter", "httpx", "nuclei")
+DB_WRITES = ("_save_stage_result", "_save_checkpoint", "_clear_checkpoints", "_update_target_status")
+
+TEMPLATE = """id: bench-template
+info:
+  name: Bench Template
+  author: hawks
+  severity: info
+http:
+  - method: GET
+    path:
+      - "{{BaseURL}}/"
+"""
+
+
+def scenario_sizes(name: str, scale: float) -> list:
+    """Subdomínios por target em cada cenário"""
+    if name == "huge":
+        return [max(1, int(20000 * scale))]
+    if name == "tiny":
+        return [3] * max(1, int(1000 * scale))
+    if name == "mixed":
+        return [2000 if i % 50 == 0 else 300 if i % 10 == 0 else 20 for i in range(max(1, int(200 * scale)))]
+    raise ValueError(f"Cenário desconhecido: {name}")
+
+
+class PipelineProbe:
+    """Instrumenta a instância do scanner envolvendo os métodos de estágio, subprocessos e escritas"""
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.stage_wall = {stage: 0.0 for stage in STAGES}
+        self.stage_overhead = {stage: 0.0 for stage in STAGES}
+        self.stage_calls = {stage: 0 for stage in STAGES}
+        self.stage_errors = {stage: 0 for stage in STAGES}
+        self.db_time = {name: 0.0 for name in DB_WRITES + ("ingest_findings",)}
+        self.dispatch = []
+        # {(scan_id, ferramenta): [processos ativos, início da cobertura, segundos cobertos]}
+        self.coverage = {}
+
+    def _covered(self, scan_id, tool) -> float:
+        return self.coverage.get((scan_id, tool), [0, 0.0, 0.0])[2]
+
+    def install(self):
+        scanner = self.scanner
+        spawn, communicate, execute = scanner._spawn, scanner._communicate, scanner._execute_queued_scan
+        tools = {}
+
+        async def timed_spawn(scan_id, *cmd, **kwargs):
+            process = await spawn(scan_id, *cmd, **kwargs)
+            tool = os.path.basename(str(cmd[0]))
+            tools[process] = (scan_id, tool)
+            entry = self.coverage.setdefault((scan_id, tool), [0, 0.0, 0.0])
+            if entry[0] == 0:
+                entry[1] = time.perf_counter()
+            entry[0] += 1
+            return process
+
+        async def timed_communicate(scan_id, process, timeout=None, **kwargs):
+            try:
+                return await communicate(scan_id, process, timeout, **kwargs)
+            finally:
+                entry = self.coverage.get(tools.pop(process, None))
+                if entry:
+                    entry[0] -= 1
+                    if entry[0] == 0:
+                        entry[2] += time.perf_counter() - entry[1]
+
+        async def timed_execute(job):
+            self.dispatch.append(time.time() - job.enqueued_at)
+            return await execute(job)
+
+        scanner._spawn, scanner._communicate, scanner._execute_queued_scan = timed_spawn, timed_communicate, timed_execute
+
+        for stage in STAGES:
+            setattr(scanner, f"run_{stage}", self._wrap_stage(stage, getattr(scanner, f"run_{stage}")))
+        for name in DB_WRITES:
+            setattr(scanner, name, self._wrap_db(name, getattr(scanner, name)))
+
+        import app.scanner
+        app.scanner.ingest_findings = self._wrap_db("ingest_findings", app.scanner.ingest_findings)
+
+    def _wrap_stage(self, stage, method):
+        async def wrapper(*args, scan_id=None, **kwargs):
+            covered = self._covered(scan_id, stage)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = await method(*args, scan_id=scan_id, **kwargs)
+                return result
+            finally:
+                if not isinstance(result, dict) or result.get("status") != "success":
+                    self.stage_errors[stage] += 1
+                wall = time.perf_counter() - start
+                self.stage_wall[stage] += wall
+                self.stage_overhead[stage] += wall - (self._covered(scan_id, stage) - covered)
+                self.stage_calls[stage] += 1
+        return wrapper
+
+    def _wrap_db(self, name, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.db_time[name] += time.perf_counter() - start
+        return wrapper
+
+
+def run_child(args):
+    """Executa um cenário neste processo e imprime o resultado em JSON"""
+    workdir = tempfile.mkdtemp(prefix="hawks-pipeline-")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("ADMIN_USERNAME", "bench")
+    os.environ.setdefault("ADMIN_PASSWORD", "bench")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["WORKSPACE_DIR"] = os.path.join(workdir, "workspaces")
+    os.environ["TOOLS_PATH"] = STUBS
+    # O nuclei procura templates em ./templates/custom
+    os.makedirs(os.path.join(workdir, "templates", "custom"))
+    with open(os.path.join(workdir, "templates", "custom", "bench.yaml"), "w") as f:
+        f.write(TEMPLATE)
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    # Os prints do scanner não interessam aqui
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    from app.database import HawksSettings, HawksTarget, SessionLocal, init_db
+    from app.scan_queue import PRIORITY_SCAN_ALL
+    from app.scanner import get_hawks_scanner
+
+    init_db()
+    scanner = get_hawks_scanner()
+    probe = PipelineProbe(scanner)
+    probe.install()
+
+    sizes = scenario_sizes(args.child, args.scale)
+    db = SessionLocal()
+    if args.chaos:
+        db.add(HawksSettings(id=1, chaos_enabled=True, chaos_api_key="bench"))
+    targets = [HawksTarget(domain_ip=f"t{i}-s{size}.bench.local") for i, size in enumerate(sizes)]
+    db.add_all(targets)
+    db.commit()
+    target_ids = [target.id for target in targets]
+
+    async def run():
+        await scanner.start_queue_processor()
+        start = time.perf_counter()
+        await scanner.scan_multiple_targets(target_ids, db, priority=PRIORITY_SCAN_ALL)
+        deadline = start + args.timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.2)
+            status = scanner.get_queue_status()
+            if not status["active_scans"] and not status["queued_scans"]:
+                break
+        elapsed = time.perf_counter() - start
+        await scanner.stop_queue_processor()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+
+    db.expire_all()
+    statuses = {}
+    for target in db.query(HawksTarget).all():
+        statuses[target.scan_status] = statuses.get(target.scan_status, 0) + 1
+    db.close()
+
+    result = {
+        "scenario": args.child,
+        "targets": len(sizes),
+        "subdomains": sum(sizes),
+        "elapsed": elapsed,
+        "statuses": statuses,
+        "stage_calls": probe.stage_calls,
+        "stage_errors": probe.stage_errors,
+        "stage_wall": probe.stage_wall,
+        "stage_overhead": probe.stage_overhead,
+        "dispatch": sorted(probe.dispatch),
+        "db_time": probe.db_time,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+    sys.stdout = real_stdout
+    print(json.dumps(result))
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def report(result: dict):
+    elapsed = result["elapsed"]
+    print(f"\n=== {result['scenario']}: {result['targets']} targets, {result['subdomains']} subdomínios ===")
+    print(f"tempo total        {elapsed:10.2f} s   ({result['targets'] * 3600 / elapsed:,.0f} targets/hora)")
+    print(f"status finais      {result['statuses']}")
+    print(f"{'estágio':12}{'chamadas':>10}{'erros':>8}{'wall s':>10}{'overhead s':>12}{'overhead/chamada ms':>22}")
+    for stage in STAGES:
+        calls = result["stage_calls"][stage]
+        if not calls:
+            continue
+        overhead = result["stage_overhead"][stage]
+        print(f"{stage:12}{calls:>10}{result['stage_errors'][stage]:>8}{result['stage_wall'][stage]:>10.2f}{overhead:>12.2f}{overhead * 1000 / calls:>22.1f}")
+    dispatch = result["dispatch"]
+    print(f"despacho da fila   p50 {percentile(dispatch, 0.5) * 1000:.0f} ms | p95 {percentile(dispatch, 0.95) * 1000:.0f} ms"
+          f" | máx {(dispatch[-1] if dispatch else 0) * 1000:.0f} ms")
+    db_total = sum(result["db_time"].values())
+    detail = ", ".join(f"{name.lstrip('_')} {seconds:.2f}" for name, seconds in result["db_time"].items() if seconds)
+    print(f"escritas no banco  {db_total:.2f} s ({detail})")
+    print(f"pico de memória    hawks {result['peak_rss_mb']:.0f} MB | maior filho {result['peak_child_rss_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="huge,tiny,mixed", help="Cenários separados por vírgula")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica o volume de cada cenário")
+    parser.add_argument("--timeout", type=float, default=3600, help="Limite por cenário em segundos")
+    parser.add_argument("--no-chaos", dest="chaos", action="store_false", help="Não habilita o chaos nas configurações")
+    parser.add_argument("--alive-ratio", type=float, help="Fração de subdomínios vivos no httpx")
+    parser.add_argument("--findings-per-host", type=float, help="Achados do nuclei por host vivo")
+    parser.add_argument("--lines-per-sec", type=float, help="Ritmo de saída das ferramentas (linhas/s)")
+    parser.add_argument("--latency", type=float, help="Espera inicial de cada ferramenta em segundos")
+    parser.add_argument("--fail", help='Probabilidade de falha por ferramenta, ex.: "httpx=0.1,nuclei=0.05"')
+    parser.add_argument("--hang", help='Probabilidade de travar por ferramenta, ex.: "subfinder=0.01"')
+    parser.add_argument("--hang-seconds", type=float, default=5, help="Duração de cada travamento")
+    parser.add_argument("--dead-host-seconds", type=float, help="Custo de cada host morto no httpx (dividido pelo -c)")
+    parser.add_argument("--dns", action="store_true", help="Liga o pré-filtro DNS contra o servidor DNS falso")
+    parser.add_argument("--resolve-ratio", type=float, help="Fração dos nomes que resolvem no DNS falso")
+    parser.add_argument("--wildcard-ratio", type=float, help="Fração dos targets com DNS wildcard")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    env = dict(os.environ)
+    knobs = {
+        "HAWKS_STUB_ALIVE_RATIO": args.alive_ratio,
+        "HAWKS_STUB_FINDINGS_PER_HOST": args.findings_per_host,
+        "HAWKS_STUB_LINES_PER_SEC": args.lines_per_sec,
+        "HAWKS_STUB_LATENCY": args.latency,
+        "HAWKS_STUB_FAIL": args.fail,
+        "HAWKS_STUB_TIMEOUT": args.hang,
+        "HAWKS_STUB_HANG_SECONDS": args.hang_seconds,
+        "HAWKS_STUB_DEAD_HOST_SECONDS": args.dead_host_seconds,
+        "HAWKS_STUB_RESOLVE_RATIO": args.resolve_ratio,
+        "HAWKS_STUB_WILDCARD_RATIO": args.wildcard_ratio,
+    }
+    env.update({name: str(value) for name, value in knobs.items() if value is not None})
+
+    dns_server = None
+    if args.dns:
+        dns_server = subprocess.Popen([sys.executable, os.path.join(STUBS, "dns_stub.py"), "--port", "0"],
+                                      env=env, stdout=subprocess.PIPE, text=True)
+        env["DNS_PREFILTER"] = "true"
+        env["DNS_RESOLVERS"] = f"127.0.0.1:{dns_server.stdout.readline().strip()}"
+
+    results = []
+    for scenario in filter(None, (name.strip() for name in args.scenarios.split(","))):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", scenario, "--scale", str(args.scale),
+               "--timeout", str(args.timeout)] + ([] if args.chaos else ["--no-chaos"])
+        completed = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"⚠️ Cenário {scenario} falhou:\n{completed.stderr[-2000:]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        if not args.json:
+            report(result)
+
+    if dns_server:
+        dns_server.terminate()
+        dns_server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Compara os motores de sondagem HTTP (binário do httpx × motor nativo) contra um servidor local.
+
+Um servidor HTTP de teste roda num processo separado com uma porta HTTP e, se o
+openssl estiver disponível, uma porta HTTPS com certificado autoassinado. Os
+hosts são endereços de loopback distintos (127.0.x.y) apontando para essas
+portas; hosts mortos apontam para uma porta fechada (conexão recusada). Por isso
+o servidor escuta em 0.0.0.0 enquanto o benchmark roda.
+
+Cada motor roda num processo novo chamando scanner.run_httpx target a target,
+como o pipeline faz, e o resultado mostra tempo total, latência por chamada,
+hosts vivos encontrados (comparados com os hosts realmente vivos) e pico de
+memória. O binário do httpx vem de --httpx-dir, das ferramentas configuradas
+ou do PATH; sem ele é usado o httpx falso de benchmarks/stubs, que mede só o
+custo de processo e arquivos (os hosts vivos dele não batem com o servidor).
+
+Uso:
+    python benchmarks/bench_probe.py
+    python benchmarks/bench_probe.py --targets 500 --hosts-per-target 3 --parallel 3
+    python benchmarks/bench_probe.py --engines native --targets 20 --hosts-per-target 500 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "benchmarks", "stubs")
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def closed_port() -> int:
+    """Porta sem ninguém escutando (conexões são recusadas na hora)"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def make_certificate(workdir: str):
+    """Certificado autoassinado via openssl (None se o openssl não existir)"""
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+    completed = subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=hawks-bench",
+         "-keyout", key, "-out", cert],
+        capture_output=True
+    )
+    return (cert, key) if completed.returncode == 0 else None
+
+
+def run_server(args):
+    """Servidor de teste: keep-alive, corpo de tamanho fixo e latência opcional"""
+    import ssl
+
+    body = b"x" * args.body_bytes
+
+    async def handle(reader, writer):
+        buffer = b""
+        try:
+            while True:
+                while b"\r\n\r\n" not in buffer:
+                    chunk = await reader.read(65536)
+                    if not chunk:
+                        return
+                    buffer += chunk
+                    # Como um servidor real: lixo (ex.: ClientHello TLS na porta HTTP) leva 400 na hora
+                    if not b"GET ".startswith(buffer[:4]) and not b"HEAD".startswith(buffer[:4]):
+                        writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                        return
+                _, buffer = buffer.split(b"\r\n\r\n", 1)
+                if args.latency_ms:
+                    await asyncio.sleep(args.latency_ms / 1000)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nServer: hawks-bench\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve():
+        servers = [await asyncio.start_server(handle, "0.0.0.0", 0, backlog=4096)]
+        tls_port = 0
+        if args.cert:
+            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            context.load_cert_chain(args.cert, args.key)
+            servers.append(await asyncio.start_server(handle, "0.0.0.0", 0, ssl=context, backlog=4096))
+            tls_port = servers[1].sockets[0].getsockname()[1]
+        print(json.dumps({"http": servers[0].sockets[0].getsockname()[1], "https": tls_port}), flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def build_targets(args, ports: dict) -> tuple:
+    """Listas de hosts por target e o conjunto de URLs realmente vivas"""
+    rng = random.Random(args.seed)
+    dead_port = closed_port()
+    targets, expected = [], set()
+    index = 0
+    for _ in range(args.targets):
+        hosts = []
+        for _ in range(args.hosts_per_target):
+            index += 1
+            address = f"127.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255 or 1}"
+            if rng.random() < args.alive_ratio:
+                if ports["https"] and rng.random() < args.tls_ratio:
+                    hosts.append(f"{address}:{ports['https']}")
+                    expected.add(f"https://{address}:{ports['https']}")
+                else:
+                    hosts.append(f"{address}:{ports['http']}")
+                    expected.add(f"http://{address}:{ports['http']}")
+            else:
+                hosts.append(f"{address}:{dead_port}")
+        targets.append(hosts)
+    return targets, expected
+
+
+def httpx_dir(args, env: dict) -> str:
+    """Diretório do binário do httpx; sem httpx instalado, o falso mede só o custo de processo e arquivos"""
+    if args.httpx_dir:
+        return args.httpx_dir
+    for directory in (env.get("TOOLS_PATH", ""), os.path.expanduser("~/go/bin")):
+        if directory and os.access(os.path.join(directory, "httpx"), os.X_OK):
+            return directory
+    return STUBS
+
+
+def run_child(args):
+    """Sonda todos os targets com um motor neste processo e imprime o resultado em JSON"""
+    with open(args.targets_file) as f:
+        targets = json.load(f)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    from app.scanner import get_hawks_scanner
+
+    scanner = get_hawks_scanner()
+    binary = scanner._get_tool_path("httpx")
+    latencies, live_hosts, errors = [], [], 0
+
+    async def run():
+        slots = asyncio.Semaphore(args.parallel)
+
+        async def probe(index, hosts):
+            nonlocal errors
+            scan_id = f"scan_{index}"
+            async with slots:
+                start = time.perf_counter()
+                result = await scanner.run_httpx(subdomains=hosts, domain=f"t{index}.bench.local", scan_id=scan_id)
+                latencies.append(time.perf_counter() - start)
+            scanner.workspaces.release(scan_id)
+            if result.get("status") != "success":
+                errors += 1
+            live_hosts.extend(result.get("live_hosts", []))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(probe(index, hosts) for index, hosts in enumerate(targets)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    sys.stdout = real_stdout
+    print(json.dumps({
+        "engine": args.child,
+        "binary": None if scanner.http_prober else binary,
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "live_hosts": live_hosts,
+        "errors": errors,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "prober": scanner.http_prober.status() if scanner.http_prober else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", default="httpx,native", help="Motores separados por vírgula")
+    parser.add_argument("--targets", type=int, default=200, help="Targets sondados (uma chamada por target)")
+    parser.add_argument("--hosts-per-target", type=int, default=5, help="Hosts por target")
+    parser.add_argument("--alive-ratio", type=float, default=0.6, help="Fração dos hosts com servidor HTTP")
+    parser.add_argument("--tls-ratio", type=float, default=0.5, help="Fração dos hosts vivos servidos em HTTPS")
+    parser.add_argument("--parallel", type=int, default=3, help="Targets sondados ao mesmo tempo (slots de probing)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latência de cada resposta do servidor")
+    parser.add_argument("--body-bytes", type=int, default=2048, help="Tamanho do corpo das respostas")
+    parser.add_argument("--httpx-dir", help="Diretório com o binário real do httpx")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--targets-file", help=argparse.SUPPRESS)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--cert", help=argparse.SUPPRESS)
+    parser.add_argument("--key", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_server(args)
+        return
+    if args.child:
+        run_child(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="hawks-probe-")
+    server_cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--body-bytes", str(args.body_bytes),
+                  "--latency-ms", str(args.latency_ms)]
+    certificate = make_certificate(workdir)
+    if certificate:
+        server_cmd += ["--cert", certificate[0], "--key", certificate[1]]
+    else:
+        print("⚠️ openssl não encontrado: só hosts HTTP")
+    server = subprocess.Popen(server_cmd, stdout=subprocess.PIPE, text=True)
+    try:
+        ports = json.loads(server.stdout.readline())
+        targets, expected = build_targets(args, ports)
+        targets_file = os.path.join(workdir, "targets.json")
+        with open(targets_file, "w") as f:
+            json.dump(targets, f)
+
+        env = dict(os.environ)
+        env.setdefault("SECRET_KEY", "bench")
+        env.setdefault("ADMIN_USERNAME", "bench")
+        env.setdefault("ADMIN_PASSWORD", "bench")
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        env["WORKSPACE_DIR"] = os.path.join(workdir, "workspaces")
+        # Sem orçamento de rate: a comparação é do custo dos motores
+        env["GLOBAL_RATE_LIMIT"] = "0"
+        env["PROBE_TIMEOUT"] = env.get("PROBE_TIMEOUT", "10")
+
+        total_hosts = sum(len(hosts) for hosts in targets)
+        print(f"{len(targets)} targets × {args.hosts_per_target} hosts ({total_hosts} hosts, {len(expected)} vivos), "
+              f"{args.parallel} em paralelo, latência do servidor {args.latency_ms:.0f} ms")
+        print(f"{'motor':8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'hosts/s':>10}{'vivos':>8}{'certos':>8}"
+              f"{'erros':>7}{'RSS MB':>8}{'filho MB':>10}")
+        for engine in filter(None, (name.strip() for name in args.engines.split(","))):
+            child_env = dict(env, PROBE_ENGINE=engine)
+            if engine == "httpx":
+                child_env["TOOLS_PATH"] = httpx_dir(args, env)
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", engine, "--targets-file", targets_file,
+                   "--parallel", str(args.parallel)]
+            completed = subprocess.run(cmd, env=child_env, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"⚠️ Motor {engine} falhou:\n{completed.stderr[-2000:]}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            latencies = result["latencies"]
+            found = set(result["live_hosts"])
+            stub = bool(result["binary"]) and result["binary"].startswith(STUBS)
+            print(f"{engine:8}{result['elapsed']:>10.2f}{percentile(latencies, 0.5) * 1000:>10.1f}"
+                  f"{percentile(latencies, 0.95) * 1000:>10.1f}{total_hosts / result['elapsed']:>10.0f}"
+                  f"{len(found):>8}{len(found & expected):>8}{result['errors']:>7}"
+                  f"{result['peak_rss_mb']:>8.0f}{result['peak_child_rss_mb']:>10.0f}")
+            if result["binary"]:
+                print(f"         binário: {result['binary']}" + (" (falso: vivos não comparáveis)" if stub else ""))
+            if result["prober"]:
+                prober = result["prober"]
+                print(f"         conexões abertas {prober['connections_opened']}, reaproveitadas "
+                      f"{prober['connections_reused']}, fallback HTTPS→HTTP {prober['https_fallbacks']}")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Benchmark das páginas pesadas sobre dados sintéticos, com baselines e comparação.
+
+Mede latência (p50/p95/p99) e memória por rota chamando o app ASGI diretamente,
+cada rota num processo novo para que o pico de RSS de uma não contamine a outra.
+O cache de HTML fica desligado por padrão para medir a renderização de verdade
+(--render-cache liga). Os dados vêm de um banco já populado pelo seed_data.py
+(--database-url) ou são gerados num banco temporário a partir de --profile.
+
+Baselines ficam em benchmarks/baselines/<nome>.json. Com --compare o resultado
+atual é comparado com a baseline e o processo sai com código 1 se alguma rota
+piorar além de --threshold (latência p50/p95 ou pico de memória).
+
+Uso:
+    python benchmarks/bench_routes.py --profile small --save-baseline small
+    python benchmarks/bench_routes.py --profile small --compare small
+    python benchmarks/bench_routes.py --database-url sqlite:////tmp/hawks-large.db --routes targets,nuclei-results --iterations 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+ROUTES = {
+    "dashboard": "/dashboard",
+    "targets": "/targets",
+    "scans": "/scans",
+    "nuclei-results": "/nuclei-results",
+    "target-dashboard": "/targets/{target_id}/dashboard",
+    "templates": "/templates",
+    "api-v1-targets": "/api/v1/targets?limit=500",
+}
+
+# Diferenças menores que isso são ruído, mesmo quando passam do threshold relativo
+NOISE_FLOOR_MS = 5.0
+NOISE_FLOOR_MB = 2.0
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(len(ordered) * fraction + 0.5)) - 1))]
+
+
+async def asgi_get(app, path: str, cookie: str) -> tuple:
+    """GET direto no app ASGI; retorna (status, bytes do corpo)"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(b"cookie", cookie.encode())], "client": ("127.0.0.1", 40000), "server": ("bench", 80),
+    }
+    response = {"status": 0, "bytes": 0}
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Cliente nunca desconecta: o starlette cancela esta espera ao terminar a resposta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["bytes"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["bytes"]
+
+
+def run_child(args):
+    """Mede uma rota neste processo e imprime o resultado em JSON"""
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    import main
+    from sqlalchemy import func
+    from app.database import HawksScanResult, SessionLocal
+
+    path = ROUTES[args.child]
+    if "{target_id}" in path:
+        # O target com mais resultados é o pior caso do dashboard por target
+        db = SessionLocal()
+        busiest = db.query(HawksScanResult.target_id, func.count(HawksScanResult.id).label("total")) \
+            .group_by(HawksScanResult.target_id).order_by(func.count(HawksScanResult.id).desc()).first()
+        db.close()
+        path = path.format(target_id=busiest[0] if busiest else 1)
+
+    token = main.create_access_token({"sub": os.environ["ADMIN_USERNAME"], "iat": time.time()})
+    cookie = f"access_token={token}"
+
+    async def run():
+        for _ in range(args.warmup):
+            await asgi_get(main.app, path, cookie)
+        latencies = []
+        status, size = 0, 0
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            status, size = await asgi_get(main.app, path, cookie)
+            latencies.append((time.perf_counter() - start) * 1000)
+        # Alocações Python de um request (à parte: o tracemalloc deixa o request mais lento)
+        tracemalloc.start()
+        await asgi_get(main.app, path, cookie)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return latencies, status, size, peak
+
+    latencies, status, size, peak = asyncio.run(run())
+    sys.stdout = real_stdout
+    print(json.dumps({
+        "path": path,
+        "status": status,
+        "bytes": size,
+        "iterations": len(latencies),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": max(latencies),
+        "peak_alloc_mb": peak / 1024 / 1024,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def dataset_counts(env: dict) -> dict:
+    code = (
+        "import json, sqlalchemy\n"
+        f"engine = sqlalchemy.create_engine({env['DATABASE_URL']!r})\n"
+        "with engine.connect() as conn:\n"
+        "    print(json.dumps({t: conn.execute(sqlalchemy.text(f'SELECT COUNT(*) FROM {t}')).scalar()\n"
+        "                      for t in ('targets', 'scan_results', 'findings', 'templates')}))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Rotas que pioraram além do threshold (e acima do ruído)"""
+    regressions = []
+    print(f"\nComparação com a baseline ({baseline['meta'].get('saved_at', '?')}, threshold {threshold:.0%}):")
+    print(f"{'rota':18}{'p50 ms':>18}{'p95 ms':>18}{'pico alloc MB':>22}")
+    for name, metrics in current["routes"].items():
+        base = baseline["routes"].get(name)
+        if not base:
+            print(f"{name:18}  (sem baseline)")
+            continue
+        cells = []
+        for key, floor in (("p50_ms", NOISE_FLOOR_MS), ("p95_ms", NOISE_FLOOR_MS), ("peak_alloc_mb", NOISE_FLOOR_MB)):
+            before, after = base[key], metrics[key]
+            change = (after - before) / before if before else 0.0
+            worse = change > threshold and after - before > floor
+            if worse:
+                regressions.append(f"{name} {key}: {before:.1f} → {after:.1f} ({change:+.0%})")
+            cells.append(f"{after:.1f} ({change:+.0%}){'!' if worse else ' '}")
+        print(f"{name:18}{cells[0]:>18}{cells[1]:>18}{cells[2]:>22}")
+    if current["meta"]["counts"] != baseline["meta"].get("counts"):
+        print(f"⚠️ Volume diferente da baseline: {baseline['meta'].get('counts')} → {current['meta']['counts']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Banco já populado pelo seed_data.py")
+    parser.add_argument("--profile", default="small", help="Perfil do seed_data.py quando --database-url não é informado")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="Rotas separadas por vírgula")
+    parser.add_argument("--iterations", type=int, default=5, help="Requests medidos por rota")
+    parser.add_argument("--warmup", type=int, default=1, help="Requests de aquecimento por rota")
+    parser.add_argument("--render-cache", action="store_true", help="Mantém o cache de HTML ligado")
+    parser.add_argument("--save-baseline", metavar="NOME", help="Salva o resultado em benchmarks/baselines/NOME.json")
+    parser.add_argument("--compare", metavar="NOME", help="Compara com benchmarks/baselines/NOME.json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Piora relativa tolerada na comparação")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "bench")
+    env.setdefault("ADMIN_USERNAME", "bench")
+    env.setdefault("ADMIN_PASSWORD", "bench")
+    if not args.render_cache:
+        env["RENDER_CACHE_ENTRIES"] = "0"
+
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="hawks-routes-")
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        print(f"Gerando dados sintéticos (perfil {args.profile})...", file=sys.stderr)
+        subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "seed_data.py"),
+                        "--database-url", env["DATABASE_URL"], "--profile", args.profile],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+
+    counts = dataset_counts(env)
+    current = {
+        "meta": {
+            "profile": None if args.database_url else args.profile,
+            "counts": counts,
+            "iterations": args.iterations,
+            "render_cache": args.render_cache,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "routes": {},
+    }
+
+    print(f"Dados: {counts} | {args.iterations} requests por rota | cache de HTML {'ligado' if args.render_cache else 'desligado'}")
+    print(f"{'rota':18}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KB':>10}{'alloc MB':>10}{'RSS MB':>9}")
+    for name in filter(None, (route.strip() for route in args.routes.split(","))):
+        if name not in ROUTES:
+            print(f"⚠️ Rota desconhecida: {name} (opções: {', '.join(ROUTES)})")
+            continue
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", name,
+               "--iterations", str(args.iterations), "--warmup", str(args.warmup)]
+        completed = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"⚠️ Rota {name} falhou:\n{completed.stderr[-2000:]}")
+            continue
+        metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+        current["routes"][name] = metrics
+        print(f"{name:18}{metrics['status']:>7}{metrics['p50_ms']:>10.1f}{metrics['p95_ms']:>10.1f}{metrics['p99_ms']:>10.1f}"
+              f"{metrics['bytes'] / 1024:>10.0f}{metrics['peak_alloc_mb']:>10.1f}{metrics['peak_rss_mb']:>9.0f}")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Baseline salva em {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print("\n⚠️ Regressões:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\n✅ Nenhuma regressão acima do threshold")
+
+
+if __name__ == "__main__":
+    main()
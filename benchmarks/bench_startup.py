@@ -0,0 +1,124 @@
+"""Benchmark de inicialização: tempo de import do main.py e do lifespan.
+
+Roda cada medição num processo novo (imports frios de Python, caches de
+bytecode já quentes) e mostra o detalhamento do `python -X importtime` por
+pacote de topo. Também verifica que as dependências pesadas continuam fora do
+import (git, yaml, passlib e o módulo do scanner) para pegar regressões.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --max-import-ms 1500   # falha (exit 1) acima do limite
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Só devem ser importados sob demanda (upload/clone de templates, auth, lifespan)
+LAZY_MODULES = ("git", "yaml", "passlib", "app.scanner")
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import main
+print("IMPORT_MS", (time.perf_counter() - start) * 1000)
+print("LOADED", ",".join(name for name in {lazy!r} if name in sys.modules))
+"""
+
+LIFESPAN_SNIPPET = """
+import asyncio, time
+import main
+
+async def run():
+    queue = asyncio.Queue()
+    await queue.put({"type": "lifespan.startup"})
+    marks = {}
+
+    async def send(message):
+        marks[message["type"]] = time.perf_counter()
+        if message["type"] == "lifespan.startup.complete":
+            await queue.put({"type": "lifespan.shutdown"})
+
+    start = time.perf_counter()
+    await main.app({"type": "lifespan", "asgi": {"version": "3.0"}}, queue.get, send)
+    print("STARTUP_MS", (marks["lifespan.startup.complete"] - start) * 1000)
+
+asyncio.run(run())
+"""
+
+
+def run_python(code: str, env: dict, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+
+
+def parse_value(output: str, key: str) -> str:
+    for line in output.splitlines():
+        if line.startswith(key + " "):
+            return line.split(" ", 1)[1].strip()
+    raise RuntimeError(f"{key} não encontrado na saída:\n{output}")
+
+
+def importtime_breakdown(stderr: str, top: int) -> list:
+    """Tempo próprio (self) somado por pacote de topo, a partir do -X importtime"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Processos por medição (vale a mediana)")
+    parser.add_argument("--top", type=int, default=12, help="Pacotes no detalhamento do importtime")
+    parser.add_argument("--max-import-ms", type=float, default=0, help="Falha se a mediana do import passar disso")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hawks-bench-")
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "bench")
+    env.setdefault("ADMIN_USERNAME", "bench")
+    env.setdefault("ADMIN_PASSWORD", "bench")
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env["WORKSPACE_DIR"] = workdir
+
+    import_code = IMPORT_SNIPPET.format(lazy=LAZY_MODULES)
+    run_python(import_code, env)  # aquece o cache de bytecode
+
+    import_ms, startup_ms, loaded = [], [], set()
+    for _ in range(args.runs):
+        result = run_python(import_code, env)
+        import_ms.append(float(parse_value(result.stdout, "IMPORT_MS")))
+        loaded.update(filter(None, parse_value(result.stdout, "LOADED").split(",")))
+        result = run_python(LIFESPAN_SNIPPET, env)
+        startup_ms.append(float(parse_value(result.stdout, "STARTUP_MS")))
+
+    breakdown = importtime_breakdown(run_python(import_code, env, importtime=True).stderr, args.top)
+
+    print(f"Python {sys.version.split()[0]} | {args.runs} execuções (mediana)")
+    print(f"import main        {statistics.median(import_ms):8.1f} ms   (min {min(import_ms):.1f})")
+    print(f"lifespan startup   {statistics.median(startup_ms):8.1f} ms   (init_db + scanner + fila + manutenção)")
+    print("\nimporttime por pacote (self, ms):")
+    for package, self_us in breakdown:
+        print(f"  {package:24}{self_us / 1000:8.1f}")
+
+    failed = False
+    if loaded:
+        print(f"\n⚠️ Importados no import do main (deveriam ser tardios): {', '.join(sorted(loaded))}")
+        failed = True
+    if args.max_import_ms and statistics.median(import_ms) > args.max_import_ms:
+        print(f"\n⚠️ Import acima do limite de {args.max_import_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
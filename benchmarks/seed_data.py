@@ -0,0 +1,257 @@
+"""Gerador de dados sintéticos para os benchmarks das páginas pesadas.
+
+Preenche targets, scan_results (subfinder, chaos, httpx e nuclei com corpos de
+request/response), findings e templates com formas parecidas com as de produção:
+a maioria dos targets é pequena e alguns poucos têm milhares de subdomínios
+e dezenas de achados. Os dados são determinísticos para uma mesma --seed.
+
+Perfis prontos (--profile):
+    small    1.000 targets,  10 resultados por target (10 mil scan_results)
+    medium  10.000 targets,  10 resultados por target (100 mil)
+    large   50.000 targets,  10 resultados por target (500 mil)
+
+Uso:
+    python benchmarks/seed_data.py --database-url sqlite:////tmp/hawks-large.db --profile large
+    python benchmarks/seed_data.py --database-url sqlite:////tmp/h.db --targets 2000 --results-per-target 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    "small": {"targets": 1000, "results_per_target": 10},
+    "medium": {"targets": 10000, "results_per_target": 10},
+    "large": {"targets": 50000, "results_per_target": 10},
+}
+
+STAGES = ("subfinder", "chaos", "httpx", "nuclei")
+TEMPLATE_IDS = ("exposed-panel", "git-exposure", "cors-misconfig", "default-login", "open-redirect",
+                "swagger-api", "tech-detect", "ssl-expired", "directory-listing", "xss-reflected")
+SEVERITIES = ("info", "info", "info", "low", "low", "medium", "high", "critical")
+GROUPS = (None, "bugbounty.txt", "clientes.txt", "interno.txt")
+
+
+def subdomain_count(rng: random.Random) -> int:
+    """Cauda longa: a maioria dos targets é pequena, poucos são enormes"""
+    roll = rng.random()
+    if roll < 0.70:
+        return rng.randint(1, 30)
+    if roll < 0.95:
+        return rng.randint(30, 400)
+    if roll < 0.995:
+        return rng.randint(400, 3000)
+    return rng.randint(3000, 15000)
+
+
+def vulnerability_count(rng: random.Random, live_hosts: int) -> int:
+    roll = rng.random()
+    if roll < 0.60:
+        return 0
+    if roll < 0.95:
+        return min(live_hosts, rng.randint(1, 5))
+    return min(live_hosts * 3, rng.randint(10, 80))
+
+
+def html_body(rng: random.Random, size: int) -> str:
+    # Estrutura repetida com trechos variáveis, como páginas reais (comprime de forma realista)
+    blocks = []
+    length = 0
+    while length < size:
+        block = f'<div class="item" id="i{rng.getrandbits(32):x}"><a href="/p/{rng.getrandbits(24):x}">item {rng.randint(0, 9999)}</a></div>\n'
+        blocks.append(block)
+        length += len(block)
+    return "".join(blocks)
+
+
+def nuclei_finding(rng: random.Random, host: str, index: int, body_bytes: int) -> dict:
+    template = rng.choice(TEMPLATE_IDS)
+    path = f"/{template}/{index}"
+    return {
+        "template-id": template,
+        "info": {"name": template.replace("-", " ").title(), "severity": rng.choice(SEVERITIES),
+                 "tags": ["bench", template.split("-")[0]]},
+        "type": "http",
+        "host": host,
+        "matched-at": f"{host}{path}",
+        "ip": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+        "request": f"GET {path} HTTP/1.1\r\nHost: {host.split('//')[-1]}\r\nUser-Agent: Mozilla/5.0\r\n\r\n",
+        "response": "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<html><body>" + html_body(rng, body_bytes) + "</body></html>",
+        "timestamp": "2024-01-01T00:00:00Z",
+    }
+
+
+def fingerprint(finding: dict) -> str:
+    # Mesma identidade de app.findings.finding_fingerprint
+    parts = (finding.get("template-id", ""), finding.get("host", ""), finding.get("matched-at", ""), finding.get("matcher-name", ""))
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def target_rows(target_id: int, results_per_target: int, body_bytes: int, seed: int, now: datetime):
+    """Resultados de scan e achados de um target (ciclos subfinder → chaos → httpx → nuclei)"""
+    rng = random.Random(f"{seed}:{target_id}")
+    domain = f"t{target_id}.example-{target_id % 97}.com"
+    subdomains = [f"sub{i}.{domain}" for i in range(subdomain_count(rng))]
+    live = [f"https://{sub}" for sub in subdomains if rng.random() < 0.6] or [f"https://{domain}"]
+    vulns = [nuclei_finding(rng, rng.choice(live), i, body_bytes) for i in range(vulnerability_count(rng, len(live)))]
+
+    results, findings = [], {}
+    last_nuclei = None
+    started = now - timedelta(days=rng.randint(1, 90))
+    for index in range(results_per_target):
+        stage = STAGES[index % len(STAGES)]
+        if index and stage == "subfinder":
+            started += timedelta(days=rng.randint(1, 7))
+        status = "error" if rng.random() < 0.05 else "success"
+        data = None
+        if status == "success":
+            if stage == "subfinder":
+                data = {"status": "success", "subdomains": subdomains}
+            elif stage == "chaos":
+                data = {"status": "success", "subdomains": subdomains[::2]}
+            elif stage == "httpx":
+                data = {"status": "success", "live_hosts": live}
+            else:
+                # Parte dos achados some entre scans e fica resolvida no store
+                present = [vuln for vuln in vulns if rng.random() < 0.85]
+                data = {"status": "success", "results": present, "performance": {"shards": 1, "failed_shards": 0}}
+                last_nuclei = started
+                for vuln in present:
+                    key = fingerprint(vuln)
+                    row = findings.setdefault(key, {"finding": vuln, "first_seen": started, "occurrences": 0})
+                    row["last_seen"] = started
+                    row["occurrences"] += 1
+        results.append({
+            "target_id": target_id,
+            "scan_type": stage,
+            "status": status,
+            "result_data": json.dumps(data) if data is not None else None,
+            "error_msg": f"{stage} failed with return code 1" if status == "error" else None,
+            "started_at": started,
+            "completed_at": started + timedelta(seconds=rng.randint(5, 900)),
+        })
+
+    finding_rows = []
+    for key, row in findings.items():
+        vuln = row["finding"]
+        finding_rows.append({
+            "target_id": target_id,
+            "fingerprint": key,
+            "template_id": vuln["template-id"],
+            "template_name": vuln["info"]["name"],
+            "severity": vuln["info"]["severity"],
+            "host": vuln["host"],
+            "matched_at": vuln["matched-at"],
+            "matcher_name": None,
+            "finding_type": vuln["type"],
+            "data": json.dumps(vuln),
+            "status": "open" if row["last_seen"] == last_nuclei else "resolved",
+            "first_seen": row["first_seen"],
+            "last_seen": row["last_seen"],
+            "resolved_at": None if row["last_seen"] == last_nuclei else last_nuclei,
+            "occurrences": row["occurrences"],
+            "updated_at": row["last_seen"],
+        })
+    target = {
+        "id": target_id,
+        "domain_ip": domain,
+        "scan_status": "completed" if results and results[-1]["status"] == "success" else "error",
+        "group_name": GROUPS[target_id % len(GROUPS)],
+        "created_at": now - timedelta(days=120),
+        "last_scan": started if results else None,
+    }
+    return target, results, finding_rows
+
+
+def template_rows(count: int, seed: int) -> list:
+    rng = random.Random(f"{seed}:templates")
+    rows = []
+    for i in range(count):
+        template = TEMPLATE_IDS[i % len(TEMPLATE_IDS)]
+        matchers = "".join(f"      - \"{rng.getrandbits(64):x}\"\n" for _ in range(rng.randint(1, 40)))
+        rows.append({
+            "name": f"{template}-{i}.yaml",
+            "content": (f"id: {template}-{i}\ninfo:\n  name: {template} {i}\n  author: hawks\n  severity: {rng.choice(SEVERITIES)}\n"
+                        f"http:\n  - method: GET\n    path:\n      - \"{{{{BaseURL}}}}/{template}\"\n    matchers:\n"
+                        f"      - type: word\n        words:\n{matchers}"),
+            "enabled": rng.random() < 0.9,
+            "order_index": i,
+        })
+    return rows
+
+
+def seed(targets: int, results_per_target: int, templates: int = 200, body_bytes: int = 2048,
+         seed_value: int = 1, batch: int = 2000, progress=None) -> dict:
+    """Insere os dados no banco de DATABASE_URL (o ambiente precisa estar pronto antes do import do app)"""
+    sys.path.insert(0, ROOT)
+    from app.database import HawksFinding, HawksScanResult, HawksTarget, HawksTemplate, engine, init_db
+
+    init_db()
+    now = datetime.utcnow()
+    counts = {"targets": 0, "scan_results": 0, "findings": 0, "templates": templates}
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        if templates:
+            conn.execute(HawksTemplate.__table__.insert(), template_rows(templates, seed_value))
+        for offset in range(0, targets, batch):
+            target_batch, result_batch, finding_batch = [], [], []
+            for target_id in range(offset + 1, min(targets, offset + batch) + 1):
+                target, results, findings = target_rows(target_id, results_per_target, body_bytes, seed_value, now)
+                target_batch.append(target)
+                result_batch.extend(results)
+                finding_batch.extend(findings)
+            # Insert em lote pelo Core: CompressedText continua comprimindo result_data e data
+            conn.execute(HawksTarget.__table__.insert(), target_batch)
+            if result_batch:
+                conn.execute(HawksScanResult.__table__.insert(), result_batch)
+            if finding_batch:
+                conn.execute(HawksFinding.__table__.insert(), finding_batch)
+            counts["targets"] += len(target_batch)
+            counts["scan_results"] += len(result_batch)
+            counts["findings"] += len(finding_batch)
+            if progress:
+                progress(counts, time.perf_counter() - start)
+    counts["seconds"] = time.perf_counter() - start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Banco de destino (deve estar vazio)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="Volume pronto; --targets/--results-per-target sobrescrevem")
+    parser.add_argument("--targets", type=int, help="Quantidade de targets")
+    parser.add_argument("--results-per-target", type=int, help="scan_results por target (ciclos de 4 estágios)")
+    parser.add_argument("--templates", type=int, default=200, help="Templates cadastrados")
+    parser.add_argument("--body-bytes", type=int, default=2048, help="Tamanho do corpo da resposta em cada achado")
+    parser.add_argument("--seed", type=int, default=1, help="Semente dos dados")
+    args = parser.parse_args()
+
+    volume = dict(PROFILES[args.profile or "small"])
+    if args.targets is not None:
+        volume["targets"] = args.targets
+    if args.results_per_target is not None:
+        volume["results_per_target"] = args.results_per_target
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("ADMIN_USERNAME", "bench")
+    os.environ.setdefault("ADMIN_PASSWORD", "bench")
+    os.environ["DATABASE_URL"] = args.database_url
+
+    def progress(counts, elapsed):
+        print(f"\r{counts['targets']:,} targets | {counts['scan_results']:,} scan_results | "
+              f"{counts['findings']:,} findings | {elapsed:.0f}s", end="", file=sys.stderr, flush=True)
+
+    counts = seed(volume["targets"], volume["results_per_target"], args.templates, args.body_bytes, args.seed, progress=progress)
+    print(file=sys.stderr)
+    print(f"✅ {counts['targets']:,} targets, {counts['scan_results']:,} scan_results, {counts['findings']:,} findings "
+          f"e {counts['templates']} templates em {counts['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
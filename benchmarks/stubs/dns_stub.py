@@ -0,0 +1,117 @@
+"""Servidor DNS falso (UDP) para testar e medir o pré-filtro DNS sem tocar a rede.
+
+Responde consultas A/AAAA de forma determinística: um nome resolve quando o
+mesmo sorteio usado pelo httpx falso fica abaixo de HAWKS_STUB_RESOLVE_RATIO.
+Com RESOLVE_RATIO >= ALIVE_RATIO todo host que o httpx falso considera vivo
+resolve, e o restante dos nomes resolvidos são hosts sem HTTP. Nas zonas com
+wildcard (HAWKS_STUB_WILDCARD_RATIO ou "-w" no nome do target) só uma fração
+pequena dos nomes tem registro próprio; qualquer outro nome, inclusive rótulos
+aleatórios, resolve para o endereço do host coringa.
+
+Variáveis de ambiente:
+    HAWKS_STUB_RESOLVE_RATIO        fração dos nomes que resolvem (padrão 0.8)
+    HAWKS_STUB_WILDCARD_REAL_RATIO  fração dos nomes com registro próprio nas zonas com wildcard (padrão 0.05)
+    HAWKS_STUB_DNS_DROP             probabilidade de ignorar uma consulta, para exercitar timeouts e retries (padrão 0)
+    HAWKS_STUB_DNS_LATENCY          segundos antes de cada resposta (padrão 0)
+
+Uso:
+    python benchmarks/stubs/dns_stub.py --port 5353
+    DNS_PREFILTER=true DNS_RESOLVERS=127.0.0.1:5353 uvicorn main:app
+"""
+import argparse
+import asyncio
+import random
+import re
+import struct
+import sys
+
+from hawks_stub import env_float, seeded, wildcard_zone
+
+TYPE_A = 1
+TYPE_AAAA = 28
+
+
+def resolves(name: str) -> bool:
+    """O nome tem registro próprio (só nomes gerados pelo subfinder/chaos falsos)"""
+    if not re.match(r"(sub|chaos)\d+\.", name):
+        return False
+    if wildcard_zone(name):
+        return seeded("alive", name).random() < env_float("HAWKS_STUB_WILDCARD_REAL_RATIO", 0.05)
+    return seeded("alive", name).random() < env_float("HAWKS_STUB_RESOLVE_RATIO", 0.8)
+
+
+def answer(query: bytes) -> bytes:
+    query_id, _, qdcount = struct.unpack("!HHH", query[:6])
+    offset, labels = 12, []
+    while query[offset]:
+        length = query[offset]
+        labels.append(query[offset + 1:offset + 1 + length].decode("ascii"))
+        offset += length + 1
+    qtype, _ = struct.unpack("!HH", query[offset + 1:offset + 5])
+    question = query[12:offset + 5]
+    name = ".".join(labels).lower()
+
+    if resolves(name):
+        rng = seeded("address", name)
+    elif wildcard_zone(name):
+        rng = seeded("address", "*." + name.split(".", 1)[1])
+    else:
+        return struct.pack("!HHHHHH", query_id, 0x8183, qdcount, 0, 0, 0) + question  # NXDOMAIN
+    if qtype == TYPE_A:
+        rdata = bytes([10, rng.randrange(256), rng.randrange(256), rng.randrange(1, 255)])
+    elif qtype == TYPE_AAAA:
+        rdata = bytes([0xfd, 0] + [rng.randrange(256) for _ in range(14)])
+    else:
+        return struct.pack("!HHHHHH", query_id, 0x8180, qdcount, 0, 0, 0) + question  # NOERROR sem registros
+    record = b"\xc0\x0c" + struct.pack("!HHIH", qtype, 1, 300, len(rdata)) + rdata
+    return struct.pack("!HHHHHH", query_id, 0x8180, qdcount, 1, 0, 0) + question + record
+
+
+class StubDnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.queries = 0
+        self.drop = env_float("HAWKS_STUB_DNS_DROP", 0)
+        self.latency = env_float("HAWKS_STUB_DNS_LATENCY", 0)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        if self.drop and random.random() < self.drop:
+            return
+        try:
+            response = answer(data)
+        except (IndexError, struct.error, UnicodeDecodeError):
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+async def serve(host: str, port: int):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(StubDnsProtocol, local_addr=(host, port))
+    # A primeira linha da saída é a porta (útil com --port 0)
+    print(transport.get_extra_info("sockname")[1], flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5353, help="Porta UDP (0 = escolhida pelo sistema)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
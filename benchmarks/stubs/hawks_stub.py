@@ -0,0 +1,198 @@
+"""Ferramentas falsas (subfinder, httpx, nuclei, chaos) para benchmarks offline.
+
+Aceitam os mesmos argumentos que o scanner passa às ferramentas reais e geram
+saída sintética, determinística por target. O volume de subdomínios vem do
+nome do target (`t1-s5000.bench.local` gera 5000) ou de HAWKS_STUB_SUBDOMAINS.
+
+Variáveis de ambiente:
+    HAWKS_STUB_SUBDOMAINS          subdomínios por target quando o nome não tem -s<N> (padrão 20)
+    HAWKS_STUB_CHAOS_RATIO         subdomínios do chaos em relação ao subfinder (padrão 0.5, metade repetidos)
+    HAWKS_STUB_ALIVE_RATIO         fração dos subdomínios que o httpx responde como vivos (padrão 0.6)
+    HAWKS_STUB_WILDCARD_RATIO      fração dos targets com DNS wildcard (padrão 0; targets com "-w" no nome sempre têm)
+    HAWKS_STUB_FINDINGS_PER_HOST   achados do nuclei por host vivo, pode ser fracionário (padrão 0.3)
+    HAWKS_STUB_DEAD_HOST_SECONDS   tempo que o httpx gasta em cada host que não responde, dividido pelo -c (padrão 0)
+    HAWKS_STUB_BODY_BYTES          tamanho do corpo da resposta em cada achado (padrão 2048)
+    HAWKS_STUB_LINES_PER_SEC       ritmo de saída em linhas/s (0 = sem limite)
+    HAWKS_STUB_LATENCY             segundos de espera antes de produzir qualquer saída
+    HAWKS_STUB_FAIL                probabilidade de falha por ferramenta, ex.: "httpx=0.1,nuclei=0.05"
+    HAWKS_STUB_TIMEOUT             probabilidade de travar por ferramenta, ex.: "subfinder=0.01"
+    HAWKS_STUB_HANG_SECONDS        quanto tempo a ferramenta trava antes de desistir (padrão 30)
+    HAWKS_STUB_SEED                semente das escolhas aleatórias (padrão 1)
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+
+TEMPLATES = ("bench-exposed-panel", "bench-git-exposure", "bench-cors-misconfig", "bench-default-login")
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_ratios(name: str) -> dict:
+    ratios = {}
+    for item in os.environ.get(name, "").split(","):
+        tool, _, value = item.partition("=")
+        if tool.strip() and value.strip():
+            ratios[tool.strip()] = float(value)
+    return ratios
+
+
+def option(args: list, flag: str):
+    if flag in args:
+        index = args.index(flag)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return None
+
+
+def seeded(*parts) -> random.Random:
+    key = "|".join([os.environ.get("HAWKS_STUB_SEED", "1")] + [str(part) for part in parts])
+    return random.Random(int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:16], 16))
+
+
+class Emitter:
+    """Escreve linhas respeitando HAWKS_STUB_LINES_PER_SEC"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.rate = env_float("HAWKS_STUB_LINES_PER_SEC", 0)
+        self.start = time.monotonic()
+        self.count = 0
+
+    def line(self, text: str):
+        self.stream.write(text + "\n")
+        self.count += 1
+        if self.rate:
+            ahead = self.count / self.rate - (time.monotonic() - self.start)
+            if ahead > 0:
+                self.stream.flush()
+                time.sleep(ahead)
+
+
+def apply_faults(tool: str, identity: str):
+    """Aplica latência, falhas e travamentos configurados"""
+    latency = env_float("HAWKS_STUB_LATENCY", 0)
+    if latency:
+        time.sleep(latency)
+    rng = seeded(tool, identity, "faults")
+    if rng.random() < env_ratios("HAWKS_STUB_TIMEOUT").get(tool, 0):
+        time.sleep(env_float("HAWKS_STUB_HANG_SECONDS", 30))
+        sys.stderr.write(f"{tool}: stub timed out\n")
+        sys.exit(124)
+    if rng.random() < env_ratios("HAWKS_STUB_FAIL").get(tool, 0):
+        sys.stderr.write(f"{tool}: stub failure\n")
+        sys.exit(2)
+
+
+def wildcard_zone(host: str) -> bool:
+    """A zona pai do host responde qualquer nome (e o host coringa responde HTTP para todos)"""
+    zone = host.split(".", 1)[1] if "." in host else ""
+    if not zone:
+        return False
+    if re.search(r"-w(?:\.|$|-)", zone.split(".", 1)[0]):
+        return True
+    return seeded("wildcard", zone).random() < env_float("HAWKS_STUB_WILDCARD_RATIO", 0)
+
+
+def subdomain_count(target: str) -> int:
+    match = re.search(r"-s(\d+)(?:[.-]|$)", target)
+    if match:
+        return int(match.group(1))
+    return int(env_float("HAWKS_STUB_SUBDOMAINS", 20))
+
+
+def subfinder(args: list):
+    target = option(args, "-d") or "example.com"
+    apply_faults("subfinder", target)
+    with open(option(args, "-o"), "w", encoding="utf-8") as output:
+        emitter = Emitter(output)
+        for i in range(subdomain_count(target)):
+            emitter.line(f"sub{i}.{target}")
+
+
+def chaos(args: list):
+    target = option(args, "-d") or "example.com"
+    apply_faults("chaos", target)
+    emitter = Emitter(sys.stdout)
+    count = int(subdomain_count(target) * env_float("HAWKS_STUB_CHAOS_RATIO", 0.5))
+    for i in range(count):
+        # Metade coincide com o subfinder, metade é nova
+        emitter.line(f"sub{i}.{target}" if i % 2 == 0 else f"chaos{i}.{target}")
+
+
+def httpx(args: list):
+    input_file = option(args, "-l")
+    apply_faults("httpx", input_file)
+    alive_ratio = env_float("HAWKS_STUB_ALIVE_RATIO", 0.6)
+    dead = 0
+    with open(input_file, "r", encoding="utf-8") as hosts, open(option(args, "-o"), "w", encoding="utf-8") as output:
+        emitter = Emitter(output)
+        for host in hosts:
+            host = host.strip()
+            if not host:
+                continue
+            if seeded("alive", host).random() < alive_ratio or wildcard_zone(host):
+                emitter.line(f"https://{host}")
+            else:
+                dead += 1
+    # Hosts mortos custam o timeout inteiro, em paralelo conforme o -c (o httpx real usa 50 por padrão)
+    dead_seconds = env_float("HAWKS_STUB_DEAD_HOST_SECONDS", 0)
+    if dead and dead_seconds:
+        time.sleep(dead * dead_seconds / max(1, int(option(args, "-c") or 50)))
+
+
+def nuclei(args: list):
+    if "--version" in args:
+        print("Nuclei Engine Version: v3.0.0-stub")
+        return
+    if "-tl" in args:
+        for template in TEMPLATES:
+            print(f"{template}.yaml")
+        return
+
+    hosts_file = option(args, "-l")
+    with open(hosts_file, "r", encoding="utf-8") as f:
+        hosts = [line.strip() for line in f if line.strip()]
+    apply_faults("nuclei", ",".join(hosts[:3]) + f"#{len(hosts)}")
+
+    per_host = env_float("HAWKS_STUB_FINDINGS_PER_HOST", 0.3)
+    body_bytes = int(env_float("HAWKS_STUB_BODY_BYTES", 2048))
+    emitter = Emitter(sys.stdout)
+    for host in hosts:
+        rng = seeded("findings", host)
+        count = int(per_host) + (1 if rng.random() < per_host - int(per_host) else 0)
+        for n in range(count):
+            template = TEMPLATES[(n + rng.randrange(len(TEMPLATES))) % len(TEMPLATES)]
+            body = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz <>/=\"") for _ in range(body_bytes))
+            emitter.line(json.dumps({
+                "template-id": template,
+                "info": {"name": template.replace("-", " ").title(), "severity": rng.choice(SEVERITIES)},
+                "type": "http",
+                "host": host,
+                "matched-at": f"{host}/{template}/{n}",
+                "request": f"GET /{template}/{n} HTTP/1.1\r\nHost: {host.split('//')[-1]}\r\n\r\n",
+                "response": f"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<html>{body}</html>",
+                "timestamp": "2024-01-01T00:00:00Z",
+            }))
+
+
+TOOLS = {"subfinder": subfinder, "chaos": chaos, "httpx": httpx, "nuclei": nuclei}
+
+
+def main(tool: str):
+    TOOLS[tool](sys.argv[1:])
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main(os.path.basename(sys.argv[0]))
@@ -1,44 +1,72 @@
 from fastapi import FastAPI, Request, Depends, HTTPException, Form, BackgroundTasks, status, UploadFile, File
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-import json
+from sqlalchemy.orm import Session, undefer
+from datetime import datetime, timedelta, timezone
 import asyncio
 import jwt
-import zipfile
-import yaml
 import tempfile
-import shutil
-import git
 import os
 import secrets
 import hashlib
 import time
 import re
 from urllib.parse import urlparse
+from contextlib import asynccontextmanager
 from typing import List, Optional
-from passlib.context import CryptContext
 import html
+import base64
 
-from app.database import get_db, init_db, HawksTarget as HawksTargetDB, HawksTemplate as HawksTemplateDB, HawksScanResult, HawksSettings as HawksSettingsDB
+from app import jsonio
+from app.jsonio import HawksJSONResponse
+from app.database import get_db, init_db, HawksTarget as HawksTargetDB, HawksTemplate as HawksTemplateDB, HawksScanResult, HawksScanCheckpoint, HawksScanSummary, HawksFinding, HawksScanSchedule, HawksSettings as HawksSettingsDB, data_version
 from app.schemas import HawksTargetCreate, HawksTarget, HawksTemplateCreate, HawksTemplate, HawksLoginRequest, HawksSettings
-from app.scanner import hawks_scanner
+from app.maintenance import hawks_maintenance
+from app.loop_monitor import hawks_loop_monitor
+from app.scheduler import hawks_scheduler
+from app.retention import build_trends
+from app.render_cache import hawks_render_cache
+from app.export import EXPORT_DATASETS, EXPORT_FORMATS, HawksExportFilters, stream_export
+from app.scan_queue import PRIORITY_INTERACTIVE, PRIORITY_SELECTED, PRIORITY_SCAN_ALL
 from app.config import hawks_config
+from app.security import HawksLoginLimiter, HawksTokenCache, decode_token
 
 # Security setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = None
+
+def get_pwd_context():
+    """CryptContext criado no primeiro uso (passlib/bcrypt são lentos para importar)"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 # Rate limiting storage
-login_attempts = {}
 RATE_LIMIT_ATTEMPTS = 5
 RATE_LIMIT_WINDOW = 900  # 15 minutes
+login_limiter = HawksLoginLimiter(RATE_LIMIT_ATTEMPTS, RATE_LIMIT_WINDOW, hawks_config.login_limiter_max_ips)
+# Tokens já verificados (até expirarem): requests autenticados não decodificam o JWT de novo
+token_cache = HawksTokenCache(hawks_config.token_cache_entries)
+
+def get_scanner():
+    """Scanner criado no lifespan; o módulo e o construtor (sondagem de CPU/memória) ficam fora do import"""
+    from app.scanner import get_hawks_scanner
+    return get_hawks_scanner()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_database()
+    await startup_event()
+    yield
+    await shutdown_event()
 
-app = FastAPI(title="Hawks", docs_url=None, redoc_url=None, debug=False)
+app = FastAPI(title="Hawks", docs_url=None, redoc_url=None, debug=False, default_response_class=HawksJSONResponse, lifespan=lifespan)
 
 # Security middleware
 app.add_middleware(
@@ -53,36 +81,37 @@ templates = Jinja2Templates(directory="app/templates")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 security = HTTPBearer(auto_error=False)
 
-# Initialize database with error handling
-try:
-    print("Hawks - Initializing database...")
-    init_db()
-    print("Hawks - Database initialized successfully")
-except Exception as e:
-    print(f"Hawks - Database initialization error: {e}")
-    print("Hawks - Attempting to create database directory and retry...")
-    
-    # Try to create the database directory and retry
+def init_database():
+    """Initialize database with error handling (chamado no lifespan, não no import)"""
     try:
-        # Create the current directory if it doesn't exist
-        if not os.path.exists('.'):
-            os.makedirs('.', exist_ok=True)
-        
-        # Retry database initialization
+        print("Hawks - Initializing database...")
         init_db()
-        print("Hawks - Database initialized successfully on retry")
-    except Exception as retry_error:
-        print(f"Hawks - Database initialization failed on retry: {retry_error}")
-        print("Hawks - Application will continue but database operations may fail")
+        print("Hawks - Database initialized successfully")
+    except Exception as e:
+        print(f"Hawks - Database initialization error: {e}")
+        print("Hawks - Attempting to create database directory and retry...")
+        
+        # Try to create the database directory and retry
+        try:
+            # Create the current directory if it doesn't exist
+            if not os.path.exists('.'):
+                os.makedirs('.', exist_ok=True)
+            
+            # Retry database initialization
+            init_db()
+            print("Hawks - Database initialized successfully on retry")
+        except Exception as retry_error:
+            print(f"Hawks - Database initialization failed on retry: {retry_error}")
+            print("Hawks - Application will continue but database operations may fail")
 
 # Security functions
 def verify_password(plain_password, hashed_password):
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def get_or_create_settings(db: Session) -> HawksSettingsDB:
     """Obtém as configurações do banco de dados, criando se não existirem."""
@@ -96,36 +125,11 @@ def get_or_create_settings(db: Session) -> HawksSettingsDB:
 
 def is_rate_limited(ip_address: str) -> bool:
     """Check if IP is rate limited"""
-    current_time = time.time()
-    
-    # Clean old entries
-    for ip in list(login_attempts.keys()):
-        if current_time - login_attempts[ip]['last_attempt'] > RATE_LIMIT_WINDOW:
-            del login_attempts[ip]
-    
-    if ip_address not in login_attempts:
-        return False
-    
-    attempts = login_attempts[ip_address]
-    if attempts['count'] >= RATE_LIMIT_ATTEMPTS:
-        if current_time - attempts['last_attempt'] < RATE_LIMIT_WINDOW:
-            return True
-        else:
-            # Reset after window
-            del login_attempts[ip_address]
-            return False
-    
-    return False
+    return login_limiter.is_limited(ip_address)
 
 def record_failed_login(ip_address: str):
     """Record a failed login attempt"""
-    current_time = time.time()
-    
-    if ip_address not in login_attempts:
-        login_attempts[ip_address] = {'count': 0, 'last_attempt': current_time}
-    
-    login_attempts[ip_address]['count'] += 1
-    login_attempts[ip_address]['last_attempt'] = current_time
+    login_limiter.record_failure(ip_address)
 
 def validate_domain_input(domain: str) -> str:
     """Validate and sanitize domain input"""
@@ -168,6 +172,7 @@ def sanitize_filename(filename: str) -> str:
 
 def validate_yaml_content(content: str) -> bool:
     """Validate YAML content for security"""
+    import yaml
     try:
         # Parse YAML safely
         data = yaml.safe_load(content)
@@ -187,6 +192,55 @@ def validate_yaml_content(content: str) -> bool:
     except yaml.YAMLError:
         return False
 
+def parse_scan_mode(mode: str) -> bool:
+    """resume = continuar do último estágio concluído, restart = recomeçar do subfinder"""
+    if mode not in ("resume", "restart"):
+        raise HTTPException(status_code=400, detail="mode must be 'resume' or 'restart'")
+    return mode == "resume"
+
+# Campos disponíveis na API v1 (fields= projeta um subconjunto)
+API_V1_TARGET_FIELDS = ("id", "domain_ip", "scan_status", "group_name", "created_at", "last_scan")
+API_V1_RESULT_FIELDS = (
+    "id", "target_id", "scan_type", "status", "error_msg", "started_at", "completed_at",
+    "item_count", "severity_counts", "data"
+)
+API_V1_MAX_LIMIT = 500
+
+def parse_fields(fields: Optional[str], allowed: tuple) -> tuple:
+    if not fields:
+        return allowed
+    selected = tuple(dict.fromkeys(item.strip() for item in fields.split(",") if item.strip()))
+    unknown = [item for item in selected if item not in allowed]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"unknown fields: {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+    return selected
+
+def encode_page_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+def decode_page_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, value = raw.split(":", 1)
+        if prefix != "id":
+            raise ValueError(raw)
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 quando nada foi commitado no banco (por qualquer processo) desde a versão que o cliente já tem"""
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+def versioned_response(payload, etag: str) -> HawksJSONResponse:
+    # A versão é lida na sessão do request antes da consulta, na mesma transação de leitura:
+    # o ETag nunca fica à frente das linhas devolvidas
+    return HawksJSONResponse(jsonable_encoder(payload), headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
 @app.middleware("http")
 async def security_headers(request: Request, call_next):
     """Add security headers to all responses"""
@@ -213,19 +267,25 @@ async def security_headers(request: Request, call_next):
     
     return response
 
-@app.on_event("startup")
 async def startup_event():
     """Inicializa serviços quando a aplicação sobe"""
     print("Hawks - Iniciando serviços...")
     # Iniciar o processador de fila automaticamente
-    await hawks_scanner.start_queue_processor()
+    await get_scanner().start_queue_processor()
     print("Hawks - Processador de fila iniciado")
+    # Manutenção do banco em background (compressão e retenção de resultados antigos)
+    hawks_maintenance.start()
+    hawks_loop_monitor.start()
+    # Scans recorrentes entram na fila aos poucos, espalhados pelo período de cada agenda
+    hawks_scheduler.start()
 
-@app.on_event("shutdown")
 async def shutdown_event():
     """Limpa recursos quando a aplicação é encerrada"""
     print("Hawks - Encerrando serviços...")
-    await hawks_scanner.stop_queue_processor()
+    await hawks_scheduler.stop()
+    await get_scanner().stop_queue_processor()
+    await hawks_maintenance.stop()
+    await hawks_loop_monitor.stop()
     print("Hawks - Serviços encerrados")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -239,14 +299,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, hawks_config.secret_key, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
-    except jwt.PyJWTError:
-        return None
+    return decode_token(token, hawks_config.secret_key, token_cache)
 
 def get_current_user(request: Request):
     token = request.cookies.get("access_token")
@@ -313,8 +366,7 @@ async def login(request: Request, username: str = Form(...), password: str = For
         )
         
         # Clear failed attempts on successful login
-        if client_ip in login_attempts:
-            del login_attempts[client_ip]
+        login_limiter.reset(client_ip)
         
         return response
     
@@ -323,7 +375,10 @@ async def login(request: Request, username: str = Form(...), password: str = For
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.get("/logout")
-async def logout():
+async def logout(request: Request):
+    token = request.cookies.get("access_token")
+    if token:
+        token_cache.discard(token)
     response = RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
     response.delete_cookie("access_token")
     return response
@@ -365,16 +420,19 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
     if not user:
         return RedirectResponse(url="/login")
     
-    targets_count = db.query(HawksTargetDB).count()
-    templates_count = db.query(HawksTemplateDB).count()
-    recent_scans = db.query(HawksScanResult).order_by(HawksScanResult.started_at.desc()).limit(5).all()
-    
-    return templates.TemplateResponse("dashboard.html", {
-        "request": request,
-        "targets_count": targets_count,
-        "templates_count": templates_count,
-        "recent_scans": recent_scans
-    })
+    def render():
+        targets_count = db.query(HawksTargetDB).count()
+        templates_count = db.query(HawksTemplateDB).count()
+        recent_scans = db.query(HawksScanResult).order_by(HawksScanResult.started_at.desc()).limit(5).all()
+        
+        return templates.TemplateResponse("dashboard.html", {
+            "request": request,
+            "targets_count": targets_count,
+            "templates_count": templates_count,
+            "recent_scans": recent_scans
+        })
+    
+    return hawks_render_cache.respond(request, "dashboard", render, db=db)
 
 @app.get("/targets", response_class=HTMLResponse)
 async def targets_page(request: Request, db: Session = Depends(get_db)):
@@ -382,13 +440,21 @@ async def targets_page(request: Request, db: Session = Depends(get_db)):
     if not user:
         return RedirectResponse(url="/login")
     
-    targets = db.query(HawksTargetDB).all()
-    queue_status = hawks_scanner.get_queue_status()
-    return templates.TemplateResponse("targets.html", {
-        "request": request, 
-        "targets": targets,
-        "queue_status": queue_status
-    })
+    queue_status = get_scanner().get_queue_status()
+    
+    def render():
+        targets = db.query(HawksTargetDB).all()
+        return templates.TemplateResponse("targets.html", {
+            "request": request, 
+            "targets": targets,
+            "queue_status": queue_status
+        })
+    
+    # A fila vive em memória: os campos exibidos entram na chave do cache
+    queue_key = tuple(queue_status[field] for field in (
+        "active_scans", "queued_scans", "max_concurrent", "scan_threads", "queue_processor_running"
+    ))
+    return hawks_render_cache.respond(request, "targets", render, extra=queue_key, db=db)
 
 @app.post("/targets")
 async def create_target(request: Request, domain_ip: str = Form(...), db: Session = Depends(get_db)):
@@ -413,10 +479,12 @@ async def create_target(request: Request, domain_ip: str = Form(...), db: Sessio
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/targets/{target_id}/scan")
-async def scan_target(request: Request, target_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def scan_target(request: Request, target_id: int, background_tasks: BackgroundTasks,
+                      mode: str = "resume", db: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    resume = parse_scan_mode(mode)
     
     target = db.query(HawksTargetDB).filter(HawksTargetDB.id == target_id).first()
     if not target:
@@ -426,7 +494,10 @@ async def scan_target(request: Request, target_id: int, background_tasks: Backgr
     target.last_scan = datetime.utcnow()
     db.commit()
     
-    background_tasks.add_task(hawks_scanner.scan_target, target_id, target.domain_ip, db)
+    background_tasks.add_task(
+        get_scanner().scan_target, target_id, target.domain_ip, db,
+        priority=PRIORITY_INTERACTIVE, group=target.group_name, resume=resume
+    )
     return {"status": "started"}
 
 @app.post("/targets/{target_id}/stop-scan")
@@ -440,7 +511,7 @@ async def stop_scan(request: Request, target_id: int, db: Session = Depends(get_
         raise HTTPException(status_code=404, detail="Target not found")
     
     # Parar o scan no scanner
-    hawks_scanner.stop_scan(target_id)
+    get_scanner().stop_scan(target_id)
     
     # Atualizar status no banco
     target.scan_status = "stopped"
@@ -459,6 +530,10 @@ async def delete_target(request: Request, target_id: int, db: Session = Depends(
         raise HTTPException(status_code=404, detail="Target not found")
     
     db.delete(target)
+    # Checkpoints e achados não podem sobreviver ao target (o id pode ser reutilizado)
+    db.query(HawksScanCheckpoint).filter(HawksScanCheckpoint.target_id == target_id).delete(synchronize_session=False)
+    db.query(HawksFinding).filter(HawksFinding.target_id == target_id).delete(synchronize_session=False)
+    db.query(HawksScanSchedule).filter(HawksScanSchedule.target_id == target_id).delete(synchronize_session=False)
     db.commit()
     return {"status": "deleted"}
 
@@ -468,8 +543,12 @@ async def scans_page(request: Request, db: Session = Depends(get_db)):
     if not user:
         return RedirectResponse(url="/login")
     
-    scan_results = db.query(HawksScanResult).order_by(HawksScanResult.started_at.desc()).all()
-    return templates.TemplateResponse("scans.html", {"request": request, "scan_results": scan_results})
+    def render():
+        # A página exibe os payloads: carregar result_data na mesma query
+        scan_results = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).order_by(HawksScanResult.started_at.desc()).all()
+        return templates.TemplateResponse("scans.html", {"request": request, "scan_results": scan_results})
+    
+    return hawks_render_cache.respond(request, "scans", render, db=db)
 
 @app.get("/templates", response_class=HTMLResponse)
 async def templates_page(request: Request, db: Session = Depends(get_db)):
@@ -477,59 +556,64 @@ async def templates_page(request: Request, db: Session = Depends(get_db)):
     if not user:
         return RedirectResponse(url="/login")
     
-    templates_list = db.query(HawksTemplateDB).order_by(HawksTemplateDB.order_index).all()
-    return templates.TemplateResponse("templates.html", {"request": request, "templates": templates_list})
+    def render():
+        templates_list = db.query(HawksTemplateDB).order_by(HawksTemplateDB.order_index).all()
+        return templates.TemplateResponse("templates.html", {"request": request, "templates": templates_list})
+    
+    return hawks_render_cache.respond(request, "templates", render, db=db)
 
 @app.get("/nuclei-results", response_class=HTMLResponse)
-async def nuclei_results_page(request: Request, db: Session = Depends(get_db)):
+async def nuclei_results_page(request: Request, status: str = "", db: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login")
     
-    # Buscar apenas resultados do nuclei
-    nuclei_results = db.query(HawksScanResult).filter(
-        HawksScanResult.scan_type == "nuclei",
-        HawksScanResult.status == "success"
-    ).order_by(HawksScanResult.started_at.desc()).all()
+    if status not in ("open", "resolved"):
+        status = ""
     
-    # Buscar informações dos targets
-    targets_info = {}
-    for result in nuclei_results:
-        if result.target_id not in targets_info:
-            target = db.query(HawksTargetDB).filter(HawksTargetDB.id == result.target_id).first()
-            targets_info[result.target_id] = target.domain_ip if target else "Target removido"
+    def render():
+        # Achados deduplicados entre scans (um registro por vulnerabilidade)
+        query = db.query(HawksFinding).options(undefer(HawksFinding.data))
+        if status:
+            query = query.filter(HawksFinding.status == status)
+        findings = query.order_by(HawksFinding.last_seen.desc()).all()
+        
+        # Buscar informações dos targets
+        target_ids = {finding.target_id for finding in findings}
+        targets_info = {
+            target.id: target.domain_ip
+            for target in db.query(HawksTargetDB).filter(HawksTargetDB.id.in_(target_ids))
+        } if target_ids else {}
+        
+        processed_results = []
+        for finding in findings:
+            try:
+                vuln = jsonio.loads(finding.data) if finding.data else {}
+            except jsonio.JSONDecodeError:
+                vuln = {}
+            processed_results.append({
+                "target_name": targets_info.get(finding.target_id, "Target removido"),
+                "target_id": finding.target_id,
+                "scan_date": finding.last_seen,
+                "first_seen": finding.first_seen,
+                "occurrences": finding.occurrences,
+                "status": finding.status,
+                "template_id": finding.template_id or "N/A",
+                "template_name": finding.template_name or "N/A",
+                "severity": finding.severity or "info",
+                "matched_at": finding.matched_at or "N/A",
+                "host": finding.host or "N/A",
+                "type": finding.finding_type or "N/A",
+                "vulnerability": vuln
+            })
+        
+        return templates.TemplateResponse("nuclei_results.html", {
+            "request": request, 
+            "nuclei_results": processed_results,
+            "total_vulnerabilities": len(processed_results)
+        })
     
-    # Processar os resultados para extrair vulnerabilidades
-    processed_results = []
-    for result in nuclei_results:
-        try:
-            result_data = json.loads(result.result_data)
-            vulnerabilities = result_data.get("results", [])
-            
-            for vuln in vulnerabilities:
-                processed_results.append({
-                    "target_name": targets_info[result.target_id],
-                    "target_id": result.target_id,
-                    "scan_date": result.started_at,
-                    "template_id": vuln.get("template-id", "N/A"),
-                    "template_name": vuln.get("info", {}).get("name", "N/A"),
-                    "severity": vuln.get("info", {}).get("severity", "info"),
-                    "matched_at": vuln.get("matched-at", "N/A"),
-                    "host": vuln.get("host", "N/A"),
-                    "type": vuln.get("type", "N/A"),
-                    "vulnerability": vuln
-                })
-        except (json.JSONDecodeError, KeyError):
-            continue
-    
-    # Ordenar por data mais recente
-    processed_results.sort(key=lambda x: x["scan_date"], reverse=True)
-    
-    return templates.TemplateResponse("nuclei_results.html", {
-        "request": request, 
-        "nuclei_results": processed_results,
-        "total_vulnerabilities": len(processed_results)
-    })
+    return hawks_render_cache.respond(request, "nuclei-results", render, params=(status,), db=db)
 
 @app.post("/templates")
 async def create_template(
@@ -654,6 +738,7 @@ async def upload_template(
     os.makedirs(custom_dir, exist_ok=True)
     
     if file.content_type == "application/zip" or safe_filename.endswith('.zip'):
+        import zipfile
         with tempfile.TemporaryDirectory() as tmpdirname:
             zip_path = f"{tmpdirname}/{safe_filename}"
             
@@ -773,6 +858,8 @@ async def clone_templates_from_github(
     if not user:
         return RedirectResponse(url="/login")
     
+    # GitPython só é carregado quando alguém importa templates de um repositório
+    import git
     try:
         # Validar URL do GitHub
         parsed_url = urlparse(github_url)
@@ -850,9 +937,188 @@ async def api_get_scan_results(request: Request, target_id: int, db: Session = D
     user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    results = db.query(HawksScanResult).filter(HawksScanResult.target_id == target_id).all()
+    results = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).filter(HawksScanResult.target_id == target_id).all()
     return results
 
+@app.get("/api/targets/{target_id}/trends")
+async def api_get_target_trends(request: Request, target_id: int, scan_type: Optional[str] = None,
+                                limit: int = 100, db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    # Resumos sobrevivem à retenção: a série inclui scans cuja saída bruta já foi compactada
+    query = db.query(HawksScanSummary).filter(HawksScanSummary.target_id == target_id)
+    if scan_type:
+        query = query.filter(HawksScanSummary.scan_type == scan_type)
+    summaries = query.order_by(HawksScanSummary.started_at.desc(), HawksScanSummary.id.desc()).limit(min(max(limit, 1), 1000)).all()
+    summaries.reverse()
+    
+    trends = {}
+    for summary in summaries:
+        trends.setdefault(summary.scan_type, []).append(summary)
+    return {"target_id": target_id, "trends": {name: build_trends(items) for name, items in trends.items()}}
+
+@app.get("/api/maintenance-status")
+async def api_maintenance_status(request: Request):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return hawks_maintenance.status()
+
+@app.post("/api/maintenance/convert-vacuum")
+async def api_maintenance_convert_vacuum(request: Request):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    # VACUUM completo: bloqueia escritas enquanto o arquivo é reescrito
+    converted = await hawks_maintenance.convert_vacuum()
+    return {"status": "converted" if converted else "unchanged"}
+
+@app.get("/api/loop-status")
+async def api_loop_status(request: Request):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return hawks_loop_monitor.status()
+
+@app.get("/api/export/{dataset}")
+async def api_export(request: Request, dataset: str, format: str = "ndjson", target_id: Optional[int] = None,
+                     severity: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     cursor: Optional[str] = None, include_data: bool = False):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"dataset must be one of: {', '.join(EXPORT_DATASETS)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if cursor is not None and not re.fullmatch(r"[A-Za-z0-9_.-]{1,64}", cursor):
+        raise HTTPException(status_code=400, detail="cursor must be 1-64 chars of letters, digits, '.', '_' or '-'")
+    
+    filters = HawksExportFilters(
+        target_id=target_id,
+        severities=[item.strip().lower() for item in severity.split(",") if item.strip()] if severity else None,
+        # Datas com fuso são convertidas para UTC ingênuo, como estão gravadas no banco
+        since=since.astimezone(timezone.utc).replace(tzinfo=None) if since and since.tzinfo else since,
+        until=until.astimezone(timezone.utc).replace(tzinfo=None) if until and until.tzinfo else until,
+        cursor=cursor,
+        include_data=include_data
+    )
+    # Gerador síncrono: o Starlette o consome em threadpool sem travar o event loop
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"hawks-{dataset}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        stream_export(dataset, format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/v1/targets")
+async def api_v1_targets(request: Request, cursor: Optional[str] = None, limit: int = 100,
+                         fields: Optional[str] = None, db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    etag = data_version.etag(db)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    selected = parse_fields(fields, API_V1_TARGET_FIELDS)
+    after_id = decode_page_cursor(cursor)
+    limit = min(max(limit, 1), API_V1_MAX_LIMIT)
+    columns = [getattr(HawksTargetDB, field) for field in dict.fromkeys(("id",) + selected)]
+    query = db.query(*columns)
+    if after_id is not None:
+        query = query.filter(HawksTargetDB.id > after_id)
+    rows = query.order_by(HawksTargetDB.id).limit(limit + 1).all()
+    
+    page = rows[:limit]
+    return versioned_response({
+        "items": [{field: getattr(row, field) for field in selected} for row in page],
+        "next_cursor": encode_page_cursor(page[-1].id) if len(rows) > limit else None
+    }, etag)
+
+def _api_v1_result_item(result: HawksScanResult, summary: Optional[HawksScanSummary], selected: tuple, full: bool) -> dict:
+    item = {}
+    for field in selected:
+        if field == "item_count":
+            item[field] = summary.item_count if summary else None
+        elif field == "severity_counts":
+            item[field] = jsonio.loads(summary.severity_counts) if summary and summary.severity_counts else None
+        elif field == "data":
+            if full:
+                try:
+                    item[field] = jsonio.loads(result.result_data) if result.result_data else None
+                except jsonio.JSONDecodeError:
+                    item[field] = None
+        else:
+            item[field] = getattr(result, field)
+    return item
+
+@app.get("/api/v1/targets/{target_id}/scan-results")
+async def api_v1_scan_results(request: Request, target_id: int, cursor: Optional[str] = None, limit: int = 50,
+                              fields: Optional[str] = None, mode: str = "summary", scan_type: Optional[str] = None,
+                              db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if mode not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail="mode must be 'summary' or 'full'")
+    etag = data_version.etag(db)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    selected = parse_fields(fields, API_V1_RESULT_FIELDS)
+    full = mode == "full" and "data" in selected
+    after_id = decode_page_cursor(cursor)
+    limit = min(max(limit, 1), API_V1_MAX_LIMIT)
+    
+    # Mais recentes primeiro; o blob só é lido (e descomprimido) no modo full
+    query = db.query(HawksScanResult, HawksScanSummary).outerjoin(
+        HawksScanSummary, HawksScanSummary.result_id == HawksScanResult.id
+    ).filter(HawksScanResult.target_id == target_id)
+    if full:
+        query = query.options(undefer(HawksScanResult.result_data))
+    if scan_type:
+        query = query.filter(HawksScanResult.scan_type == scan_type)
+    if after_id is not None:
+        query = query.filter(HawksScanResult.id < after_id)
+    rows = query.order_by(HawksScanResult.id.desc()).limit(limit + 1).all()
+    
+    page = rows[:limit]
+    return versioned_response({
+        "items": [_api_v1_result_item(result, summary, selected, full) for result, summary in page],
+        "next_cursor": encode_page_cursor(page[-1][0].id) if len(rows) > limit else None
+    }, etag)
+
+@app.get("/api/v1/scan-results/{result_id}")
+async def api_v1_scan_result(request: Request, result_id: int, fields: Optional[str] = None,
+                             mode: str = "summary", db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if mode not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail="mode must be 'summary' or 'full'")
+    etag = data_version.etag(db)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    selected = parse_fields(fields, API_V1_RESULT_FIELDS)
+    full = mode == "full" and "data" in selected
+    query = db.query(HawksScanResult, HawksScanSummary).outerjoin(
+        HawksScanSummary, HawksScanSummary.result_id == HawksScanResult.id
+    ).filter(HawksScanResult.id == result_id)
+    if full:
+        query = query.options(undefer(HawksScanResult.result_data))
+    row = query.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Scan result not found")
+    return versioned_response(_api_v1_result_item(row[0], row[1], selected, full), etag)
+
 @app.get("/targets/{target_id}/dashboard", response_class=HTMLResponse)
 async def target_dashboard(request: Request, target_id: int, db: Session = Depends(get_db)):
     user = get_current_user(request)
@@ -864,7 +1130,7 @@ async def target_dashboard(request: Request, target_id: int, db: Session = Depen
         raise HTTPException(status_code=404, detail="Target not found")
     
     # Buscar todos os resultados de scan para este target
-    scan_results = db.query(HawksScanResult).filter(HawksScanResult.target_id == target_id).order_by(HawksScanResult.started_at.desc()).all()
+    scan_results = db.query(HawksScanResult).options(undefer(HawksScanResult.result_data)).filter(HawksScanResult.target_id == target_id).order_by(HawksScanResult.started_at.desc()).all()
     
     # Agrupar resultados por tipo de scan
     subfinder_results = [r for r in scan_results if r.scan_type == "subfinder"]
@@ -881,7 +1147,7 @@ async def target_dashboard(request: Request, target_id: int, db: Session = Depen
     for result in subfinder_results + chaos_results:
         if result.status == "success" and result.result_data:
             try:
-                data = json.loads(result.result_data)
+                data = jsonio.loads(result.result_data)
                 if "subdomains" in data:
                     total_subdomains += len(data["subdomains"])
             except:
@@ -891,7 +1157,7 @@ async def target_dashboard(request: Request, target_id: int, db: Session = Depen
     for result in httpx_results:
         if result.status == "success" and result.result_data:
             try:
-                data = json.loads(result.result_data)
+                data = jsonio.loads(result.result_data)
                 if "live_hosts" in data:
                     live_hosts += len(data["live_hosts"])
             except:
@@ -901,7 +1167,7 @@ async def target_dashboard(request: Request, target_id: int, db: Session = Depen
     for result in nuclei_results:
         if result.status == "success" and result.result_data:
             try:
-                data = json.loads(result.result_data)
+                data = jsonio.loads(result.result_data)
                 if "results" in data:
                     vulnerabilities += len(data["results"])
             except:
@@ -934,7 +1200,8 @@ async def get_target_status(request: Request, target_id: int, db: Session = Depe
         "id": target.id,
         "domain_ip": target.domain_ip,
         "scan_status": target.scan_status,
-        "last_scan": target.last_scan.isoformat() if target.last_scan else None
+        "last_scan": target.last_scan.isoformat() if target.last_scan else None,
+        "queue": get_scanner().get_target_queue_info(target_id)
     }
 
 @app.post("/targets/upload")
@@ -990,12 +1257,15 @@ async def upload_targets(
         if len(domains) > 5000:
             domains = domains[:5000]  # Process only first 5000
         
+        # Targets importados juntos formam um grupo (usado no fair-share da fila)
+        group_name = os.path.splitext(safe_filename)[0][:100] or None
+        
         # Adicionar domínios únicos ao banco
         added_count = 0
         for domain in set(domains):  # Remove duplicatas
             existing = db.query(HawksTargetDB).filter(HawksTargetDB.domain_ip == domain).first()
             if not existing:
-                target = HawksTargetDB(domain_ip=domain)
+                target = HawksTargetDB(domain_ip=domain, group_name=group_name)
                 db.add(target)
                 added_count += 1
         
@@ -1012,11 +1282,13 @@ async def upload_targets(
 async def scan_selected_targets(
     request: Request,
     target_ids: List[int] = Form(...),
+    mode: str = "resume",
     db: Session = Depends(get_db)
 ):
     user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    resume = parse_scan_mode(mode)
     
     # Atualizar status dos targets selecionados
     for target_id in target_ids:
@@ -1027,15 +1299,16 @@ async def scan_selected_targets(
     db.commit()
     
     # Adicionar à fila de scan
-    await hawks_scanner.scan_multiple_targets(target_ids, db)
+    await get_scanner().scan_multiple_targets(target_ids, db, priority=PRIORITY_SELECTED, resume=resume)
     
     return {"status": "queued", "targets_count": len(target_ids)}
 
 @app.post("/targets/scan-all")
-async def scan_all_targets(request: Request, db: Session = Depends(get_db)):
+async def scan_all_targets(request: Request, mode: str = "resume", db: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    resume = parse_scan_mode(mode)
     
     # Pegar todos os targets
     targets = db.query(HawksTargetDB).all()
@@ -1048,33 +1321,145 @@ async def scan_all_targets(request: Request, db: Session = Depends(get_db)):
     db.commit()
     
     # Adicionar à fila de scan
-    await hawks_scanner.scan_multiple_targets(target_ids, db)
-    
+    await get_scanner().scan_multiple_targets(target_ids, db, priority=PRIORITY_SCAN_ALL, resume=resume)
+
     return {"status": "queued", "targets_count": len(target_ids)}
 
+@app.post("/targets/stop-selected")
+async def stop_selected_targets(
+    request: Request,
+    target_ids: List[int] = Form(...),
+    db: Session = Depends(get_db)
+):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    # Tirar da fila e encerrar processos em execução
+    stopped = get_scanner().stop_scans(target_ids)
+
+    # Atualizar status no banco em uma única query
+    db.query(HawksTargetDB).filter(
+        HawksTargetDB.id.in_(target_ids),
+        HawksTargetDB.scan_status.in_(["queued", "running"])
+    ).update({HawksTargetDB.scan_status: "stopped"}, synchronize_session=False)
+    db.commit()
+
+    return {"status": "stopped", "targets_count": stopped}
+
+@app.post("/targets/stop-all")
+async def stop_all_targets(request: Request, db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    # Esvaziar a fila e encerrar todos os scans em execução
+    target_ids = get_scanner().stop_all_scans()
+
+    db.query(HawksTargetDB).filter(
+        HawksTargetDB.scan_status.in_(["queued", "running"])
+    ).update({HawksTargetDB.scan_status: "stopped"}, synchronize_session=False)
+    db.commit()
+
+    return {"status": "stopped", "targets_count": len(target_ids)}
+
+def _schedule_dict(schedule: HawksScanSchedule) -> dict:
+    return {
+        "id": schedule.id,
+        "target_id": schedule.target_id,
+        "group_name": schedule.group_name,
+        "scope": "target" if schedule.target_id is not None else "group" if schedule.group_name else "all",
+        "interval_hours": schedule.interval_hours,
+        "mode": schedule.mode,
+        "enabled": schedule.enabled,
+        "created_at": schedule.created_at.isoformat() if schedule.created_at else None,
+        "last_enqueued_at": schedule.last_enqueued_at.isoformat() if schedule.last_enqueued_at else None,
+    }
+
+@app.get("/api/schedules")
+async def list_schedules(request: Request, db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    schedules = db.query(HawksScanSchedule).order_by(HawksScanSchedule.id).all()
+    return {"scheduler": hawks_scheduler.status(), "schedules": [_schedule_dict(s) for s in schedules]}
+
+@app.post("/api/schedules")
+async def create_schedule(
+    request: Request,
+    interval_hours: int = Form(...),
+    target_id: Optional[int] = Form(None),
+    group_name: Optional[str] = Form(None),
+    mode: str = Form("resume"),
+    db: Session = Depends(get_db)
+):
+    """Agenda scans recorrentes de um target, de um grupo ou (sem ambos) de todos os targets"""
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    parse_scan_mode(mode)
+    if interval_hours < 1 or interval_hours > 24 * 365:
+        raise HTTPException(status_code=400, detail="interval_hours must be between 1 and 8760")
+    group_name = group_name.strip() if group_name else None
+    if target_id is not None and group_name:
+        raise HTTPException(status_code=400, detail="Use target_id or group_name, not both")
+    if target_id is not None and not db.query(HawksTargetDB.id).filter(HawksTargetDB.id == target_id).first():
+        raise HTTPException(status_code=404, detail="Target not found")
+
+    schedule = HawksScanSchedule(target_id=target_id, group_name=group_name, interval_hours=interval_hours, mode=mode)
+    db.add(schedule)
+    db.commit()
+    db.refresh(schedule)
+    return _schedule_dict(schedule)
+
+@app.post("/api/schedules/{schedule_id}/toggle")
+async def toggle_schedule(request: Request, schedule_id: int, db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    schedule = db.query(HawksScanSchedule).filter(HawksScanSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    schedule.enabled = not schedule.enabled
+    db.commit()
+    return _schedule_dict(schedule)
+
+@app.delete("/api/schedules/{schedule_id}")
+async def delete_schedule(request: Request, schedule_id: int, db: Session = Depends(get_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    deleted = db.query(HawksScanSchedule).filter(HawksScanSchedule.id == schedule_id).delete(synchronize_session=False)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    db.commit()
+    return {"status": "deleted"}
+
 @app.get("/api/queue-status")
-async def get_queue_status(request: Request):
+async def get_queue_status(request: Request, limit: int = 50):
     user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    return hawks_scanner.get_queue_status()
+    return get_scanner().get_queue_status(jobs_limit=min(max(limit, 0), 1000))
 
 @app.get("/api/queue-status-detailed")
-async def get_detailed_queue_status(request: Request):
+async def get_detailed_queue_status(request: Request, limit: int = 50):
     user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    status = hawks_scanner.get_queue_status()
+    status = get_scanner().get_queue_status(jobs_limit=min(max(limit, 0), 1000))
     
     # Adicionar informações dos jobs de scan
     scan_jobs_info = {}
-    for job_id, job_data in hawks_scanner.scan_jobs.items():
+    for job_id, job_data in get_scanner().scan_jobs.items():
         scan_jobs_info[job_id] = {
             "status": job_data.get("status", "unknown"),
             "progress": job_data.get("progress", []),
-            "error": job_data.get("error")
+            "error": job_data.get("error"),
+            "priority": job_data.get("priority"),
+            "stage": job_data.get("stage")
         }
     
     status["scan_jobs"] = scan_jobs_info
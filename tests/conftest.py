@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+# A configuração é lida no import do app: variáveis mínimas e um banco SQLite descartável
+os.environ.setdefault("SECRET_KEY", "hawks-tests")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD", "admin")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hawks-tests-"), "hawks.db")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def database():
+    from app.database import init_db
+    init_db()
+
+
+@pytest.fixture
+def db(database):
+    """Sessão num banco limpo: cada teste começa sem linhas nas tabelas do app"""
+    from app.database import Base, SessionLocal, engine
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                if table.name != "data_version":
+                    conn.execute(table.delete())
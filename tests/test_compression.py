@@ -0,0 +1,82 @@
+import base64
+import zlib
+
+import pytest
+from sqlalchemy import text
+
+from app.config import hawks_config
+from app.database import COMPRESSION_MARKER, HawksScanResult, compress_results_batch, compress_text, decompress_text
+
+
+@pytest.fixture
+def compression(monkeypatch):
+    monkeypatch.setattr(hawks_config, "result_compression", True)
+    monkeypatch.setattr(hawks_config, "result_compression_min_bytes", 64)
+    return hawks_config
+
+
+LARGE = '{"subdomains": [' + ", ".join(f'"host{i}.example.com"' for i in range(200)) + "]}"
+
+
+def test_large_text_round_trip(compression):
+    stored = compress_text(LARGE)
+    assert stored.startswith(COMPRESSION_MARKER)
+    assert len(stored) < len(LARGE)
+    assert zlib.decompress(base64.b64decode(stored[len(COMPRESSION_MARKER):])).decode("utf-8") == LARGE
+    assert decompress_text(stored) == LARGE
+
+
+def test_unicode_round_trip(compression):
+    value = "ação ✓ " * 50
+    assert decompress_text(compress_text(value)) == value
+
+
+def test_small_text_stays_plain(compression):
+    assert compress_text('{"a": 1}') == '{"a": 1}'
+
+
+def test_disabled_compression_stays_plain(compression, monkeypatch):
+    monkeypatch.setattr(hawks_config, "result_compression", False)
+    assert compress_text(LARGE) == LARGE
+
+
+def test_already_compressed_is_not_compressed_twice(compression):
+    stored = compress_text(LARGE)
+    assert compress_text(stored) == stored
+
+
+def test_plain_text_fallback_on_read():
+    # Linhas gravadas antes da compressão continuam legíveis sem migração
+    assert decompress_text(LARGE) == LARGE
+    assert decompress_text("") == ""
+
+
+def test_compressed_column_is_transparent(compression, db):
+    db.add(HawksScanResult(target_id=1, scan_type="subfinder", status="success", result_data=LARGE))
+    db.add(HawksScanResult(target_id=1, scan_type="httpx", status="success", result_data=None))
+    db.commit()
+
+    raw = dict(db.execute(text("SELECT scan_type, result_data FROM scan_results")).fetchall())
+    assert raw["subfinder"].startswith(COMPRESSION_MARKER)
+    assert raw["httpx"] is None
+
+    db.expire_all()
+    loaded = {row.scan_type: row.result_data for row in db.query(HawksScanResult)}
+    assert loaded == {"subfinder": LARGE, "httpx": None}
+
+
+def test_plain_rows_are_readable_and_migrated(compression, db):
+    db.execute(
+        text("INSERT INTO scan_results (target_id, scan_type, status, result_data) VALUES (1, 'subfinder', 'success', :data)"),
+        {"data": LARGE}
+    )
+    db.commit()
+    assert db.query(HawksScanResult).one().result_data == LARGE
+
+    last_id, count = compress_results_batch(0, 10)
+    assert count == 1
+    assert compress_results_batch(last_id, 10) == (0, 0)
+
+    db.expire_all()
+    assert db.execute(text("SELECT result_data FROM scan_results")).scalar().startswith(COMPRESSION_MARKER)
+    assert db.query(HawksScanResult).one().result_data == LARGE
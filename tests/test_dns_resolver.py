@@ -0,0 +1,363 @@
+import asyncio
+import ipaddress
+import struct
+
+import pytest
+
+from app import dns_resolver
+from app.dns_resolver import (
+    RESOLVE_ERROR, TYPE_A, TYPE_AAAA, DnsError, HawksDnsCache, HawksDnsResolver,
+    build_query, normalize_hostname, parent_zone, parse_nameservers, parse_response
+)
+
+
+def encode_name(name: str) -> bytes:
+    return b"".join(bytes([len(label)]) + label.encode("ascii") for label in name.split(".")) + b"\x00"
+
+
+def record(rtype: int, rdata: bytes, name: bytes = b"\xc0\x0c", ttl: int = 60) -> bytes:
+    # \xc0\x0c: ponteiro de compressão para o nome da pergunta (offset 12)
+    return name + struct.pack("!HHIH", rtype, 1, ttl, len(rdata)) + rdata
+
+
+def response(query_id: int, name: str, qtype: int, answers=(), rcode: int = 0) -> bytes:
+    header = struct.pack("!HHHHHH", query_id, 0x8180 | rcode, 1, len(answers), 0, 0)
+    return header + encode_name(name) + struct.pack("!HH", qtype, 1) + b"".join(answers)
+
+
+def parse_query(data: bytes):
+    query_id = struct.unpack("!H", data[:2])[0]
+    offset, labels = 12, []
+    while data[offset]:
+        labels.append(data[offset + 1:offset + 1 + data[offset]].decode("ascii"))
+        offset += data[offset] + 1
+    qtype = struct.unpack("!H", data[offset + 1:offset + 3])[0]
+    return query_id, ".".join(labels), qtype
+
+
+def test_build_query_layout():
+    query = build_query(0x1234, "a.example.com", TYPE_AAAA)
+    query_id, flags, qdcount, ancount, nscount, arcount = struct.unpack("!HHHHHH", query[:12])
+    assert (query_id, flags, qdcount, ancount, nscount, arcount) == (0x1234, 0x0100, 1, 0, 0, 0)
+    assert query[12:] == encode_name("a.example.com") + struct.pack("!HH", TYPE_AAAA, 1)
+    assert parse_query(query) == (0x1234, "a.example.com", TYPE_AAAA)
+
+
+def test_parse_response_with_compressed_names():
+    data = response(7, "a.example.com", TYPE_A, [
+        record(TYPE_A, ipaddress.IPv4Address("10.0.0.1").packed),
+        record(5, encode_name("b.example.com")),  # CNAME é ignorado
+        record(TYPE_A, ipaddress.IPv4Address("10.0.0.2").packed),
+        record(TYPE_AAAA, ipaddress.IPv6Address("2001:db8::1").packed, name=encode_name("a.example.com")),
+    ])
+    assert parse_response(data) == (7, 0, ["10.0.0.1", "10.0.0.2", "2001:db8::1"])
+
+
+def test_parse_response_nxdomain():
+    assert parse_response(response(9, "missing.example.com", TYPE_A, rcode=3)) == (9, 3, [])
+
+
+def test_parse_response_ignores_malformed_rdata_length():
+    data = response(1, "a.example.com", TYPE_A, [record(TYPE_A, b"\x0a\x00\x00")])
+    assert parse_response(data) == (1, 0, [])
+
+
+@pytest.mark.parametrize("data", [
+    b"\x00" * 11,
+    build_query(1, "a.example.com", TYPE_A),
+    response(1, "a.example.com", TYPE_A, [record(TYPE_A, b"\x0a\x00\x00\x01")])[:-8],
+    struct.pack("!HHHHHH", 1, 0x8180, 1, 0, 0, 0) + b"\x07example",
+])
+def test_parse_response_rejects_invalid_packets(data):
+    with pytest.raises(DnsError):
+        parse_response(data)
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ("Sub.Example.COM", "sub.example.com"),
+    ("  a.example.com.\n", "a.example.com"),
+    ("https://a.example.com:8443/path", "a.example.com"),
+    ("*.example.com", "example.com"),
+    ("a.example.com:80", "a.example.com"),
+    ("10.0.0.1", "10.0.0.1"),
+    ("", None),
+    ("a..example.com", None),
+    ("x" * 64 + ".example.com", None),
+    ("ação.example.com", None),
+])
+def test_normalize_hostname(entry, expected):
+    assert normalize_hostname(entry) == expected
+
+
+def test_parent_zone():
+    assert parent_zone("a.b.example.com") == "b.example.com"
+    assert parent_zone("a.example.com") == "example.com"
+    # Sem domínio alvo nunca sobe até o TLD
+    assert parent_zone("example.com") is None
+    assert parent_zone("localhost") is None
+    assert parent_zone("a.b.example.com", "example.com") == "b.example.com"
+    assert parent_zone("a.example.com", "Example.com.") == "example.com"
+    assert parent_zone("example.com", "example.com") is None
+    assert parent_zone("a.other.com", "example.com") is None
+    assert parent_zone("a.notexample.com", "example.com") is None
+
+
+def test_parse_nameservers():
+    assert parse_nameservers("1.1.1.1, 8.8.8.8:5353,[2606:4700::1111]:53,[::1],,") == [
+        ("1.1.1.1", 53), ("8.8.8.8", 5353), ("2606:4700::1111", 53), ("::1", 53)
+    ]
+
+
+def test_parse_nameservers_falls_back_to_resolv_conf(monkeypatch, tmp_path):
+    resolv = tmp_path / "resolv.conf"
+    resolv.write_text("# comentário\nsearch lan\nnameserver 192.0.2.53\nnameserver ::1\n")
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda path, *args, **kwargs: real_open(
+        resolv if path == "/etc/resolv.conf" else path, *args, **kwargs))
+
+    assert parse_nameservers("") == [("192.0.2.53", 53), ("::1", 53)]
+
+
+class FakeMonotonic:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_dns_cache_positive_and_negative_ttl(monkeypatch):
+    clock = FakeMonotonic()
+    monkeypatch.setattr(dns_resolver, "time", clock)
+    cache = HawksDnsCache(ttl=60, negative_ttl=10)
+    cache.put("a.example.com", ["10.0.0.1"])
+    cache.put("missing.example.com", None)
+
+    assert cache.get("a.example.com") == ["10.0.0.1"]
+    assert cache.get("missing.example.com") is None
+    assert cache.get("other.example.com") == RESOLVE_ERROR
+
+    clock.now += 11
+    assert cache.get("missing.example.com") == RESOLVE_ERROR
+    assert cache.get("a.example.com") == ["10.0.0.1"]
+    clock.now += 50
+    assert cache.get("a.example.com") == RESOLVE_ERROR
+    assert cache.entries == {}
+
+
+def test_dns_cache_evicts_least_recently_used():
+    cache = HawksDnsCache(max_entries=2)
+    cache.put("a", ["10.0.0.1"])
+    cache.put("b", ["10.0.0.2"])
+    cache.get("a")
+    cache.put("c", ["10.0.0.3"])
+
+    assert list(cache.entries) == ["a", "c"]
+    HawksDnsCache(max_entries=0).put("a", ["10.0.0.1"])
+
+
+class FakeDnsServer(asyncio.DatagramProtocol):
+    """Servidor UDP local: {nome: endereços}; nomes fora do mapa recebem NXDOMAIN.
+
+    Em `wildcards` ({zona: endereços}) qualquer nome da zona sem registro próprio
+    resolve para o endereço do coringa, inclusive rótulos aleatórios.
+    """
+
+    def __init__(self, records, delay: float = 0, silent=(), wildcards=None):
+        self.records = records
+        self.delay = delay
+        self.silent = set(silent)
+        self.wildcards = wildcards or {}
+        self.queries = []
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        query_id, name, qtype = parse_query(data)
+        self.queries.append((name, qtype))
+        if name in self.silent:
+            return
+        records = self.records.get(name)
+        if records is None:
+            zone = name.split(".", 1)[1] if "." in name else ""
+            records = self.wildcards.get(zone)
+        addresses = [ipaddress.ip_address(address) for address in records or []]
+        wanted = 4 if qtype == TYPE_A else 6
+        answers = [record(qtype, address.packed) for address in addresses if address.version == wanted]
+        packet = response(query_id, name, qtype, answers, rcode=0 if records is not None else 3)
+        asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, packet, addr)
+
+
+async def start_server(records, **kwargs):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(
+        lambda: FakeDnsServer(records, **kwargs), local_addr=("127.0.0.1", 0)
+    )
+    return transport, server, transport.get_extra_info("sockname")
+
+
+def test_resolver_answers_nxdomain_and_ipv6_fallback():
+    async def scenario():
+        transport, server, address = await start_server({
+            "a.example.com": ["10.0.0.1"],
+            "v6.example.com": ["2001:db8::1"],
+            "empty.example.com": [],
+        })
+        resolver = HawksDnsResolver([address], timeout=0.5, retries=0)
+        try:
+            kept, stats = await resolver.filter_resolvable(
+                ["a.example.com", "https://v6.example.com", "missing.example.com", "empty.example.com", "bad..entry"],
+                collapse_wildcards=False
+            )
+            assert kept == ["a.example.com", "https://v6.example.com", "bad..entry"]
+            assert (stats["resolved"], stats["unresolved"], stats["errors"]) == (2, 2, 1)
+            assert ("v6.example.com", TYPE_AAAA) in server.queries
+            assert ("missing.example.com", TYPE_AAAA) not in server.queries
+
+            # Segunda rodada sai inteira do cache
+            queries = len(server.queries)
+            kept, stats = await resolver.filter_resolvable(["a.example.com", "missing.example.com"], collapse_wildcards=False)
+            assert kept == ["a.example.com"]
+            assert stats["cache_hits"] == 2
+            assert len(server.queries) == queries
+        finally:
+            resolver.close()
+            transport.close()
+
+    asyncio.run(scenario())
+
+
+def test_resolver_timeout_keeps_name_and_is_not_cached():
+    async def scenario():
+        transport, server, address = await start_server({"a.example.com": ["10.0.0.1"]}, silent={"a.example.com"})
+        resolver = HawksDnsResolver([address], timeout=0.05, retries=1)
+        try:
+            assert await resolver.resolve("a.example.com") == RESOLVE_ERROR
+            assert resolver.stats["timeouts"] == 2
+            assert "a.example.com" not in resolver.cache.entries
+        finally:
+            resolver.close()
+            transport.close()
+
+    asyncio.run(scenario())
+
+
+def test_shared_lookup_survives_cancelled_waiter():
+    async def scenario():
+        transport, server, address = await start_server({"a.example.com": ["10.0.0.1"]}, delay=0.1)
+        resolver = HawksDnsResolver([address], timeout=1, retries=0)
+        try:
+            first = asyncio.create_task(resolver.resolve("a.example.com"))
+            second = asyncio.create_task(resolver.resolve("a.example.com"))
+            await asyncio.sleep(0.02)
+            first.cancel()
+
+            assert await second == ["10.0.0.1"]
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            # Uma única consulta compartilhada pelos dois scans
+            assert server.queries == [("a.example.com", TYPE_A)]
+            assert resolver._inflight == {}
+        finally:
+            resolver.close()
+            transport.close()
+
+    asyncio.run(scenario())
+
+
+def test_lookup_cancelled_when_last_waiter_leaves():
+    async def scenario():
+        transport, server, address = await start_server({"a.example.com": ["10.0.0.1"]}, delay=0.1)
+        resolver = HawksDnsResolver([address], timeout=1, retries=0)
+        try:
+            waiter = asyncio.create_task(resolver.resolve("a.example.com"))
+            await asyncio.sleep(0.02)
+            lookup = resolver._inflight["a.example.com"][0]
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            await asyncio.gather(lookup, return_exceptions=True)
+
+            assert lookup.cancelled()
+            assert resolver._inflight == {}
+            assert "a.example.com" not in resolver.cache.entries
+        finally:
+            resolver.close()
+            transport.close()
+
+    asyncio.run(scenario())
+
+
+def test_wildcard_zone_collapses_to_one_representative():
+    async def scenario():
+        transport, server, address = await start_server(
+            {
+                "www.example.com": ["10.0.0.10"],
+                "real.dev.example.com": ["10.0.0.20"],
+                "api.prod.example.com": ["10.0.1.1"],
+                "web.prod.example.com": ["10.0.1.2"],
+            },
+            wildcards={"dev.example.com": ["10.9.9.9"]},
+        )
+        resolver = HawksDnsResolver([address], timeout=0.5, retries=0)
+        entries = [
+            "www.example.com",
+            "a.dev.example.com",
+            "b.dev.example.com",
+            "real.dev.example.com",
+            "c.dev.example.com",
+            "api.prod.example.com",
+            "web.prod.example.com",
+        ]
+        try:
+            kept, stats = await resolver.filter_resolvable(entries, domain="example.com")
+
+            # Nomes só do coringa viram um representante; registros próprios e zonas sem wildcard ficam
+            assert kept == ["www.example.com", "a.dev.example.com", "real.dev.example.com",
+                            "api.prod.example.com", "web.prod.example.com"]
+            assert (stats["wildcard_zones"], stats["wildcard_collapsed"]) == (1, 2)
+            assert (resolver.stats["wildcard_zones"], resolver.stats["wildcard_collapsed"]) == (1, 2)
+            assert resolver.wildcards.get("dev.example.com") == ["10.9.9.9"]
+            assert resolver.wildcards.get("prod.example.com") is None
+            # Zona com um só nome não gasta consultas de teste; o domínio alvo nunca é sondado
+            probed = {name.split(".", 1)[1] for name, _ in server.queries if name not in entries}
+            assert probed == {"dev.example.com", "prod.example.com"}
+
+            # Resultado da sondagem fica em cache: a segunda rodada não consulta rótulos aleatórios
+            queries = len(server.queries)
+            kept_again, _ = await resolver.filter_resolvable(entries, domain="example.com")
+            assert kept_again == kept
+            assert len(server.queries) == queries
+        finally:
+            resolver.close()
+            transport.close()
+
+    asyncio.run(scenario())
+
+
+def test_wildcard_probe_failure_keeps_every_name():
+    async def scenario():
+        transport, server, address = await start_server(
+            {"a.dev.example.com": ["10.9.9.9"], "b.dev.example.com": ["10.9.9.9"]}
+        )
+        resolver = HawksDnsResolver([address], timeout=0.05, retries=0)
+        # Rótulos aleatórios sem resposta: não dá para saber se há wildcard, nada é descartado
+        original = server.datagram_received
+
+        def drop_random_labels(data, addr):
+            _, name, _ = parse_query(data)
+            if name in server.records:
+                original(data, addr)
+
+        server.datagram_received = drop_random_labels
+        try:
+            kept, stats = await resolver.filter_resolvable(["a.dev.example.com", "b.dev.example.com"], domain="example.com")
+            assert kept == ["a.dev.example.com", "b.dev.example.com"]
+            assert stats["wildcard_collapsed"] == 0
+            assert "dev.example.com" not in resolver.wildcards.entries
+        finally:
+            resolver.close()
+            transport.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+from app.enumeration import HawksSubdomainSet, normalize_subdomain
+
+
+def test_normalize_subdomain():
+    assert normalize_subdomain("  API.Example.COM.\n") == "api.example.com"
+    assert normalize_subdomain("") is None
+    assert normalize_subdomain("  \n") is None
+    assert normalize_subdomain(".") is None
+
+
+def test_add_dedups_within_a_source():
+    subdomains = HawksSubdomainSet()
+    stats = subdomains.add("subfinder", ["a.example.com", "A.example.com.", "b.example.com", "", "a.example.com"])
+
+    assert stats == {"found": 2, "new": 2}
+    assert subdomains.names() == ["a.example.com", "b.example.com"]
+    assert len(subdomains) == 2
+
+
+def test_union_keeps_arrival_order():
+    subdomains = HawksSubdomainSet()
+    subdomains.add("chaos", ["c.example.com", "a.example.com"])
+    subdomains.add("subfinder", ["a.example.com", "b.example.com", "c.example.com"])
+
+    assert subdomains.names() == ["c.example.com", "a.example.com", "b.example.com"]
+
+
+def test_contributions_found_new_and_unique():
+    subdomains = HawksSubdomainSet()
+    assert subdomains.add("chaos", ["a.example.com", "b.example.com", "c.example.com"]) == {"found": 3, "new": 3}
+    assert subdomains.add("subfinder", ["b.example.com", "d.example.com"]) == {"found": 2, "new": 1}
+    assert subdomains.add("crtsh", ["a.example.com", "b.example.com"]) == {"found": 2, "new": 0}
+
+    # "new" depende da ordem de chegada; "unique" conta só o que nenhuma outra fonte encontrou
+    assert subdomains.contributions() == {
+        "chaos": {"found": 3, "new": 3, "unique": 1},
+        "subfinder": {"found": 2, "new": 1, "unique": 1},
+        "crtsh": {"found": 2, "new": 0, "unique": 0},
+    }
+
+
+def test_unique_is_independent_of_arrival_order():
+    outputs = {
+        "chaos": ["a.example.com", "b.example.com", "c.example.com"],
+        "subfinder": ["b.example.com", "d.example.com"],
+    }
+    forward, backward = HawksSubdomainSet(), HawksSubdomainSet()
+    for source in outputs:
+        forward.add(source, outputs[source])
+    for source in reversed(list(outputs)):
+        backward.add(source, outputs[source])
+
+    unique = lambda subdomains: {source: stats["unique"] for source, stats in subdomains.contributions().items()}
+    assert unique(forward) == unique(backward) == {"chaos": 2, "subfinder": 1}
+    assert sorted(forward.names()) == sorted(backward.names())
+
+
+def test_source_without_output_is_reported():
+    subdomains = HawksSubdomainSet()
+    assert subdomains.add("chaos", []) == {"found": 0, "new": 0}
+    assert subdomains.contributions() == {"chaos": {"found": 0, "new": 0, "unique": 0}}
+    assert subdomains.names() == []
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from app.database import HawksFinding
+from app.findings import finding_fingerprint, ingest_findings
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def nuclei_finding(template_id="cve-2021-1234", host="https://a.example.com", matched_at=None, matcher="", **extra):
+    finding = {
+        "template-id": template_id,
+        "host": host,
+        "matched-at": matched_at or f"{host}/login",
+        "matcher-name": matcher,
+        "type": "http",
+        "info": {"name": template_id.upper(), "severity": "high"},
+    }
+    finding.update(extra)
+    return finding
+
+
+def findings_by_template(db, target_id=1):
+    db.expire_all()
+    return {row.template_id: row for row in db.query(HawksFinding).filter(HawksFinding.target_id == target_id)}
+
+
+def test_fingerprint_ignores_volatile_fields():
+    first = nuclei_finding(timestamp="2026-01-01T00:00:00Z", **{"curl-command": "curl a"})
+    second = nuclei_finding(timestamp="2026-02-01T00:00:00Z", **{"curl-command": "curl b"})
+    second["info"] = {"name": "renamed", "severity": "critical"}
+
+    assert finding_fingerprint(first) == finding_fingerprint(second)
+
+
+def test_fingerprint_distinguishes_identity_fields():
+    base = finding_fingerprint(nuclei_finding())
+    assert finding_fingerprint(nuclei_finding(template_id="other")) != base
+    assert finding_fingerprint(nuclei_finding(host="https://b.example.com")) != base
+    assert finding_fingerprint(nuclei_finding(matched_at="https://a.example.com/admin")) != base
+    assert finding_fingerprint(nuclei_finding(matcher="word")) != base
+
+
+def test_fingerprint_fields_do_not_bleed_into_each_other():
+    # Separador entre as partes: "a"+"bc" não colide com "ab"+"c"
+    left = {"template-id": "a", "host": "bc", "matched-at": "", "matcher-name": ""}
+    right = {"template-id": "ab", "host": "c", "matched-at": "", "matcher-name": ""}
+    assert finding_fingerprint(left) != finding_fingerprint(right)
+
+
+def test_missing_fields_match_empty_fields():
+    assert finding_fingerprint({"template-id": "x"}) == finding_fingerprint(
+        {"template-id": "x", "host": "", "matched-at": "", "matcher-name": ""}
+    )
+
+
+def test_ingest_dedups_within_a_scan(db):
+    stats = ingest_findings(db, 1, [nuclei_finding(), nuclei_finding(), nuclei_finding(template_id="b")], seen_at=T0, result_id=10)
+
+    assert stats == {"new": 2, "updated": 0, "resolved": 0}
+    rows = findings_by_template(db)
+    assert set(rows) == {"cve-2021-1234", "b"}
+    row = rows["cve-2021-1234"]
+    assert (row.status, row.occurrences, row.first_seen, row.last_seen, row.last_result_id) == ("open", 1, T0, T0, 10)
+    assert row.fingerprint == finding_fingerprint(nuclei_finding())
+    assert row.severity == "high"
+
+
+def test_missing_finding_is_resolved_then_reopened(db):
+    kept, gone = nuclei_finding(template_id="kept"), nuclei_finding(template_id="gone")
+    ingest_findings(db, 1, [kept, gone], seen_at=T0, result_id=1)
+
+    stats = ingest_findings(db, 1, [kept], seen_at=T0 + timedelta(days=1), result_id=2)
+    assert stats == {"new": 0, "updated": 1, "resolved": 1}
+    rows = findings_by_template(db)
+    assert rows["gone"].status == "resolved"
+    assert rows["gone"].resolved_at == T0 + timedelta(days=1)
+    assert rows["kept"].occurrences == 2
+
+    stats = ingest_findings(db, 1, [kept, gone], seen_at=T0 + timedelta(days=2), result_id=3)
+    assert stats == {"new": 0, "updated": 2, "resolved": 0}
+    rows = findings_by_template(db)
+    reopened = rows["gone"]
+    # Mesmo registro: o fingerprint sobrevive ao ciclo resolvido -> reaberto
+    assert (reopened.status, reopened.resolved_at, reopened.first_seen) == ("open", None, T0)
+    assert reopened.last_seen == T0 + timedelta(days=2)
+    assert reopened.occurrences == 2
+    assert reopened.last_result_id == 3
+
+
+def test_partial_scan_does_not_resolve(db):
+    ingest_findings(db, 1, [nuclei_finding(template_id="a"), nuclei_finding(template_id="b")], seen_at=T0)
+    stats = ingest_findings(db, 1, [nuclei_finding(template_id="a")], seen_at=T0 + timedelta(days=1), resolve_missing=False)
+
+    assert stats["resolved"] == 0
+    assert findings_by_template(db)["b"].status == "open"
+
+
+def test_out_of_order_scan_never_regresses(db):
+    finding = nuclei_finding()
+    ingest_findings(db, 1, [finding], seen_at=T0 + timedelta(days=2), result_id=5)
+    # Backfill de um scan mais antigo, que não viu o achado "other"
+    ingest_findings(db, 1, [nuclei_finding(template_id="other")], seen_at=T0 + timedelta(days=3), result_id=6)
+    ingest_findings(db, 1, [finding], seen_at=T0, result_id=1)
+
+    rows = findings_by_template(db)
+    row = rows["cve-2021-1234"]
+    assert row.first_seen == T0
+    assert row.last_seen == T0 + timedelta(days=2)
+    assert row.last_result_id == 5
+    # O scan antigo não resolve o que um scan mais recente viu
+    assert rows["other"].status == "open"
+
+
+def test_old_scan_does_not_reopen_resolved_finding(db):
+    finding = nuclei_finding()
+    ingest_findings(db, 1, [finding], seen_at=T0 + timedelta(days=1))
+    ingest_findings(db, 1, [], seen_at=T0 + timedelta(days=2))
+    ingest_findings(db, 1, [finding], seen_at=T0)
+
+    assert findings_by_template(db)["cve-2021-1234"].status == "resolved"
+
+
+def test_targets_are_isolated(db):
+    ingest_findings(db, 1, [nuclei_finding()], seen_at=T0)
+    stats = ingest_findings(db, 2, [], seen_at=T0 + timedelta(days=1))
+
+    assert stats["resolved"] == 0
+    assert findings_by_template(db, 1)["cve-2021-1234"].status == "open"
@@ -0,0 +1,165 @@
+import asyncio
+
+from app.http_probe import HawksHttpProber, format_url, probe_candidates
+
+
+class LocalHttpServer:
+    """Servidor HTTP/1.1 local com keep-alive; conta conexões abertas e fechadas pelo cliente"""
+
+    def __init__(self, body: bytes = b"ok", headers: str = ""):
+        self.body = body
+        self.headers = headers
+        self.accepted = 0
+        self.closed = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def _handle(self, reader, writer):
+        self.accepted += 1
+        try:
+            while True:
+                # Handshake TLS num servidor HTTP: fecha logo, como um servidor real responderia com erro
+                if await reader.readexactly(4) != b"GET ":
+                    break
+                await reader.readuntil(b"\r\n\r\n")
+                writer.write(
+                    f"HTTP/1.1 200 OK\r\nContent-Length: {len(self.body)}\r\n{self.headers}\r\n".encode() + self.body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed += 1
+            writer.close()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def closed_port() -> int:
+    server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
+
+
+def test_probe_candidates_and_format_url():
+    assert probe_candidates("a.example.com") == [("https", "a.example.com", 443), ("http", "a.example.com", 80)]
+    assert probe_candidates("http://a.example.com:8080/path") == [("http", "a.example.com", 8080)]
+    assert probe_candidates("[2001:db8::1]:8443") == [("https", "2001:db8::1", 8443), ("http", "2001:db8::1", 8443)]
+    assert probe_candidates("") == []
+    assert format_url("https", "a.example.com", 443) == "https://a.example.com"
+    assert format_url("http", "2001:db8::1", 8080) == "http://[2001:db8::1]:8080"
+
+
+def test_probe_finds_live_hosts_and_reuses_connections():
+    async def scenario():
+        server = await LocalHttpServer().start()
+        dead = await closed_port()
+        prober = HawksHttpProber(timeout=2)
+        try:
+            live = await prober.probe([
+                f"127.0.0.1:{server.port}",  # Sem esquema: HTTPS falha no servidor HTTP e cai para HTTP
+                f"http://127.0.0.1:{server.port}",
+                f"http://127.0.0.1:{dead}",
+                f"http://127.0.0.1:{server.port}",
+            ])
+            assert live == [f"http://127.0.0.1:{server.port}"]
+            assert prober.stats["https_fallbacks"] == 1
+            assert prober.stats["failed"] == 1
+
+            # O mesmo host de novo reaproveita a conexão ociosa
+            opened = prober.stats["connections_opened"]
+            assert await prober.probe([f"http://127.0.0.1:{server.port}"]) == [f"http://127.0.0.1:{server.port}"]
+            assert prober.stats["connections_opened"] == opened
+            assert prober.stats["connections_reused"] >= 1
+        finally:
+            prober.close()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_connection_close_is_not_pooled():
+    async def scenario():
+        server = await LocalHttpServer(headers="Connection: close\r\n").start()
+        prober = HawksHttpProber(timeout=2)
+        try:
+            assert await prober.probe([f"http://127.0.0.1:{server.port}"]) == [f"http://127.0.0.1:{server.port}"]
+            assert prober.status()["pooled_connections"] == 0
+        finally:
+            prober.close()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_expired_connections_of_other_hosts_are_swept():
+    async def scenario():
+        servers = [await LocalHttpServer().start() for _ in range(4)]
+        prober = HawksHttpProber(timeout=2, pool_size=3, pool_idle=0.1)
+        try:
+            await prober.probe([f"http://127.0.0.1:{server.port}" for server in servers[:3]])
+            assert prober.status()["pooled_connections"] == 3
+
+            # Nenhum desses hosts é sondado de novo: a varredura fecha as conexões expiradas
+            await asyncio.sleep(0.3)
+            assert prober.status()["pooled_connections"] == 0
+            assert prober.stats["connections_evicted"] == 3
+            assert [server.closed for server in servers[:3]] == [1, 1, 1]
+
+            await prober.probe([f"http://127.0.0.1:{servers[3].port}"])
+            assert prober.status()["pooled_connections"] == 1
+        finally:
+            prober.close()
+            for server in servers:
+                await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_full_pool_evicts_the_oldest_connection():
+    async def scenario():
+        servers = [await LocalHttpServer().start() for _ in range(4)]
+        prober = HawksHttpProber(timeout=2, pool_size=3, pool_idle=60)
+        try:
+            for server in servers:
+                await prober.probe([f"http://127.0.0.1:{server.port}"])
+
+            assert prober.status()["pooled_connections"] == 3
+            assert prober.stats["connections_evicted"] == 1
+            await asyncio.sleep(0.05)
+            assert [server.closed for server in servers] == [1, 0, 0, 0]
+            assert ("http", "127.0.0.1", servers[0].port) not in prober._pool
+            assert ("http", "127.0.0.1", servers[3].port) in prober._pool
+        finally:
+            prober.close()
+            for server in servers:
+                await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_close_releases_pool_and_sweep():
+    async def scenario():
+        server = await LocalHttpServer().start()
+        prober = HawksHttpProber(timeout=2, pool_idle=60)
+        try:
+            await prober.probe([f"http://127.0.0.1:{server.port}"])
+            assert prober._sweep_handle is not None
+            prober.close()
+            assert prober._sweep_handle is None
+            assert prober.status()["pooled_connections"] == 0
+            await asyncio.sleep(0.05)
+            assert server.closed == 1
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
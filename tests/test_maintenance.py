@@ -0,0 +1,41 @@
+import asyncio
+
+from app import maintenance
+from app.maintenance import HawksMaintenance
+
+
+def test_retention_waits_for_backfill_retries(monkeypatch):
+    calls = {"backfill": 0, "retention": 0}
+    outcomes = [RuntimeError("database is locked"), RuntimeError("database is locked"), 3, 0]
+
+    def backfill_findings_batch():
+        calls["backfill"] += 1
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def scenario():
+        service = HawksMaintenance()
+        retention_started = asyncio.Event()
+
+        async def run_retention():
+            # Compactação só depois que o backfill terminou de verdade
+            assert not outcomes
+            calls["retention"] += 1
+            retention_started.set()
+
+        monkeypatch.setattr(maintenance, "backfill_findings_batch", backfill_findings_batch)
+        monkeypatch.setattr(service, "run_retention", run_retention)
+        task = asyncio.create_task(service._retention_loop(backoff=0.01, max_backoff=0.02))
+        await asyncio.wait_for(retention_started.wait(), timeout=2)
+        assert not task.done()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return service.stats["findings_backfill"]
+
+    stats = asyncio.run(scenario())
+    assert calls == {"backfill": 4, "retention": 1}
+    assert stats["failures"] == 2
+    assert stats["results_ingested"] == 3
+    assert stats["error"] is None
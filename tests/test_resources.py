@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.resources import HawksRateBudget
+
+
+def acquire_now(budget, *args, **kwargs):
+    """Lease concedido sem esperar (falha o teste se o orçamento fizer o processo aguardar)"""
+    async def scenario():
+        return await asyncio.wait_for(budget.acquire(*args, **kwargs), timeout=0.5)
+    return asyncio.run(scenario())
+
+
+def test_disabled_budget_grants_unlimited_leases():
+    budget = HawksRateBudget()
+    lease = acquire_now(budget, "httpx", demand=50, max_consumers=2)
+    assert lease.rate == 0
+    assert not budget.enabled
+
+
+def test_lone_process_keeps_room_for_others():
+    budget = HawksRateBudget(global_rps=100)
+    assert acquire_now(budget, "httpx", demand=1, max_consumers=4).rate == 50
+    assert acquire_now(budget, "httpx", demand=1, max_consumers=1).rate == 50
+
+
+def test_demand_above_consumer_slots_still_gets_a_lease():
+    # 20 processos querendo rate e só 4 slots: a fatia justa (5) fica abaixo do piso (25)
+    budget = HawksRateBudget(global_rps=100)
+    lease = acquire_now(budget, "nuclei", demand=20, max_consumers=4)
+    assert lease.rate == 5
+    assert budget.total_waits == 0
+
+
+def test_leases_never_exceed_global_budget():
+    budget = HawksRateBudget(global_rps=100)
+    rates = [acquire_now(budget, "nuclei", demand=3, max_consumers=3).rate for _ in range(3)]
+    assert sum(rates) <= 100
+    assert budget.status()["allocated_rps"] == sum(rates)
+
+
+def test_waits_until_a_lease_is_released():
+    async def scenario():
+        budget = HawksRateBudget(global_rps=10)
+        first = await budget.acquire("httpx", demand=1, max_consumers=1)
+        assert first.rate == 10
+        waiting = asyncio.create_task(budget.acquire("httpx", demand=2, max_consumers=2))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        assert budget.total_waits == 1
+
+        budget.release(first)
+        second = await asyncio.wait_for(waiting, timeout=1)
+        assert second.rate == 5
+
+    asyncio.run(scenario())
+
+
+def test_domain_budget_is_per_domain():
+    async def scenario():
+        budget = HawksRateBudget(domain_rps=10)
+        first = await budget.acquire("httpx", "example.com")
+        assert first.rate == 10
+        other = await asyncio.wait_for(budget.acquire("nuclei", "other.com"), timeout=0.5)
+        assert other.rate == 10
+        # O domínio já usa toda a sua fatia: o próximo processo dele espera
+        waiting = asyncio.create_task(budget.acquire("nuclei", "example.com"))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        budget.release(first)
+        assert (await asyncio.wait_for(waiting, timeout=1)).rate == 10
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("global_rps, demand, max_consumers", [(100, 1, 1), (100, 7, 3), (7, 50, 2), (1, 10, 10)])
+def test_grant_is_at_least_one_request_per_second(global_rps, demand, max_consumers):
+    budget = HawksRateBudget(global_rps=global_rps)
+    assert acquire_now(budget, "httpx", demand=demand, max_consumers=max_consumers).rate >= 1
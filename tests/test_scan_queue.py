@@ -0,0 +1,153 @@
+import pytest
+
+from app import scan_queue
+from app.scan_queue import (
+    HawksScanQueue, PRIORITY_INTERACTIVE, PRIORITY_SELECTED, PRIORITY_SCAN_ALL, PRIORITY_SCHEDULED
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(scan_queue, "time", fake)
+    return fake
+
+
+def drain(queue, max_concurrent=10):
+    order = []
+    while True:
+        job = queue.pop_next(max_concurrent)
+        if not job:
+            return order
+        order.append(job.target_id)
+
+
+def test_priority_order_then_fifo(clock):
+    queue = HawksScanQueue(aging_seconds=3600, fair_share=False)
+    queue.put(1, "a.com", PRIORITY_SCHEDULED)
+    clock.now += 1
+    queue.put(2, "b.com", PRIORITY_INTERACTIVE)
+    clock.now += 1
+    queue.put(3, "c.com", PRIORITY_SCAN_ALL)
+    clock.now += 1
+    queue.put(4, "d.com", PRIORITY_INTERACTIVE)
+
+    assert [job.target_id for job in queue.ordered_jobs()] == [2, 4, 3, 1]
+    assert drain(queue) == [2, 4, 3, 1]
+    assert queue.qsize() == 0
+
+
+def test_aging_lets_old_low_priority_job_overtake(clock):
+    queue = HawksScanQueue(aging_seconds=10, fair_share=False)
+    queue.put(1, "old.com", PRIORITY_SCHEDULED)
+    # 3 níveis de prioridade = 30s de espera; depois disso o job agendado passa na frente
+    clock.now += 31
+    queue.put(2, "new.com", PRIORITY_INTERACTIVE)
+
+    assert drain(queue) == [1, 2]
+
+
+def test_requeue_with_higher_priority_keeps_waiting_time(clock):
+    queue = HawksScanQueue(aging_seconds=3600, fair_share=False)
+    first = queue.put(1, "a.com", PRIORITY_SCHEDULED)
+    clock.now += 5
+    queue.put(2, "b.com", PRIORITY_SELECTED)
+    clock.now += 5
+
+    upgraded = queue.put(1, "a.com", PRIORITY_SELECTED)
+    assert upgraded is not first
+    assert upgraded.enqueued_at == first.enqueued_at
+    # Entrada antiga fica no heap, mas é descartada de forma preguiçosa: o target sai uma vez só
+    assert queue.qsize() == 2
+    assert drain(queue) == [1, 2]
+
+
+def test_put_with_same_or_lower_priority_keeps_existing_job(clock):
+    queue = HawksScanQueue(fair_share=False)
+    job = queue.put(1, "a.com", PRIORITY_SELECTED)
+
+    assert queue.put(1, "a.com", PRIORITY_SELECTED) is job
+    assert queue.put(1, "a.com", PRIORITY_SCHEDULED) is job
+    assert queue.get_job(1).priority == PRIORITY_SELECTED
+    assert drain(queue) == [1]
+
+
+def test_remove_is_lazy_and_skipped_by_pop(clock):
+    queue = HawksScanQueue(fair_share=False)
+    for target_id in range(1, 5):
+        queue.put(target_id, f"t{target_id}.com", PRIORITY_SCAN_ALL)
+        clock.now += 1
+
+    assert queue.remove(1)
+    assert queue.remove(3)
+    assert not queue.remove(3)
+    assert queue.qsize() == 2
+    assert queue.position(4) == 2
+    assert queue.position(1) is None
+    assert drain(queue) == [2, 4]
+    # Heap esvaziado só com entradas inválidas some do mapa de grupos
+    assert queue.pop_next(10) is None
+    assert queue._heaps == {}
+
+
+def test_fair_share_alternates_groups(clock):
+    queue = HawksScanQueue(fair_share=True)
+    for target_id in range(1, 5):
+        queue.put(target_id, f"a{target_id}.com", PRIORITY_SCAN_ALL, group="big")
+        clock.now += 1
+    queue.put(10, "b.com", PRIORITY_SCAN_ALL, group="small")
+
+    # 2 slots e 2 grupos com demanda: cada grupo tem direito a 1
+    first = queue.pop_next(2)
+    queue.mark_started(first)
+    second = queue.pop_next(2)
+    queue.mark_started(second)
+
+    assert (first.group, second.group) == ("big", "small")
+    assert queue.groups_status() == {"big": {"queued": 3, "running": 1}, "small": {"queued": 0, "running": 1}}
+
+
+def test_fair_share_does_not_leave_slots_idle(clock):
+    queue = HawksScanQueue(fair_share=True)
+    queue.put(1, "a.com", PRIORITY_SCAN_ALL, group="big")
+    queue.put(2, "b.com", PRIORITY_SCAN_ALL, group="big")
+    running = queue.pop_next(2)
+    queue.mark_started(running)
+    queue.mark_started(running.__class__(99, "x.com", PRIORITY_SCAN_ALL, "other", {}, 99, 3600))
+
+    # Os dois grupos já usam sua cota, mas só "big" tem fila: o slot livre vai para ele
+    assert queue.pop_next(2).target_id == 2
+
+
+def test_mark_finished_releases_group_slot(clock):
+    queue = HawksScanQueue(fair_share=True)
+    job = queue.put(1, "a.com", PRIORITY_SCAN_ALL, group="g")
+    queue.pop_next(1)
+    queue.mark_started(job)
+    assert queue.groups_status() == {"g": {"queued": 0, "running": 1}}
+    queue.mark_finished(job)
+    assert queue.groups_status() == {}
+    assert queue._event.is_set()
+
+
+def test_snapshot_positions_follow_effective_priority(clock):
+    queue = HawksScanQueue(aging_seconds=3600, fair_share=False)
+    queue.put(1, "a.com", PRIORITY_SCHEDULED)
+    clock.now += 1
+    queue.put(2, "b.com", PRIORITY_INTERACTIVE, group="g")
+
+    snapshot = queue.snapshot()
+    assert [(item["target_id"], item["position"], item["priority_name"]) for item in snapshot] == [
+        (2, 1, "interactive"), (1, 2, "scheduled")
+    ]
+    assert snapshot[0]["group"] == "g"
+    assert snapshot[1]["group"] == "default"
+    assert queue.snapshot(limit=1)[0]["target_id"] == 2
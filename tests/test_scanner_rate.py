@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.config import hawks_config
+from app.resources import HawksRateBudget
+from app.scanner import HawksScanner
+
+# Ferramenta falsa: copia a lista de entrada (-l) para a saída (-o), como um httpx em que tudo está vivo
+FAKE_HTTPX = "import shutil, sys; shutil.copyfile(sys.argv[1], sys.argv[2])"
+
+
+@pytest.fixture
+def scanner(tmp_path, monkeypatch):
+    monkeypatch.setattr(hawks_config, "workspace_dir", str(tmp_path))
+    monkeypatch.setattr(hawks_config, "workspace_tmpfs", False)
+    monkeypatch.setattr(hawks_config, "httpx_batch_size", 2)
+    scanner = HawksScanner()
+    scanner.rate_budget = HawksRateBudget(global_rps=100)
+    scanner.leases = []
+    lease_for = scanner._rate_lease
+
+    @asynccontextmanager
+    async def recording_lease(tool, domain):
+        async with lease_for(tool, domain) as lease:
+            scanner.leases.append(lease.rate)
+            yield lease
+
+    scanner._rate_lease = recording_lease
+    yield scanner
+    scanner.workspaces.release_all()
+
+
+def run_batches(scanner, hosts):
+    async def scenario():
+        workspace = scanner._workspace("scan-rate")
+        input_file = workspace.write_lines("hosts.txt", hosts)
+        output_file = workspace.file("live_hosts.txt")
+        build_cmd = lambda batch_file, batch_output, rate: [sys.executable, "-c", FAKE_HTTPX, batch_file, batch_output]
+        returncode, _ = await scanner._run_httpx_batches(
+            "scan-rate", workspace, input_file, output_file, "example.com", build_cmd, os.environ.copy()
+        )
+        with open(output_file, encoding="utf-8") as f:
+            return returncode, f.read().split(), sorted(os.listdir(workspace.path))
+    return asyncio.run(scenario())
+
+
+def test_httpx_batches_take_a_lease_each_and_merge_the_output(scanner):
+    hosts = [f"h{index}.example.com" for index in range(5)]
+    returncode, live_hosts, files = run_batches(scanner, hosts)
+    assert returncode == 0
+    assert live_hosts == hosts
+    assert len(scanner.leases) == 3
+    # Arquivos dos lotes não ficam no workspace
+    assert files == ["hosts.txt", "live_hosts.txt"]
+
+
+def test_httpx_runs_once_without_rate_budget(scanner):
+    scanner.rate_budget = HawksRateBudget()
+    hosts = [f"h{index}.example.com" for index in range(5)]
+    returncode, live_hosts, _ = run_batches(scanner, hosts)
+    assert returncode == 0
+    assert live_hosts == hosts
+    assert scanner.leases == [0]
+
+
+def test_native_probe_leases_per_batch(scanner):
+    class FakeProber:
+        def __init__(self):
+            self.calls = []
+
+        async def probe(self, hosts, rate=0):
+            self.calls.append((list(hosts), rate))
+            return [f"https://{host}" for host in hosts]
+
+        def status(self):
+            return {}
+
+    scanner.http_prober = FakeProber()
+    hosts = ["a.example.com", "b.example.com", "c.example.com"]
+    result = asyncio.run(scanner._run_native_probe(hosts, "example.com"))
+    assert result["live_hosts"] == [f"https://{host}" for host in hosts]
+    assert [batch for batch, _ in scanner.http_prober.calls] == [hosts[:2], hosts[2:]]
+    assert [rate for _, rate in scanner.http_prober.calls] == scanner.leases
@@ -0,0 +1,170 @@
+import time
+
+import jwt
+
+from app.security import HawksLoginLimiter, HawksTokenCache, decode_token
+
+SECRET = "test-secret"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_token(username="admin", expires_in=3600, secret=SECRET, **claims):
+    payload = {"sub": username, **claims}
+    if expires_in is not None:
+        payload["exp"] = int(time.time()) + expires_in
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def test_token_cache_hit_and_miss():
+    clock = FakeClock()
+    cache = HawksTokenCache(clock=clock)
+    assert cache.get("t1") is None
+    cache.put("t1", "admin", clock.now + 60)
+
+    assert cache.get("t1") == "admin"
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_token_cache_expires_entries():
+    clock = FakeClock()
+    cache = HawksTokenCache(clock=clock)
+    cache.put("t1", "admin", clock.now + 60)
+
+    clock.now += 60
+    assert cache.get("t1") is None
+    assert "t1" not in cache.entries
+
+
+def test_token_cache_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = HawksTokenCache(max_entries=2, clock=clock)
+    cache.put("t1", "a", clock.now + 60)
+    cache.put("t2", "b", clock.now + 60)
+    # Leitura renova t1: o próximo a sair é t2
+    assert cache.get("t1") == "a"
+    cache.put("t3", "c", clock.now + 60)
+
+    assert list(cache.entries) == ["t1", "t3"]
+    assert cache.get("t2") is None
+
+
+def test_token_cache_disabled_and_discard():
+    cache = HawksTokenCache(max_entries=0)
+    cache.put("t1", "a", time.time() + 60)
+    assert cache.entries == {}
+
+    cache = HawksTokenCache()
+    cache.put("t1", "a", time.time() + 60)
+    cache.discard("t1")
+    cache.discard("missing")
+    assert cache.get("t1") is None
+
+
+def test_decode_token_caches_only_valid_tokens():
+    cache = HawksTokenCache()
+    token = make_token()
+
+    assert decode_token(token, SECRET, cache) == "admin"
+    assert token in cache.entries
+    assert decode_token(token, SECRET, cache) == "admin"
+    assert cache.stats["hits"] == 1
+
+    forged = make_token(secret="other-secret")
+    assert decode_token(forged, SECRET, cache) is None
+    assert decode_token(make_token(expires_in=-10), SECRET, cache) is None
+    assert decode_token("not-a-token", SECRET, cache) is None
+    assert list(cache.entries) == [token]
+
+
+def test_decode_token_without_exp_is_not_cached():
+    cache = HawksTokenCache()
+    token = make_token(expires_in=None)
+
+    assert decode_token(token, SECRET, cache) == "admin"
+    assert cache.entries == {}
+
+
+def test_decode_token_without_subject():
+    token = jwt.encode({"exp": int(time.time()) + 60}, SECRET, algorithm="HS256")
+    assert decode_token(token, SECRET, HawksTokenCache()) is None
+
+
+def test_login_limiter_blocks_after_max_attempts():
+    clock = FakeClock()
+    limiter = HawksLoginLimiter(max_attempts=3, window=60, clock=clock)
+    for _ in range(2):
+        limiter.record_failure("10.0.0.1")
+    assert not limiter.is_limited("10.0.0.1")
+
+    limiter.record_failure("10.0.0.1")
+    assert limiter.is_limited("10.0.0.1")
+    assert not limiter.is_limited("10.0.0.2")
+
+
+def test_login_limiter_window_expires():
+    clock = FakeClock()
+    limiter = HawksLoginLimiter(max_attempts=2, window=60, clock=clock)
+    limiter.record_failure("10.0.0.1")
+    limiter.record_failure("10.0.0.1")
+    assert limiter.is_limited("10.0.0.1")
+
+    clock.now += 61
+    assert not limiter.is_limited("10.0.0.1")
+    assert limiter.attempts == {}
+
+    # Uma falha depois da janela recomeça a contagem do zero
+    limiter.record_failure("10.0.0.1")
+    assert limiter.attempts["10.0.0.1"][0] == 1
+
+
+def test_login_limiter_window_slides_with_each_failure():
+    clock = FakeClock()
+    limiter = HawksLoginLimiter(max_attempts=2, window=60, clock=clock)
+    limiter.record_failure("10.0.0.1")
+    clock.now += 50
+    limiter.record_failure("10.0.0.1")
+    clock.now += 50
+    assert limiter.is_limited("10.0.0.1")
+
+
+def test_login_limiter_reset():
+    limiter = HawksLoginLimiter(max_attempts=1, clock=FakeClock())
+    limiter.record_failure("10.0.0.1")
+    limiter.reset("10.0.0.1")
+    limiter.reset("10.0.0.9")
+    assert not limiter.is_limited("10.0.0.1")
+
+
+def test_login_limiter_expires_stale_entries_lazily():
+    clock = FakeClock()
+    limiter = HawksLoginLimiter(window=60, clock=clock)
+    for i in range(20):
+        limiter.record_failure(f"10.0.0.{i}")
+    clock.now += 61
+
+    # Cada chamada descarta no máximo 8 entradas vencidas do início
+    limiter.is_limited("192.168.0.1")
+    assert len(limiter.attempts) == 12
+    limiter.record_failure("192.168.0.1")
+    assert len(limiter.attempts) == 5
+    limiter.is_limited("192.168.0.1")
+    assert list(limiter.attempts) == ["192.168.0.1"]
+
+
+def test_login_limiter_bounds_tracked_ips():
+    limiter = HawksLoginLimiter(max_entries=3, clock=FakeClock())
+    for i in range(5):
+        limiter.record_failure(f"10.0.0.{i}")
+    # Repetir a falha move o IP para o fim e o protege da remoção
+    limiter.record_failure("10.0.0.2")
+    limiter.record_failure("10.0.0.9")
+
+    assert list(limiter.attempts) == ["10.0.0.4", "10.0.0.2", "10.0.0.9"]
+    assert limiter.status()["tracked_ips"] == 3
@@ -0,0 +1,52 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app.database import HawksTarget, close_session, engine, get_db, open_session
+
+
+def test_request_session_keeps_its_connection_across_commits(db):
+    dependency = get_db()
+    session = next(dependency)
+    try:
+        connection = session.connection()
+        session.add(HawksTarget(domain_ip="a.example.com"))
+        session.commit()
+        assert session.connection() is connection
+        assert session.query(HawksTarget).count() == 1
+    finally:
+        dependency.close()
+    assert connection.closed
+
+
+def test_open_session_waits_for_a_connection_without_blocking_the_loop(database):
+    pool = engine.pool
+    held = [engine.connect() for _ in range(pool.size() + pool._max_overflow)]
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        # Pool esgotado: a espera acontece numa thread e o loop segue atendendo o resto
+        asyncio.get_running_loop().call_later(0.2, held.pop().close)
+        session = await asyncio.wait_for(open_session(), timeout=5)
+        try:
+            assert ticks >= 10
+            assert session.execute(text("SELECT 1")).scalar() == 1
+        finally:
+            close_session(session)
+            ticking.cancel()
+
+    try:
+        checked_out = pool.checkedout()
+        asyncio.run(scenario())
+        assert pool.checkedout() == checked_out - 1
+    finally:
+        for connection in held:
+            connection.close()
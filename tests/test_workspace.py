@@ -0,0 +1,76 @@
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from app.workspace import HawksWorkspaceManager, HawksWorkspaceQuotaError, fsize_limited_command, resource
+
+posix_only = pytest.mark.skipif(resource is None, reason="RLIMIT_FSIZE só existe em POSIX")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = HawksWorkspaceManager(base_dir=str(tmp_path), use_tmpfs=False, quota_mb=1)
+    yield manager
+    manager.release_all()
+
+
+def test_quota_is_reached_at_the_limit(manager):
+    workspace = manager.create("scan_1")
+    workspace.write_lines("hosts.txt", ["a.example.com"])
+    assert workspace.quota_error() is None
+
+    with open(workspace.file("big.txt"), "wb") as f:
+        f.write(b"x" * (workspace.quota_bytes - workspace.usage()))
+    assert "quota exceeded" in workspace.quota_error()
+    with pytest.raises(HawksWorkspaceQuotaError):
+        workspace.check_quota()
+
+
+def test_release_removes_workspace(manager):
+    workspace = manager.create("scan_1")
+    assert manager.create("scan_1") is workspace
+    manager.release("scan_1")
+    assert manager.get("scan_1") is None
+    assert not os.path.exists(workspace.path)
+
+
+def test_no_limit_keeps_command():
+    assert fsize_limited_command(("httpx", "-l", "hosts.txt"), 0) == ["httpx", "-l", "hosts.txt"]
+
+
+@posix_only
+def test_limited_command_runs_the_tool(tmp_path):
+    output = tmp_path / "out.txt"
+    cmd = fsize_limited_command(["sh", "-c", f"printf hello > {output}; exit 3"], 1024)
+    assert subprocess.run(cmd).returncode == 3
+    assert output.read_bytes() == b"hello"
+
+
+@posix_only
+def test_limited_command_stops_large_writes(tmp_path):
+    output = tmp_path / "out.bin"
+    with open(output, "wb") as f:
+        # head recebe SIGXFSZ com a ação padrão (o interpretador intermediário não a deixa ignorada)
+        result = subprocess.run(fsize_limited_command(["head", "-c", "65536", "/dev/zero"], 4096), stdout=f)
+    assert result.returncode == -signal.SIGXFSZ
+    assert output.stat().st_size == 4096
+
+
+@posix_only
+def test_missing_tool_reports_error():
+    result = subprocess.run(fsize_limited_command(["/nonexistent/httpx"], 1024), capture_output=True)
+    assert result.returncode == 1
+    assert b"/nonexistent/httpx" in result.stderr
+
+
+@posix_only
+def test_limited_command_exit_status_of_python_tool(tmp_path):
+    # Ferramentas em Python ignoram SIGXFSZ e recebem o erro de escrita (EFBIG)
+    output = tmp_path / "out.bin"
+    code = f"open({str(output)!r}, 'wb').write(b'x' * 65536)"
+    result = subprocess.run(fsize_limited_command([sys.executable, "-c", code], 4096), capture_output=True)
+    assert result.returncode != 0
+    assert output.stat().st_size <= 4096